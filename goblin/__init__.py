@@ -2,3 +2,21 @@ import os
 
 __goblin_version_path__ = os.path.realpath(__file__ + '/../VERSION')
 __version__ = open(__goblin_version_path__, 'r').readline().strip()
+
+
+def warmup(models=None, cache_dir=None):
+    """
+    Set up the gremlin methods of ``models``, every model defined so far by
+    default, so the first requests don't parse groovy files. Call it before
+    forking workers so they all start with the methods ready.
+
+    :param list models: The model classes
+    :param str cache_dir: Keep the parsed groovy files in this directory
+        too, see :func:`goblin.gremlin.groovy.set_cache_dir`
+    :returns: The number of gremlin methods set up
+    """
+    from goblin.gremlin.base import setup_methods
+    if cache_dir is not None:
+        from goblin.gremlin.groovy import set_cache_dir
+        set_cache_dir(cache_dir)
+    return setup_methods(models)
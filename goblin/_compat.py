@@ -1,8 +1,12 @@
 from __future__ import unicode_literals
+import sys
+
 import six
 
 PY2 = six.PY2
 PY3 = six.PY3
+# native coroutines (async def / await)
+PY35 = sys.version_info >= (3, 5)
 
 # conversions
 unichr = six.unichr
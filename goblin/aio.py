@@ -0,0 +1,312 @@
+"""
+Native coroutine (``async def``/``await``) API. Requires Python 3.5+.
+
+Every model operation has an awaitable counterpart of its future returning
+method, prefixed with ``a``::
+
+    person = await Person.acreate(name='Leif')
+    friend = await Person.aget(friend_id)
+    await Knows(person, friend).asave()
+
+    async for vertex in V(person).out_step(Knows).aget():
+        print(vertex.name)
+
+The coroutines step the same operations as the classic API (see
+:py:mod:`goblin.coroutines`), awaiting the pool and the response stream
+directly instead of chaining a future per step.
+"""
+import collections
+import inspect
+
+from goblin import connection
+from goblin.constants import DELETE_CHUNK_SIZE
+from goblin.coroutines import Return
+from goblin.streaming import ResultStream
+from goblin.exceptions import GoblinRelationshipException
+
+
+async def drive(operation):
+    """
+    Run an operation generator to completion inside the current coroutine
+    and return its value.
+    """
+    value, exc = None, None
+    while True:
+        try:
+            if exc is not None:
+                yielded = operation.throw(exc)
+            else:
+                yielded = operation.send(value)
+        except (Return, StopIteration) as e:
+            return getattr(e, 'value', None)
+        try:
+            if inspect.isgenerator(yielded):
+                value = await drive(yielded)
+            else:
+                value = await yielded
+        except Exception as e:
+            value, exc = None, e
+        else:
+            exc = None
+
+
+async def execute_query(query, bindings=None, **kwargs):
+    """
+    Send a raw Gremlin query and return the response stream. Takes the
+    parameters of :func:`goblin.connection.execute_query`.
+    """
+    kwargs.pop('future_class', None)
+    return await drive(connection.submit(query, bindings=bindings, **kwargs))
+
+
+class Results(ResultStream):
+    """
+    :class:`goblin.streaming.ResultStream` of an operation's results. Await
+    it for a list of every result, or iterate over it with ``async for``,
+    which only requests the next server batch once the previous one was
+    consumed and deserializes results one at a time::
+
+        people = await Person.aall()
+        async with V(person).out_step(Knows).aget() as friends:
+            async for friend in friends:
+                if friend.name == 'Leif':
+                    break
+
+    Leaving the ``async with`` block, or awaiting :meth:`aclose`, stops a
+    response that is still being sent.
+    """
+
+    def __init__(self, operation, deserialize=True):
+        super(Results, self).__init__(operation, deserialize=deserialize)
+        self._batch = collections.deque()
+
+    def __await__(self):
+        return self.all().__await__()
+
+    async def all(self):
+        """ Read the remaining results into a list """
+        results = []
+        async for result in self:
+            results.append(result)
+        return results
+
+    async def stream(self):
+        """ The underlying :py:class:`gremlinclient.connection.Stream` """
+        return await drive(self._open())
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._batch:
+            batch = await drive(self._read_batch())
+            if batch is None:
+                raise StopAsyncIteration
+            self._batch.extend(batch)
+        return self.deserialize(self._batch.popleft())
+
+    async def aclose(self):
+        """ Awaitable :meth:`close<goblin.streaming.ResultStream.close>` """
+        self._batch.clear()
+        await drive(self._close())
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+
+class AsyncElementMixin(object):
+    """ ``async def`` API shared by vertices and edges """
+
+    @classmethod
+    async def aget(cls, id, **kwargs):
+        """ Awaitable :meth:`get<goblin.models.element.BaseElement.get>` """
+        return await drive(cls._get(id, **kwargs))
+
+    @classmethod
+    def aall(cls, ids=None, deserialize=True, **kwargs):
+        """
+        :meth:`all<goblin.models.element.BaseElement.all>` returning
+        awaitable, async iterable :class:`Results`
+        """
+        return Results(cls._all(ids=ids, deserialize=False, **kwargs),
+                       deserialize=deserialize)
+
+    @classmethod
+    async def acreate(cls, *args, **kwargs):
+        """ Awaitable :meth:`create<goblin.models.element.BaseElement.create>` """
+        query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+        element = cls(*args, **kwargs)
+        return await element.asave(**query_kwargs)
+
+    async def asave(self, **kwargs):
+        """ Awaitable ``save`` """
+        # run the validations of BaseElement.save
+        super(AsyncElementMixin, self).save()
+        return await drive(self._save(**kwargs))
+
+    async def adelete(self, **kwargs):
+        """ Awaitable ``delete`` """
+        return await drive(self._delete(**kwargs))
+
+    @classmethod
+    async def adelete_where(cls, chunk_size=DELETE_CHUNK_SIZE, **filters):
+        """ Awaitable :meth:`delete_where<goblin.models.element.BaseElement.delete_where>` """
+        query_kwargs = connection.pop_execute_query_kwargs(filters)
+        return await drive(cls._delete_where(chunk_size, filters,
+                                             **query_kwargs))
+
+    async def areload(self, **kwargs):
+        """ Awaitable :meth:`reload<goblin.models.element.BaseElement.reload>` """
+        return await drive(self._reload(**kwargs))
+
+
+class AsyncVertexMixin(object):
+    """ ``async def`` API of :class:`goblin.models.Vertex` """
+
+    @classmethod
+    async def abulk_create(cls, vertices, **kwargs):
+        """ Awaitable :meth:`bulk_create<goblin.models.Vertex.bulk_create>` """
+        vertices = cls._bulk_prepare(vertices)
+        return await drive(cls._bulk_create(vertices, **kwargs))
+
+    @classmethod
+    async def aget_or_create(cls, key_field, value, defaults=None,
+                             **kwargs):
+        """ Awaitable :meth:`get_or_create<goblin.models.Vertex.get_or_create>` """
+        values = dict(defaults or {})
+        values[key_field] = value
+        vertices, key = cls._upsert_prepare([values], key_field)
+        return await drive(cls._get_or_create(vertices[0], key, **kwargs))
+
+    @classmethod
+    async def abulk_upsert(cls, rows, key, **kwargs):
+        """ Awaitable :meth:`bulk_upsert<goblin.models.Vertex.bulk_upsert>` """
+        vertices, db_key = cls._upsert_prepare(rows, key)
+        return await drive(cls._bulk_upsert(vertices, db_key, **kwargs))
+
+    def _atraversal(self, operation, labels, deserialize=True, **kwargs):
+        return Results(self._traversal_operation(
+            operation, labels, deserialize=False, **kwargs),
+            deserialize=deserialize)
+
+    def aoutV(self, *labels, **kwargs):
+        """ :meth:`outV<goblin.models.Vertex.outV>` returning :class:`Results` """
+        return self._atraversal('outV', labels, **kwargs)
+
+    def ainV(self, *labels, **kwargs):
+        """ :meth:`inV<goblin.models.Vertex.inV>` returning :class:`Results` """
+        return self._atraversal('inV', labels, **kwargs)
+
+    def aoutE(self, *labels, **kwargs):
+        """ :meth:`outE<goblin.models.Vertex.outE>` returning :class:`Results` """
+        return self._atraversal('outE', labels, **kwargs)
+
+    def ainE(self, *labels, **kwargs):
+        """ :meth:`inE<goblin.models.Vertex.inE>` returning :class:`Results` """
+        return self._atraversal('inE', labels, **kwargs)
+
+    def abothE(self, *labels, **kwargs):
+        """ :meth:`bothE<goblin.models.Vertex.bothE>` returning :class:`Results` """
+        return self._atraversal('bothE', labels, **kwargs)
+
+    def abothV(self, *labels, **kwargs):
+        """ :meth:`bothV<goblin.models.Vertex.bothV>` returning :class:`Results` """
+        return self._atraversal('bothV', labels, **kwargs)
+
+
+class AsyncEdgeMixin(object):
+    """ ``async def`` API of :class:`goblin.models.Edge` """
+
+    @classmethod
+    async def abulk_create(cls, rows, **kwargs):
+        """ Awaitable :meth:`bulk_create<goblin.models.Edge.bulk_create>` """
+        edges = cls._bulk_prepare(rows)
+        return await drive(cls._bulk_create(edges, **kwargs))
+
+    async def ainV(self, **kwargs):
+        """ Awaitable :meth:`inV<goblin.models.Edge.inV>` """
+        return await drive(self._vertex('inV', **kwargs))
+
+    async def aoutV(self, **kwargs):
+        """ Awaitable :meth:`outV<goblin.models.Edge.outV>` """
+        return await drive(self._vertex('outV', **kwargs))
+
+
+class AsyncQueryMixin(object):
+    """ ``async def`` API of :class:`goblin.models.V` """
+
+    def aget(self, deserialize=True, **kwargs):
+        """
+        :meth:`get<goblin.models.V.get>` returning awaitable, async iterable
+        :class:`Results`. Without any steps, awaiting ``V(vertex).aget()``
+        returns the start vertex itself.
+        """
+        if self._gets_start():
+            return drive(self._get_element(deserialize, **kwargs))
+        return Results(self._stream(False, **kwargs),
+                       deserialize=deserialize)
+
+    async def acount(self, **kwargs):
+        """ Awaitable :meth:`count<goblin.models.V.count>` """
+        return await drive(self._count(**kwargs))
+
+    async def adrop(self, chunk_size=DELETE_CHUNK_SIZE, **kwargs):
+        """ Awaitable :meth:`drop<goblin.models.V.drop>` """
+        return await drive(self._drop(chunk_size, **kwargs))
+
+    def __aiter__(self):
+        return self.aget().__aiter__()
+
+
+class AsyncRelationshipMixin(object):
+    """ ``async def`` API of :class:`goblin.relationships.Relationship` """
+
+    def _check_vertex(self):
+        if not self.top_level_vertex:
+            raise GoblinRelationshipException("No Vertex Instantiated")
+
+    async def acreate(self, edge_params={}, vertex_params={}, edge_type=None,
+                      vertex_type=None, callback=None, **kwargs):
+        """
+        Awaitable :meth:`create<goblin.relationships.Relationship.create>`
+        """
+        self._check_vertex()
+        edge_type, vertex_type = self._relationship_types(edge_type,
+                                                          vertex_type)
+        return await drive(self._create(edge_params, vertex_params,
+                                        edge_type, vertex_type, callback))
+
+    async def abulk_create(self, rows, edge_type=None, vertex_type=None,
+                           **kwargs):
+        """
+        Awaitable
+        :meth:`bulk_create<goblin.relationships.Relationship.bulk_create>`
+        """
+        self._check_vertex()
+        edge_type, vertex_type = self._relationship_types(edge_type,
+                                                          vertex_type)
+        pairs = self._bulk_prepare(rows, edge_type, vertex_type)
+        return await drive(self._bulk_create(pairs, **kwargs))
+
+    def avertices(self, **kwargs):
+        """
+        :meth:`vertices<goblin.relationships.Relationship.vertices>`
+        returning :class:`Results`
+        """
+        self._check_vertex()
+        return Results(self.top_level_vertex._traversal_operation(
+            self.direction.lower() + 'V', self._edge_labels(),
+            deserialize=False))
+
+    def aedges(self, **kwargs):
+        """
+        :meth:`edges<goblin.relationships.Relationship.edges>` returning
+        :class:`Results`
+        """
+        self._check_vertex()
+        return Results(self.top_level_vertex._traversal_operation(
+            self.direction.lower() + 'E', self._edge_labels(),
+            deserialize=False))
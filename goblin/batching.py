@@ -0,0 +1,125 @@
+"""
+Batching of element lookups.
+
+Once enabled with :func:`goblin.connection.setup`::
+
+    connection.setup(url, batch_gets=True)
+
+the :meth:`get<goblin.models.element.BaseElement.get>` and
+:meth:`V(id).get()<goblin.models.query.V.get>` calls made in the same event
+loop iteration are collected by a :class:`GetLoader` and sent as one
+``g.V(*ids)`` query per element label, instead of one query each. Lookups
+passing their own execute query arguments (``pool``, ``graph_name``, ...)
+are not batched.
+"""
+from __future__ import unicode_literals
+import logging
+from collections import OrderedDict
+
+from goblin import connection
+from goblin._compat import text_type
+from goblin.constants import GET_BATCH_SIZE
+from goblin.coroutines import Return, run
+
+
+logger = logging.getLogger(__name__)
+
+
+def id_key(id):
+    """
+    Key matching the id of an element as passed by a caller with its id in
+    the response of the server. Titan accepts the vertex id ``"4128"`` and
+    answers with the vertex ``4128``.
+    """
+    return text_type(id)
+
+
+def _call_soon(loop, callback):
+    if loop is None:
+        try:
+            from tornado.ioloop import IOLoop
+        except ImportError:  # pragma: no cover
+            import asyncio
+            loop = asyncio.get_event_loop()
+        else:
+            loop = IOLoop.current()
+    add_callback = getattr(loop, 'add_callback', None) or loop.call_soon
+    add_callback(callback)
+
+
+class GetLoader(object):
+    """
+    Collects element lookups and loads them in batches.
+
+    :param int max_batch_size: maximum number of ids sent in one query
+    :param loop: event loop the batches are dispatched from. Defaults to
+        the current :py:class:`tornado.ioloop.IOLoop`
+    """
+
+    def __init__(self, max_batch_size=GET_BATCH_SIZE, loop=None):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+        self.max_batch_size = max_batch_size
+        self._loop = loop
+        # (source, label) -> id -> futures waiting for the element
+        self._pending = OrderedDict()
+        self._scheduled = False
+
+    def load(self, source, id, label=None, future_class=None):
+        """
+        Queue the lookup of an element.
+
+        :param str source: traversal step, ``V`` or ``E``
+        :param id: id of the element
+        :param str label: Only match elements with this label (optional)
+        :returns: Future - the raw GraphSON element, ``None`` if not found
+        """
+        future = connection.get_future({'future_class': future_class})
+        waiters = self._pending.setdefault((source, label), OrderedDict())
+        waiters.setdefault(id, []).append(future)
+        if not self._scheduled:
+            self._scheduled = True
+            _call_soon(self._loop, self.dispatch)
+        return future
+
+    def dispatch(self):
+        """ Send the queued lookups """
+        pending, self._pending = self._pending, OrderedDict()
+        self._scheduled = False
+        for (source, label), waiters in pending.items():
+            waiters = list(waiters.items())
+            for i in range(0, len(waiters), self.max_batch_size):
+                batch = waiters[i:i + self.max_batch_size]
+                run(self._fetch(source, label, batch),
+                    connection.get_future({}))
+
+    def _fetch(self, source, label, waiters):
+        """ Operation loading a batch and resolving its futures """
+        ids = [id for id, _ in waiters]
+        script = 'g.%s(*eids)' % source
+        bindings = {'eids': ids}
+        if label is not None:
+            script += '.hasLabel(x)'
+            bindings['x'] = label
+        logger.debug("Loading %d elements with %s", len(ids), script)
+        found = {}
+        try:
+            stream = yield connection.submit(script, bindings=bindings)
+            while True:
+                message = yield stream.read()
+                if message is None:
+                    break
+                for result in message.data or []:
+                    found[id_key(result['id'])] = result
+        except Exception as e:
+            for _, futures in waiters:
+                for future in futures:
+                    future.set_exception(e)
+        else:
+            for id, futures in waiters:
+                result = found.get(id_key(id))
+                for future in futures:
+                    # deserializing rewrites the properties of the result,
+                    # give every caller its own
+                    future.set_result(result and dict(result))
+        raise Return(None)
@@ -0,0 +1,3 @@
+from .runner import (BENCHMARKS, benchmark, compare, load_baseline, measure,
+                     run, write_baseline)
+from . import suite
@@ -0,0 +1,103 @@
+"""
+Run the model layer benchmarks::
+
+    $ python -m goblin.benchmarks --backend memory --output baseline.json
+"""
+from __future__ import unicode_literals
+import argparse
+import logging
+import os.path
+
+from tornado import concurrent
+from tornado.ioloop import IOLoop
+
+from goblin import connection
+from goblin._compat import print_
+from goblin.benchmarks import (BENCHMARKS, compare, load_baseline, run,
+                               write_baseline)
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+BACKENDS = ('memory', 'stub', 'server')
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m goblin.benchmarks',
+        description="Benchmark the goblin model layer")
+    parser.add_argument(
+        "--backend", choices=BACKENDS, default='memory',
+        help="memory: in-process backend, stub: in-process backend behind a "
+             "local websocket server, server: a running Gremlin Server")
+    parser.add_argument(
+        "--url", default='ws://localhost:8182/',
+        help="Gremlin Server url used by the server backend")
+    parser.add_argument(
+        "--ops", type=int, default=1000,
+        help="Number of measured operations per benchmark")
+    parser.add_argument(
+        "--warmup", type=int, default=50,
+        help="Number of unmeasured operations run first")
+    parser.add_argument(
+        "--output", default=DEFAULT_BASELINE,
+        help="JSON file the results are written to")
+    parser.add_argument(
+        "--compare", metavar='BASELINE',
+        help="JSON file to compare the results against")
+    parser.add_argument(
+        "--list", action='store_true', help="List the benchmarks and exit")
+    parser.add_argument(
+        "benchmarks", nargs='*', help="Benchmarks to run. Defaults to all")
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    if args.list:
+        for name in BENCHMARKS:
+            print_(name)
+        return
+
+    server = None
+    if args.backend == 'memory':
+        from goblin.memory import Pool
+        connection.setup('ws://benchmarks:8182/', pool_class=Pool,
+                         future_class=concurrent.Future)
+    elif args.backend == 'stub':
+        from goblin.memory.server import StubServer
+        server = StubServer()
+        server.start()
+        connection.setup(server.url, future_class=concurrent.Future)
+    else:
+        connection.setup(args.url, future_class=concurrent.Future)
+
+    try:
+        report = IOLoop.current().run_sync(
+            lambda: run(args.benchmarks, ops=args.ops, warmup=args.warmup,
+                        backend=args.backend))
+    finally:
+        connection.tear_down()
+        if server is not None:
+            server.stop()
+
+    baseline = load_baseline(args.compare) if args.compare else None
+    print_("{:<24}{:>12}{:>12}{:>12}{:>14}".format(
+        'benchmark', 'ops/sec', 'p50 ms', 'p99 ms', 'alloc B/op'))
+    for name, result in report['results'].items():
+        print_("{:<24}{:>12}{:>12}{:>12}{:>14}".format(
+            name, result['ops_per_sec'], result['p50_ms'], result['p99_ms'],
+            result['alloc_bytes_per_op']))
+    if baseline is not None:
+        print_()
+        for name, before, after, change in compare(report, baseline):
+            print_("{:<24}{:>12}{:>12}{:>+11.1%}".format(
+                name, before, after, change))
+
+    write_baseline(report, args.output)
+    print_("\nResults written to {}".format(args.output))
+
+
+if __name__ == '__main__':
+    logging.basicConfig()
+    main()
@@ -0,0 +1,27 @@
+from __future__ import unicode_literals
+
+from goblin.constants import OUT
+from goblin.models import Edge, Vertex
+from goblin.properties import Double, Integer, String
+from goblin.relationships import Relationship
+
+
+class BenchmarkKnows(Edge):
+    weight = Double(default=1.0)
+
+
+class BenchmarkWorksAt(Edge):
+    since = Integer(default=2016)
+
+
+class BenchmarkCompany(Vertex):
+    name = String(default='company')
+
+
+class BenchmarkPerson(Vertex):
+    name = String(default='person')
+    age = Integer(default=30)
+    email = String()
+
+    works_at = Relationship(BenchmarkWorksAt, BenchmarkCompany,
+                            direction=OUT)
@@ -0,0 +1,177 @@
+from __future__ import unicode_literals
+import gc
+import json
+import logging
+import math
+import platform
+import timeit
+from collections import OrderedDict
+
+from tornado import gen
+from tornado.concurrent import is_future
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+import goblin
+
+
+logger = logging.getLogger(__name__)
+
+# name -> setup coroutine, in registration order
+BENCHMARKS = OrderedDict()
+
+
+def benchmark(name, ops=None):
+    """
+    Register a benchmark. The decorated callable is a coroutine that
+    prepares the graph and returns the operation to be measured. The
+    operation returns either a value or a future, which the runner waits on.
+
+    :param str name: Name the results are reported under
+    :param int ops: number of operations to measure, overriding the number
+        requested on the command line. Useful for expensive operations.
+    """
+    def decorator(func):
+        func.ops = ops
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def percentile(values, pct):
+    """
+    Return the ``pct`` percentile of ``values`` using the nearest rank
+    method.
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = int(math.ceil(pct / 100.0 * len(values))) - 1
+    return values[min(max(rank, 0), len(values) - 1)]
+
+
+@gen.coroutine
+def _call(op):
+    result = op()
+    if is_future(result):
+        result = yield result
+    raise gen.Return(result)
+
+
+@gen.coroutine
+def measure(op, ops, warmup=0):
+    """
+    Run ``op`` sequentially ``ops`` times and collect its timings.
+
+    Allocations are measured in a second pass with :py:mod:`tracemalloc`, so
+    tracing does not inflate the latencies. ``alloc_bytes_per_op`` is the
+    mean peak of memory allocated while a single operation runs and
+    ``retained_bytes_per_op`` the mean that is still allocated after it
+    finished.
+
+    :returns: dict
+    """
+    for _ in range(warmup):
+        yield _call(op)
+
+    gc.collect()
+    latencies = []
+    timer = timeit.default_timer
+    started = timer()
+    for _ in range(ops):
+        op_started = timer()
+        yield _call(op)
+        latencies.append(timer() - op_started)
+    elapsed = timer() - started
+
+    results = OrderedDict()
+    results['ops'] = ops
+    results['ops_per_sec'] = round(ops / elapsed, 1) if elapsed else None
+    results['mean_ms'] = round(1000 * elapsed / ops, 4)
+    results['p50_ms'] = round(1000 * percentile(latencies, 50), 4)
+    results['p99_ms'] = round(1000 * percentile(latencies, 99), 4)
+    results['alloc_bytes_per_op'] = None
+    results['retained_bytes_per_op'] = None
+
+    if tracemalloc is not None:
+        peaks = []
+        retained = []
+        alloc_ops = min(ops, 200)
+        tracemalloc.start()
+        try:
+            for _ in range(alloc_ops):
+                tracemalloc.clear_traces()
+                yield _call(op)
+                current, peak = tracemalloc.get_traced_memory()
+                peaks.append(peak)
+                retained.append(current)
+        finally:
+            tracemalloc.stop()
+        results['alloc_bytes_per_op'] = int(sum(peaks) / alloc_ops)
+        results['retained_bytes_per_op'] = int(sum(retained) / alloc_ops)
+
+    raise gen.Return(results)
+
+
+@gen.coroutine
+def run(names=None, ops=1000, warmup=50, backend='memory'):
+    """
+    Run the registered benchmarks. :func:`goblin.connection.setup` must have
+    been called.
+
+    :param list names: The benchmarks to run (optional). Defaults to all
+    :param int ops: The number of measured operations per benchmark
+    :param int warmup: The number of unmeasured operations run first
+    :param str backend: Name of the backend, recorded with the results
+
+    :returns: dict with ``meta`` and per benchmark ``results``
+    """
+    names = names or list(BENCHMARKS.keys())
+    results = OrderedDict()
+    for name in names:
+        try:
+            setup = BENCHMARKS[name]
+        except KeyError:
+            raise ValueError("Unknown benchmark '{}'".format(name))
+        op = yield setup()
+        logger.info("Running %s", name)
+        results[name] = yield measure(op, setup.ops or ops, warmup=warmup)
+
+    meta = OrderedDict()
+    meta['goblin'] = goblin.__version__
+    meta['python'] = platform.python_version()
+    meta['implementation'] = platform.python_implementation()
+    meta['backend'] = backend
+    raise gen.Return({'meta': meta, 'results': results})
+
+
+def write_baseline(report, path):
+    """ Write a report as stable, diffable JSON """
+    with open(path, 'w') as fp:
+        json.dump(report, fp, indent=2, separators=(',', ': '))
+        fp.write('\n')
+
+
+def load_baseline(path):
+    with open(path) as fp:
+        return json.load(fp)
+
+
+def compare(report, baseline, metric='mean_ms'):
+    """
+    Compare ``metric`` between two reports.
+
+    :returns: list of ``(name, baseline_value, value, relative_change)``
+    """
+    rows = []
+    for name, result in report['results'].items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None or not previous.get(metric):
+            continue
+        value = result[metric]
+        change = (value - previous[metric]) / float(previous[metric])
+        rows.append((name, previous[metric], value, change))
+    return rows
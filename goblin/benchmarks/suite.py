@@ -0,0 +1,147 @@
+from __future__ import unicode_literals
+import itertools
+
+from tornado import gen
+
+from goblin.models import V
+from goblin.models.element import Element
+from goblin.benchmarks.models import (BenchmarkCompany, BenchmarkKnows,
+                                      BenchmarkPerson)
+from goblin.benchmarks.runner import benchmark
+
+
+# number of ids looked up per Element.all call
+ALL_IDS = 1000
+
+# out degree of the vertex traversed by the traversal benchmark
+FAN_OUT = 100
+
+
+@gen.coroutine
+def read_stream(future_stream):
+    """ Read every batch of a stream, returning the number of batches """
+    stream = yield future_stream
+    batches = 0
+    while True:
+        batch = yield stream.read()
+        if batch is None:
+            break
+        batches += 1
+    raise gen.Return(batches)
+
+
+@gen.coroutine
+def create_people(count):
+    people = []
+    for i in range(count):
+        person = yield BenchmarkPerson.create(
+            name='person {}'.format(i), age=i % 90,
+            email='person{}@example.com'.format(i))
+        people.append(person)
+    raise gen.Return(people)
+
+
+@benchmark('vertex_save')
+@gen.coroutine
+def vertex_save():
+    counter = itertools.count()
+
+    def op():
+        i = next(counter)
+        return BenchmarkPerson(name='person {}'.format(i), age=i % 90,
+                               email='person{}@example.com'.format(i)).save()
+    raise gen.Return(op)
+
+
+@benchmark('vertex_update')
+@gen.coroutine
+def vertex_update():
+    person = (yield create_people(1))[0]
+    counter = itertools.count()
+
+    def op():
+        person.age = next(counter) % 90
+        return person.save()
+    raise gen.Return(op)
+
+
+@benchmark('edge_save')
+@gen.coroutine
+def edge_save():
+    source, target = yield create_people(2)
+
+    def op():
+        return BenchmarkKnows(source, target, weight=0.5).save()
+    raise gen.Return(op)
+
+
+@benchmark('element_deserialize')
+@gen.coroutine
+def element_deserialize():
+    person = (yield create_people(1))[0]
+    stream = yield BenchmarkPerson.all([person.id], deserialize=False)
+    raw = (yield stream.read())[0]
+
+    def op():
+        # deserialize rewrites the property map of its argument in place
+        data = dict(raw)
+        data['properties'] = dict(raw['properties'])
+        return Element.deserialize(data)
+    raise gen.Return(op)
+
+
+@benchmark('element_all', ops=50)
+@gen.coroutine
+def element_all():
+    people = yield create_people(ALL_IDS)
+    ids = [p.id for p in people]
+
+    def op():
+        return read_stream(BenchmarkPerson.all(ids))
+    raise gen.Return(op)
+
+
+@benchmark('vertex_get')
+@gen.coroutine
+def vertex_get():
+    person = (yield create_people(1))[0]
+
+    def op():
+        return BenchmarkPerson.get(person.id)
+    raise gen.Return(op)
+
+
+@benchmark('traversal_out_step', ops=200)
+@gen.coroutine
+def traversal_out_step():
+    people = yield create_people(FAN_OUT + 1)
+    source = people[0]
+    for target in people[1:]:
+        yield BenchmarkKnows.create(source, target)
+
+    def op():
+        return read_stream(V(source).out_step(BenchmarkKnows).get())
+    raise gen.Return(op)
+
+
+@benchmark('relationship_create')
+@gen.coroutine
+def relationship_create():
+    person = (yield create_people(1))[0]
+
+    def op():
+        return person.works_at.create(
+            vertex_params={'name': 'company'}, vertex_type=BenchmarkCompany)
+    raise gen.Return(op)
+
+
+@benchmark('gremlin_method_call')
+@gen.coroutine
+def gremlin_method_call():
+    person = (yield create_people(1))[0]
+
+    def op():
+        # resolves to a single vertex lookup server side, so the time is
+        # dominated by building the script and bindings and by the futures
+        return read_stream(person._traversal('outV', [], None, None, None))
+    raise gen.Return(op)
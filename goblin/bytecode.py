@@ -0,0 +1,185 @@
+"""
+Gremlin bytecode for the query builder.
+
+With::
+
+    connection.setup(url, bytecode=True)
+
+:py:class:`goblin.models.query.V` queries are sent as Gremlin bytecode to
+the traversal processor of the Gremlin Server instead of as Groovy scripts,
+so the server neither compiles nor caches a script for them. The bytecode
+and the results are GraphSON 3, which is what the Gremlin Server speaks on
+``application/json`` from TinkerPop 3.3.
+
+Deletes through :py:meth:`V.drop<goblin.models.query.V.drop>` and the
+Gremlin methods of the models still send scripts.
+"""
+from __future__ import unicode_literals
+
+from goblin._compat import (array_types, float_types, integer_types,
+                            iteritems)
+
+
+class P(object):
+    """ Gremlin predicate, e.g. ``P('gt', 5)`` or ``P('within', [1, 2])`` """
+
+    def __init__(self, predicate, value):
+        self.predicate = predicate
+        self.value = value
+
+    def __repr__(self):
+        return "P({}, {!r})".format(self.predicate, self.value)
+
+    def __eq__(self, other):
+        return (isinstance(other, P) and other.predicate == self.predicate and
+                other.value == self.value)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class Enum(object):
+    """ Gremlin enum value, e.g. ``Enum('Order', 'decr')`` """
+
+    def __init__(self, type_name, name):
+        self.type_name = type_name
+        self.name = name
+
+    def __repr__(self):
+        return "Enum({}, {})".format(self.type_name, self.name)
+
+    def __eq__(self, other):
+        return (isinstance(other, Enum) and
+                other.type_name == self.type_name and other.name == self.name)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+class Bytecode(object):
+    """ The steps of a traversal, each a list of its name and arguments """
+
+    def __init__(self, steps=None):
+        self.steps = list(steps or [])
+
+    def __repr__(self):
+        return "Bytecode({!r})".format(self.steps)
+
+    def __eq__(self, other):
+        return isinstance(other, Bytecode) and other.steps == self.steps
+
+    def __ne__(self, other):
+        return not self == other
+
+    def add_step(self, name, *args):
+        self.steps.append([name] + list(args))
+        return self
+
+
+def _typed(type_name, value):
+    return {'@type': type_name, '@value': value}
+
+
+def encode(obj):
+    """ The GraphSON 3 form of ``obj`` """
+    if isinstance(obj, Bytecode):
+        return _typed('g:Bytecode', {'step': [
+            [step[0]] + [encode(arg) for arg in step[1:]]
+            for step in obj.steps]})
+    if isinstance(obj, P):
+        return _typed('g:P', {'predicate': obj.predicate,
+                              'value': encode(obj.value)})
+    if isinstance(obj, Enum):
+        return _typed('g:' + obj.type_name, obj.name)
+    if obj is None or isinstance(obj, bool):
+        return obj
+    if isinstance(obj, integer_types):
+        # element ids are longs on most graphs, and predicates compare
+        # numbers across types
+        return _typed('g:Int64', obj)
+    if isinstance(obj, float_types):
+        return _typed('g:Double', obj)
+    if isinstance(obj, dict):
+        items = []
+        for key, value in iteritems(obj):
+            items.extend([encode(key), encode(value)])
+        return _typed('g:Map', items)
+    if isinstance(obj, array_types):
+        return _typed('g:List', [encode(value) for value in obj])
+    return obj
+
+
+def _decode_vertex(value):
+    properties = {}
+    for key, props in iteritems(value.get('properties') or {}):
+        properties[key] = [{'id': decode(prop['@value']['id']),
+                            'value': decode(prop['@value']['value'])}
+                           for prop in props]
+    return {'id': decode(value['id']), 'label': value['label'],
+            'type': 'vertex', 'properties': properties}
+
+
+def _decode_edge(value):
+    return {'id': decode(value['id']), 'label': value['label'],
+            'type': 'edge', 'inVLabel': value.get('inVLabel'),
+            'outVLabel': value.get('outVLabel'),
+            'inV': decode(value['inV']), 'outV': decode(value['outV']),
+            'properties': {key: decode(prop)
+                           for key, prop in iteritems(
+                               value.get('properties') or {})}}
+
+
+def _decode_map(items):
+    result = {}
+    for i in range(0, len(items), 2):
+        result[decode(items[i])] = decode(items[i + 1])
+    return result
+
+
+_DECODERS = {
+    'g:Bytecode': lambda value: Bytecode(
+        [[step[0]] + [decode(arg) for arg in step[1:]]
+         for step in value.get('step', [])]),
+    'g:P': lambda value: P(value['predicate'], decode(value['value'])),
+    'g:List': lambda value: [decode(item) for item in value],
+    'g:Set': lambda value: [decode(item) for item in value],
+    'g:Map': _decode_map,
+    'g:Vertex': _decode_vertex,
+    'g:Edge': _decode_edge,
+    'g:Order': lambda value: Enum('Order', value),
+    'g:Property': lambda value: decode(value['value']),
+    'g:VertexProperty': lambda value: decode(value['value']),
+}
+
+
+def decode(obj):
+    """
+    The plain form of GraphSON 2 or 3 ``obj``. Vertices and edges take the
+    untyped form :py:meth:`goblin.models.Element.deserialize` reads.
+    """
+    if isinstance(obj, dict):
+        if '@type' in obj and '@value' in obj:
+            decoder = _DECODERS.get(obj['@type'])
+            if decoder is not None:
+                return decoder(obj['@value'])
+            return decode(obj['@value'])
+        return {key: decode(value) for key, value in iteritems(obj)}
+    if isinstance(obj, array_types):
+        return [decode(item) for item in obj]
+    return obj
+
+
+def results(data):
+    """ The results in the data of a traversal response message """
+    if data is None:
+        return []
+    if isinstance(data, dict) and data.get('@type') == 'g:List':
+        data = data['@value']
+    results = []
+    for item in data:
+        if isinstance(item, dict) and item.get('@type') == 'g:Traverser':
+            value = decode(item['@value']['value'])
+            results.extend([value] * decode(item['@value']['bulk']))
+        else:
+            results.append(decode(item))
+    return results
@@ -0,0 +1,157 @@
+"""
+Read-through cache of elements by id.
+
+Once passed to :func:`goblin.connection.setup`::
+
+    connection.setup(url, element_cache=ElementCache(
+        maxsize=10000, ttl=60, ttls={'country': 3600, 'user': 0}))
+
+:meth:`get<goblin.models.element.BaseElement.get>`,
+:meth:`all<goblin.models.element.BaseElement.all>` with ids and
+:meth:`V(id).get()<goblin.models.query.V.get>` answer from the cache when
+they can and only query the graph for the elements it misses. Elements that
+don't exist are cached as well, so repeated lookups of missing ids don't
+reach the graph either.
+
+Saves and deletes made with goblin invalidate the entries of the elements
+they touch. Queries sent with :func:`goblin.connection.execute_query`
+bypass the cache; call :meth:`ElementCache.clear` after modifying cached
+elements with them.
+"""
+from __future__ import unicode_literals
+import time
+from collections import OrderedDict
+
+try:
+    _timer = time.monotonic
+except AttributeError:  # pragma: no cover
+    _timer = time.time
+
+
+class Missing(object):
+    """ Cached result of looking up an element that does not exist """
+
+    def __repr__(self):
+        return 'MISSING'
+
+
+MISSING = Missing()
+
+
+class ElementCache(object):
+    """
+    Bounded LRU cache of the raw GraphSON of vertices and edges, keyed by
+    ``(source, id)`` where source is ``V`` or ``E``.
+
+    :param int maxsize: maximum number of cached entries
+    :param float ttl: seconds an entry stays valid. ``None`` for no limit
+    :param dict ttls: ttl by element label, overriding ``ttl``. A ttl of
+        ``0`` disables caching for the label
+    :param float negative_ttl: seconds a missing element stays cached.
+        Defaults to the ttl of the label
+    :param timer: clock used for expiration (optional)
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, ttls=None, negative_ttl=None,
+                 timer=_timer):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.negative_ttl = negative_ttl
+        self._timer = timer
+        # (source, id) -> (raw element or MISSING, label, expiration)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """ The hit, miss, eviction and expiration counters """
+        return {'size': len(self._entries), 'maxsize': self.maxsize,
+                'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations}
+
+    def get(self, source, id, label=None):
+        """
+        Look up an element.
+
+        :param str label: Only match an element with this label (optional)
+        :returns: the raw element, :data:`MISSING` if it is known not to
+            exist, or ``None`` if it is not cached
+        """
+        key = (source, id)
+        try:
+            entry = self._entries.pop(key)
+        except (KeyError, TypeError):
+            self.misses += 1
+            return None
+        result, entry_label, expiration = entry
+        if expiration is not None and expiration <= self._timer():
+            self.expirations += 1
+            self.misses += 1
+            return None
+        # most recently used last
+        self._entries[key] = entry
+        if result is MISSING:
+            if entry_label is not None and entry_label != label:
+                # only known to be missing with another label
+                self.misses += 1
+                return None
+        elif label is not None and result.get('label') != label:
+            result = MISSING
+        self.hits += 1
+        return result
+
+    def put(self, source, result):
+        """ Cache a raw element loaded from the graph """
+        label = result.get('label')
+        self._store((source, result.get('id')), result, label,
+                    self._ttl(label))
+
+    def put_missing(self, source, id, label=None):
+        """
+        Cache that no element with ``id`` (and ``label``, if given) exists
+        """
+        ttl = self.negative_ttl
+        if ttl is None:
+            ttl = self._ttl(label)
+        self._store((source, id), MISSING, label, ttl)
+
+    def invalidate(self, source, id):
+        """ Drop the entry of an element """
+        try:
+            self._entries.pop((source, id), None)
+        except TypeError:
+            pass
+
+    def invalidate_source(self, source):
+        """ Drop the entries of every vertex (``V``) or edge (``E``) """
+        for key in [k for k in self._entries if k[0] == source]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+    def _ttl(self, label):
+        return self.ttls.get(label, self.ttl)
+
+    def _store(self, key, result, label, ttl):
+        if ttl == 0:
+            return
+        try:
+            self._entries.pop(key, None)
+        except TypeError:
+            # unhashable id
+            return
+        expiration = None if ttl is None else self._timer() + ttl
+        self._entries[key] = (result, label, expiration)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
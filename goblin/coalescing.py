@@ -0,0 +1,197 @@
+"""
+Coalescing of identical concurrent read requests.
+
+Once enabled with :func:`goblin.connection.setup`::
+
+    connection.setup(url, coalesce=True)
+
+a read request sent while an identical one (same script, bindings, pool,
+graph name and traversal source) is still being answered does not go to the
+server again: it shares the response of the request in flight. Every caller
+still gets its own stream, with its own handlers.
+
+Requests that modify the graph must not be shared. The writes goblin sends
+itself are marked as such. Mark your own writes when you send them::
+
+    connection.execute_query('g.V(vid).drop()', {'vid': vid}, write=True)
+
+Gremlin methods are treated as writes unless they are declared with
+``write=False``.
+"""
+from __future__ import unicode_literals
+import copy
+import json
+import logging
+
+from gremlinclient.connection import Message
+
+from goblin.constants import RESULT_ITERATION_BATCH_SIZE
+from goblin.coroutines import Return, run
+
+
+logger = logging.getLogger(__name__)
+
+
+class SharedResponse(object):
+    """
+    The response to a request shared by identical concurrent requests. It is
+    read eagerly and kept until every message was received.
+
+    :param class future_class: type of Future
+    """
+
+    def __init__(self, future_class):
+        self.future_class = future_class
+        self.messages = []
+        self.error = None
+        self.done = False
+        self._waiters = []
+
+    @classmethod
+    def replay(cls, results, future_class,
+               batch_size=RESULT_ITERATION_BATCH_SIZE):
+        """
+        A complete response holding ``results``, split in batches like the
+        server does
+        """
+        response = cls(future_class)
+        for i in range(0, max(len(results), 1), batch_size):
+            batch = results[i:i + batch_size]
+            status = 206 if i + batch_size < len(results) else 200
+            response.messages.append(Message(status, batch, '', {}))
+        response.done = True
+        return response
+
+    def stream(self, handler=None):
+        """ A new :class:`CoalescedStream` reading the response """
+        return CoalescedStream(self, handler)
+
+    def fetch(self, pool, query, **kwargs):
+        """
+        Operation sending the request and reading the whole response. Never
+        fails, errors are passed on to the streams instead.
+        """
+        try:
+            conn = yield pool.acquire()
+            stream = conn.send(query, **kwargs)
+            while True:
+                message = yield stream.read()
+                if message is None:
+                    break
+                self.messages.append(message)
+                self._wake()
+        except Exception as e:
+            self.error = e
+        self.done = True
+        self._wake()
+        raise Return(None)
+
+    def wait(self, callback):
+        """ Call ``callback`` once more of the response arrived """
+        self._waiters.append(callback)
+
+    def _wake(self):
+        waiters, self._waiters = self._waiters, []
+        for callback in waiters:
+            callback()
+
+
+class CoalescedStream(object):
+    """
+    Stand-in for a :py:class:`gremlinclient.connection.Stream` reading a
+    :class:`SharedResponse`.
+    """
+
+    def __init__(self, response, handler=None):
+        self._response = response
+        self._position = 0
+        self._closed = False
+        self._handlers = []
+        if handler is not None:
+            self._handlers.append(handler)
+
+    def add_handler(self, handler):
+        self._handlers.append(handler)
+
+    def read(self):
+        """
+        Read a message from the response.
+
+        :returns: Future
+        """
+        future = self._response.future_class()
+        self._read(future)
+        return future
+
+    def _read(self, future):
+        response = self._response
+        if self._closed:
+            future.set_result(None)
+        elif self._position < len(response.messages):
+            message = response.messages[self._position]
+            self._position += 1
+            if self._position == len(response.messages) and response.done:
+                self._closed = response.error is None
+            try:
+                future.set_result(self._process(message))
+            except Exception as e:
+                self._closed = True
+                future.set_exception(e)
+        elif response.done:
+            self._closed = True
+            if response.error is not None:
+                future.set_exception(response.error)
+            else:
+                future.set_result(None)
+        else:
+            response.wait(lambda: self._read(future))
+
+    def _process(self, message):
+        if self._handlers:
+            # handlers, like deserialization, may modify the data shared
+            # with the other streams
+            message = copy.deepcopy(message.data)
+            for handler in self._handlers:
+                message = handler(message)
+        return message
+
+
+class Coalescer(object):
+    """ The requests currently in flight, by request key """
+
+    def __init__(self):
+        self._in_flight = {}
+
+    @staticmethod
+    def key(query, bindings, pool, aliases):
+        """ The key of a request, ``None`` if it can't be coalesced """
+        try:
+            bindings = json.dumps(bindings, sort_keys=True)
+        except (TypeError, ValueError):
+            return None
+        return (query, bindings, pool, aliases.get('graph'),
+                aliases.get('g'))
+
+    def stream(self, key, pool, query, handler=None, **kwargs):
+        """
+        A stream reading the response to the request in flight for
+        ``key``, sending the request if there is none.
+        """
+        response = self._in_flight.get(key)
+        if response is None:
+            response = SharedResponse(pool.future_class)
+            self._in_flight[key] = response
+
+            def on_done(f):
+                if self._in_flight.get(key) is response:
+                    del self._in_flight[key]
+
+            future = run(response.fetch(pool, query, **kwargs),
+                         pool.future_class())
+            if future.done():
+                on_done(future)
+            else:
+                future.add_done_callback(on_done)
+        else:
+            logger.debug("Coalescing request %s", query)
+        return response.stream(handler)
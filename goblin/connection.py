@@ -1,4 +1,5 @@
 from __future__ import unicode_literals
+import json
 import logging
 try:
     from urllib.parse import urlparse
@@ -6,8 +7,9 @@ except ImportError:
     from urlparse import urlparse
 
 from goblin.constants import (TORNADO_CLIENT_MODULE, AIOHTTP_CLIENT_MODULE,
-                              SECURE_SCHEMES, INSECURE_SCHEMES)
-from goblin.exceptions import GoblinConnectionError
+                              SECURE_SCHEMES, INSECURE_SCHEMES, GET_BATCH_SIZE)
+from goblin.coroutines import Return, run
+from goblin.exceptions import GoblinConnectionError, GoblinQueryError
 
 
 logger = logging.getLogger(__name__)
@@ -22,11 +24,18 @@ _loaded_models = []
 _scheme = None
 _netloc = None
 _client_module = None
+_get_loader = None
+_coalescer = None
+_element_cache = None
+_partial_saves = False
+_stored_methods = False
+_bytecode = False
 
 
 def execute_query(query, bindings=None, pool=None, future_class=None,
                   graph_name=None, traversal_source=None, username="",
-                  password="", handler=None, request_id=None, *args, **kwargs):
+                  password="", handler=None, request_id=None, write=False,
+                  *args, **kwargs):
     """
     Execute a raw Gremlin query with the given parameters passed in.
 
@@ -43,10 +52,12 @@ def execute_query(query, bindings=None, pool=None, future_class=None,
     :param str password: password for username as definined in the Tinkerpop
         credentials graph
     :param func handler: Handles preprocessing of query results
+    :param bool write: The query modifies the graph, so it is never
+        coalesced with identical concurrent queries. See
+        :py:mod:`goblin.coalescing`
 
     :returns: Future
     """
-
     if pool is None:
         pool = _connection_pool
 
@@ -57,6 +68,28 @@ def execute_query(query, bindings=None, pool=None, future_class=None,
         raise GoblinConnectionError(("Please call connection.setup or pass "
                                      "pool and future_class explicitly"))
 
+    return run(submit(query, bindings=bindings, pool=pool,
+                      graph_name=graph_name,
+                      traversal_source=traversal_source, handler=handler,
+                      request_id=request_id, write=write),
+               future_class())
+
+
+def submit(query, bindings=None, pool=None, graph_name=None,
+           traversal_source=None, handler=None, request_id=None, write=False,
+           **kwargs):
+    """
+    Operation sending a raw Gremlin query. Returns the response stream. See
+    :py:mod:`goblin.coroutines` for how operations are run, and
+    :func:`execute_query` for the parameters.
+    """
+    if pool is None:
+        pool = _connection_pool
+
+    if not pool:
+        raise GoblinConnectionError(("Please call connection.setup or pass "
+                                     "pool explicitly"))
+
     if graph_name is None:
         graph_name = _graph_name or "graph"
 
@@ -65,24 +98,117 @@ def execute_query(query, bindings=None, pool=None, future_class=None,
 
     aliases = {"graph": graph_name, "g": traversal_source}
 
-    future = future_class()
-    future_conn = pool.acquire()
+    if _coalescer is not None and not write and request_id is None:
+        key = _coalescer.key(query, bindings, pool, aliases)
+        if key is not None:
+            raise Return(_coalescer.stream(key, pool, query, handler=handler,
+                                           bindings=bindings,
+                                           aliases=aliases))
 
-    def on_connect(f):
-        try:
-            conn = f.result()
+    conn = yield pool.acquire()
+    raise Return(conn.send(query, bindings=bindings, aliases=aliases,
+                           handler=handler, request_id=request_id))
 
-        except Exception as e:
-            future.set_exception(e)
-        else:
-            stream = conn.send(
-                query, bindings=bindings, aliases=aliases, handler=handler,
-                request_id=request_id)
-            future.set_result(stream)
 
-    future_conn.add_done_callback(on_connect)
+def submit_bytecode(bytecode, pool=None, traversal_source=None,
+                    handler=None, request_id=None, **kwargs):
+    """
+    Operation sending a traversal as Gremlin bytecode to the traversal
+    processor. Returns the response stream, whose messages hold GraphSON
+    traversers, see :func:`goblin.bytecode.results`. Traversals are reads
+    for :py:mod:`goblin.coalescing`.
 
-    return future
+    :param goblin.bytecode.Bytecode bytecode: The traversal
+
+    See :func:`execute_query` for the other parameters.
+    """
+    from goblin.bytecode import encode
+    if pool is None:
+        pool = _connection_pool
+
+    if not pool:
+        raise GoblinConnectionError(("Please call connection.setup or pass "
+                                     "pool explicitly"))
+
+    if traversal_source is None:
+        traversal_source = _traversal_source or "g"
+
+    query = encode(bytecode)
+    aliases = {"g": traversal_source}
+
+    if _coalescer is not None and request_id is None:
+        key = _coalescer.key(json.dumps(query, sort_keys=True), None, pool,
+                             aliases)
+        raise Return(_coalescer.stream(key, pool, query, handler=handler,
+                                       aliases=aliases, op="bytecode",
+                                       processor="traversal"))
+
+    conn = yield pool.acquire()
+    raise Return(conn.send(query, aliases=aliases, op="bytecode",
+                           processor="traversal", handler=handler,
+                           request_id=request_id))
+
+
+def execute_many(queries, pool=None, future_class=None, graph_name=None,
+                 traversal_source=None, write=False):
+    """
+    Execute several raw Gremlin queries in one request. See
+    :py:mod:`goblin.pipelining`.
+
+    :param list queries: ``(query, bindings)`` pairs
+    :param bool write: Some of the queries modify the graph
+
+    See :func:`execute_query` for the other parameters.
+
+    :returns: list of Futures, one per query, each resolving to the list of
+        results of its query. A future fails with
+        :py:class:`goblin.exceptions.GoblinQueryError` if its query fails,
+        without affecting the others
+    """
+    if pool is None:
+        pool = _connection_pool
+
+    if future_class is None:
+        future_class = _future
+
+    if not pool and not future_class:
+        raise GoblinConnectionError(("Please call connection.setup or pass "
+                                     "pool and future_class explicitly"))
+
+    futures = [future_class() for _ in queries]
+    if futures:
+        run(submit_many(queries, futures, pool=pool, graph_name=graph_name,
+                        traversal_source=traversal_source, write=write),
+            future_class())
+    return futures
+
+
+def submit_many(queries, futures, **kwargs):
+    """
+    Operation sending several raw Gremlin queries as one composite script
+    and resolving ``futures`` with their results. See
+    :func:`execute_many`.
+    """
+    from goblin.pipelining import compose
+    script, bindings = compose(queries)
+    logger.debug("Sending %d queries in one request", len(queries))
+    try:
+        stream = yield submit(script, bindings=bindings, **kwargs)
+        results = []
+        while True:
+            message = yield stream.read()
+            if message is None:
+                break
+            results.extend(message.data or [])
+    except Exception as e:
+        for future in futures:
+            future.set_exception(e)
+        raise Return(None)
+    for future, (succeeded, result) in zip(futures, results):
+        if succeeded:
+            future.set_result(result)
+        else:
+            future.set_exception(GoblinQueryError(result))
 
 
 def tear_down():
@@ -94,7 +220,10 @@ def tear_down():
 
 def setup(url, pool_class=None, graph_name='graph', traversal_source='g',
           username='', password='', pool_size=256, future_class=None,
-          ssl_context=None, connector=None, loop=None):
+          ssl_context=None, connector=None, loop=None, batch_gets=False,
+          max_get_batch_size=GET_BATCH_SIZE, coalesce=False,
+          element_cache=None, partial_saves=False, stored_methods=False,
+          bytecode=False):
     """
     This function is responsible for instantiating the global variables that
     provide :py:mod:`goblin` connection configuration params.
@@ -124,6 +253,23 @@ def setup(url, pool_class=None, graph_name='graph', traversal_source='g',
     :param connector: connector used to establish :py:mod:`gremlinclient`
         connection. Overides ssl_context param.
     :param loop: io loop.
+    :param bool batch_gets: Load the elements looked up by ``get`` calls
+        made in the same event loop iteration with a single query. See
+        :py:mod:`goblin.batching`
+    :param int max_get_batch_size: maximum number of ids per batched query
+    :param bool coalesce: Share the response of a read query with identical
+        queries sent while it is in flight. See :py:mod:`goblin.coalescing`
+    :param goblin.cache.ElementCache element_cache: Cache of the elements
+        looked up by id. See :py:mod:`goblin.cache`
+    :param bool partial_saves: Only send the modified properties when
+        saving elements that were already saved, and skip saving them when
+        nothing was modified. Models may override it with
+        ``__partial_saves__``
+    :param bool stored_methods: Define the functions of the Gremlin methods
+        on the server once and call them by name. See
+        :py:mod:`goblin.gremlin.stored`
+    :param bool bytecode: Send the queries of the query builder as Gremlin
+        bytecode instead of scripts. See :py:mod:`goblin.bytecode`
     """
     global _future
     global _connection_pool
@@ -132,6 +278,12 @@ def setup(url, pool_class=None, graph_name='graph', traversal_source='g',
     global _scheme
     global _netloc
     global _client_module
+    global _get_loader
+    global _coalescer
+    global _element_cache
+    global _partial_saves
+    global _stored_methods
+    global _bytecode
 
     _graph_name = graph_name
     _traversal_source = traversal_source
@@ -162,6 +314,23 @@ def setup(url, pool_class=None, graph_name='graph', traversal_source='g',
     future_class = _connection_pool.graph.future_class
     _future = future_class
 
+    if batch_gets:
+        from goblin.batching import GetLoader
+        _get_loader = GetLoader(max_batch_size=max_get_batch_size, loop=loop)
+    else:
+        _get_loader = None
+
+    if coalesce:
+        from goblin.coalescing import Coalescer
+        _coalescer = Coalescer()
+    else:
+        _coalescer = None
+
+    _element_cache = element_cache
+    _partial_saves = partial_saves
+    _stored_methods = stored_methods
+    _bytecode = bytecode
+
     # Model/schema sync will run here as well as indexing
 
 
@@ -206,12 +375,22 @@ def _add_model_to_space(model):
     _loaded_models.append(model)
 
 
-def generate_spec():  # pragma: no cover
-    pass
+def generate_spec(models=None):
+    """
+    The schema needed by the loaded models, see
+    :func:`goblin.spec.generate_spec`.
+    """
+    from goblin.spec import generate_spec
+    return generate_spec(models)
 
 
-def sync_spec():  # pragma: no cover
-    pass
+def sync_spec(spec=None, dry_run=False, **kwargs):
+    """
+    Create the schema needed by the loaded models, see
+    :func:`goblin.spec.sync_spec`.
+    """
+    from goblin.spec import sync_spec
+    return sync_spec(spec, dry_run=dry_run, **kwargs)
 
 
 def get_future(kwargs):
@@ -224,6 +403,46 @@ def get_future(kwargs):
     return future_class()
 
 
+def get_loader(kwargs):
+    """
+    The :class:`goblin.batching.GetLoader` for a lookup with the given
+    keyword arguments, ``None`` if it should not be batched
+    """
+    if _get_loader is None or any(
+            val is not None for key, val in kwargs.items()
+            if key != 'future_class'):
+        return None
+    return _get_loader
+
+
+def get_cache(kwargs=None):
+    """
+    The :class:`goblin.cache.ElementCache` for a lookup with the given
+    keyword arguments, ``None`` if it should not be cached. Without
+    arguments, the cache to invalidate after a write.
+    """
+    if kwargs is not None and any(
+            val is not None for key, val in kwargs.items()
+            if key != 'future_class'):
+        return None
+    return _element_cache
+
+
+def get_partial_saves():
+    """ Whether elements are saved partially by default """
+    return _partial_saves
+
+
+def get_stored_methods():
+    """ Whether Gremlin methods are called as server-side functions """
+    return _stored_methods
+
+
+def get_bytecode():
+    """ Whether the query builder sends Gremlin bytecode """
+    return _bytecode
+
+
 def pop_execute_query_kwargs(keyword_arguments):
     """ pop the optional execute query arguments from arbitrary kwargs;
         return non-None query kwargs in a dict
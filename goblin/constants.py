@@ -18,9 +18,23 @@ INSIDE = "inside"
 OUTSIDE = "outside"
 BETWEEN = "between"
 
+# Gremlin Server's default resultIterationBatchSize
+RESULT_ITERATION_BATCH_SIZE = 64
+
+# Maximum number of ids loaded by one batched get query
+GET_BATCH_SIZE = 500
+
+# Elements created per query, and queries in flight, by bulk creation
+BULK_CREATE_BATCH_SIZE = 1000
+BULK_CREATE_CONCURRENCY = 4
+
+# Elements removed per transaction by bulk deletes
+DELETE_CHUNK_SIZE = 1000
+
 # Clients
 TORNADO_CLIENT_MODULE = "tornado_client"
 AIOHTTP_CLIENT_MODULE = "aiohttp_client"
+MEMORY_CLIENT_MODULE = "memory"
 
 # Schemes
 SECURE_SCHEMES = ["https", "wss"]
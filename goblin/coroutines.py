@@ -0,0 +1,103 @@
+"""
+Operations in :py:mod:`goblin` are written once, as generators that yield
+the futures they wait on, and run in two ways: :func:`run` steps them from
+future callbacks, producing the futures returned by the classic API, while
+the ``async def`` methods in :py:mod:`goblin.aio` (Python 3.5+) step them
+directly inside the awaiting coroutine::
+
+    def _get(cls, id):
+        stream = yield connection.submit('g.V(vid)', {'vid': id})
+        result = yield stream.read()
+        raise Return(result)
+
+Operations may also yield other operations, which run to completion first.
+"""
+from __future__ import unicode_literals
+import collections
+import inspect
+import sys
+
+
+class Return(Exception):
+    """
+    Raised by an operation generator to return a value, the way
+    ``return value`` does in a Python 3 generator.
+    """
+
+    def __init__(self, value=None):
+        super(Return, self).__init__()
+        self.value = value
+
+
+def _outcome(future):
+    try:
+        return future.result(), None
+    except Exception:
+        return None, sys.exc_info()
+
+
+def run(generator, future):
+    """
+    Run an operation generator, resolving ``future`` with its return value
+    or exception. Futures that are already done are consumed without
+    registering a callback, so an operation only waits on the event loop
+    when it actually has to wait for the server.
+
+    :param generator: The operation to run
+    :param future: The future to resolve
+    :returns: ``future``
+    """
+    def step(value=None, exc_info=None):
+        while True:
+            try:
+                if exc_info is not None:
+                    yielded = generator.throw(*exc_info)
+                else:
+                    yielded = generator.send(value)
+            except (Return, StopIteration) as e:
+                future.set_result(getattr(e, 'value', None))
+                return
+            except Exception as e:
+                future.set_exception(e)
+                return
+            if inspect.isgenerator(yielded):
+                yielded = run(yielded, type(future)())
+            if not yielded.done():
+                yielded.add_done_callback(resume)
+                return
+            value, exc_info = _outcome(yielded)
+
+    def resume(f):
+        step(*_outcome(f))
+
+    step()
+    return future
+
+
+def gather(operations, new_future, limit=None):
+    """
+    Operation running ``operations`` concurrently, at most ``limit`` at a
+    time, and returning the list of their values in order. Fails with the
+    first error, in order.
+
+    :param operations: iterable of operations, consumed as they start
+    :param new_future: callable returning a new future for each operation
+    :param int limit: maximum number of operations running at once
+    """
+    results = []
+    pending = collections.deque()
+    try:
+        for operation in operations:
+            if limit is not None and len(pending) >= limit:
+                result = yield pending.popleft()
+                results.append(result)
+            pending.append(run(operation, new_future()))
+        while pending:
+            result = yield pending.popleft()
+            results.append(result)
+    except Exception:
+        # the errors of the operations left are not raised
+        for future in pending:
+            future.add_done_callback(lambda f: f.exception())
+        raise
+    raise Return(results)
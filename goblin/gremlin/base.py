@@ -8,6 +8,7 @@ import logging
 from goblin._compat import (
     array_types, string_types, integer_types, float_types, iteritems)
 from goblin import connection
+from goblin.coroutines import Return, run
 from goblin.exceptions import GoblinQueryError, GoblinGremlinException
 from goblin.gremlin.groovy import parse, GroovyImport
 from goblin.gremlin.table import Table, Row
@@ -21,6 +22,28 @@ def groovy_import(extra_import):
                         ['import {};'.format(extra_import)])
 
 
+def setup_methods(models=None):
+    """
+    Parse the groovy files of the gremlin methods of ``models``, every
+    model defined so far by default, ahead of their first call.
+
+    :param models: The model classes
+    :type models: list
+    :returns: The number of gremlin methods set up
+    :rtype: int
+    """
+    if models is None:
+        models = connection._loaded_models
+    methods = []
+    for model in models:
+        for method in model._gremlin_methods.values():
+            if method not in methods:
+                methods.append(method)
+    for method in methods:
+        method._setup()
+    return len(methods)
+
+
 class BaseGremlinMethod(object):
     """ Maps a function in a groovy file to a method on a python class """
 
@@ -31,7 +54,8 @@ class BaseGremlinMethod(object):
                  property=False,
                  defaults=None,
                  transaction=True,
-                 imports=None):
+                 imports=None,
+                 write=True):
         """
         Initialize the gremlin method and define how it is attached to class.
 
@@ -54,6 +78,9 @@ class BaseGremlinMethod(object):
         :param imports: Additional imports to include when calling the
             GremlinMethod
         :type imports: list | tuple | str
+        :param write: The method modifies the graph, so its calls are never
+            coalesced (True by default). See :py:mod:`goblin.coalescing`
+        :type write: bool
 
         """
         self.is_configured = False
@@ -64,6 +91,7 @@ class BaseGremlinMethod(object):
         self.property = property
         self.defaults = defaults or {}
         self.transaction = transaction
+        self.write = write
 
         # function
         self.attr_name = None
@@ -160,13 +188,39 @@ class BaseGremlinMethod(object):
             (optional)
         :type instance: object
 
+        """
+        future = connection.get_future(kwargs)
+        return run(self.submit(instance, *args, **kwargs), future)
+
+    def submit(self, instance, *args, **kwargs):
+        """
+        Operation sending the gremlin query, returning the response stream.
+        See :py:mod:`goblin.coroutines`.
+        """
+        script, params, query_kwargs = self.prepare(instance, *args, **kwargs)
+        if connection.get_stored_methods():
+            from goblin.gremlin import stored
+            stream = yield stored.submit(self, params, **query_kwargs)
+        else:
+            stream = yield connection.submit(script, bindings=params,
+                                             **query_kwargs)
+        raise Return(stream)
+
+    def prepare(self, instance, *args, **kwargs):
+        """
+        Build the script and bindings for a call.
+
+        :returns: tuple of the script, its bindings and the execute query
+            keyword arguments
         """
         self._setup()
 
         # pop the optional execute query arguments from kwargs
         query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+        query_kwargs.pop('future_class', None)
         query_kwargs['transaction'] = (query_kwargs.get('transaction') or
                                        self.transaction)
+        query_kwargs['write'] = self.write
 
         args = list(args)
         if not self.classmethod:
@@ -209,20 +263,7 @@ class BaseGremlinMethod(object):
         import_string = '\n'.join(import_list)
 
         script = '\n'.join([import_string, self.function_body])
-
-        # Figure out new method to set context for logging...
-        # try:
-        # if hasattr(instance, 'get_element_type'):
-        #     context = "vertices.{}".format(instance.get_element_type())
-        # elif hasattr(instance, 'get_label'):
-        #     context = "edges.{}".format(instance.get_label())
-        # else:
-        #     context = "other"
-        context = "TODO"
-        context = "{}.{}".format(context, self.method_name)
-        return connection.execute_query(script, bindings=params,
-                                        context=context, **query_kwargs)
-
+        return script, params, query_kwargs
 
     def transform_params_to_database(self, params):
         """
@@ -280,72 +321,41 @@ class GremlinMethod(BaseGremlinMethod):
         else:
             return obj
 
-    def __call__(self, instance, *args, **kwargs):
-        future_results = super(GremlinMethod, self).__call__(
+    def submit(self, instance, *args, **kwargs):
+        deserialize = kwargs.pop('deserialize', True)
+        stream = yield super(GremlinMethod, self).submit(
             instance, *args, **kwargs)
-        deserialize = kwargs.get('deserialize', True)
         if deserialize:
-            future = connection.get_future(kwargs)
-            def on_call(f):
-                try:
-                    stream = f.result()
-                except Exception as e:
-                    future.set_exception(e)
-                else:
-                    stream.add_handler(GremlinMethod._deserialize)
-                    future.set_result(stream)
-            future_results.add_done_callback(on_call)
-            return future
-        return future_results
+            stream.add_handler(GremlinMethod._deserialize)
+        raise Return(stream)
 
 
 class GremlinValue(GremlinMethod):
     """Gremlin Method that returns one value"""
 
-    def __call__(self, instance, *args, **kwargs):
-        future = connection.get_future(kwargs)
-        future_result = super(GremlinValue, self).__call__(instance, *args,
-                                                           **kwargs)
-
-        def on_read(f2):
-            try:
-                result = f2.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                from goblin.models.element import Element
-                if result is None:  # pragma: no cover
-                    future.set_result(None)
-                # we have to make a special case for dictionaries, python
-                # len returns number of keys, even though it is one
-                # object. Don't do the same for lists or tuples, since
-                # they arevGremlin Methods not GremlinValues.
-                elif isinstance(result, dict):
-                    future.set_result(result)
-                elif isinstance(result,
-                                integer_types + float_types + string_types):
-                    future.set_result(result)
-                elif isinstance(result, Element):
-                    future.set_result(result)
-                elif len(result) != 1:
-                    e = GoblinGremlinException(
-                        '''GremlinValue requires a single value is
-                           returned (%s returned)''' % len(result))
-                    future.set_exception(e)
-                else:
-                    future.set_result(result[0])
-
-        def on_call(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future_read = stream.read()
-                future_read.add_done_callback(on_read)
+    def submit(self, instance, *args, **kwargs):
+        stream = yield super(GremlinValue, self).submit(instance, *args,
+                                                        **kwargs)
+        result = yield stream.read()
 
-        future_result.add_done_callback(on_call)
-        return future
+        from goblin.models.element import Element
+        if result is None:  # pragma: no cover
+            raise Return(None)
+        # we have to make a special case for dictionaries, python
+        # len returns number of keys, even though it is one
+        # object. Don't do the same for lists or tuples, since
+        # they arevGremlin Methods not GremlinValues.
+        elif isinstance(result, dict):
+            raise Return(result)
+        elif isinstance(result, integer_types + float_types + string_types):
+            raise Return(result)
+        elif isinstance(result, Element):
+            raise Return(result)
+        elif len(result) != 1:
+            raise GoblinGremlinException(
+                '''GremlinValue requires a single value is
+                   returned (%s returned)''' % len(result))
+        raise Return(result[0])
 
 
 class GremlinTable(GremlinMethod):  # pragma: no cover
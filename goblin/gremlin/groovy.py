@@ -1,10 +1,19 @@
 import collections
-import pyparsing
+import hashlib
+import json
+import logging
+import os
 import re
 
 
-# Cache of parsed files
+logger = logging.getLogger(__name__)
+
+# Cache of parsed files: filename -> (mtime, GroovyFileDef)
 _parsed_file_cache = {}
+# Directory of the on-disk cache of parsed files, see set_cache_dir
+_cache_dir = os.environ.get('GOBLIN_PARSE_CACHE_DIR') or None
+# Bumped whenever the parser output changes, invalidating on-disk entries
+_CACHE_VERSION = 1
 GroovyImport = collections.namedtuple('GroovyImport', ['comment_list', 'import_strings', 'import_list'])
 GroovyFunction = collections.namedtuple('GroovyFunction', ['name', 'args', 'body', 'defn'])
 GroovyFileDef = collections.namedtuple('GroovyFileDefinition', ['functions', 'imports', 'filename'])
@@ -17,11 +26,8 @@ class GroovyFunctionParser(object):
     """
 
     # Simple Groovy sub-grammar definitions
-    KeywordDef = pyparsing.Keyword('def')
-    VarName = pyparsing.Regex(r'[A-Za-z_]\w*')
-    FuncName = VarName
-    FuncDefn = KeywordDef + FuncName + "(" + pyparsing.Optional(pyparsing.delimitedList(VarName)) + ")" + "{"
-    FuncDefnNoArgs = KeywordDef + FuncName + "(" + ")" + "{"
+    FuncDefn = re.compile(r'\s*def\s+([A-Za-z_]\w*)\s*\(\s*'
+                          r'((?:[A-Za-z_]\w*\s*(?:,\s*[A-Za-z_]\w*\s*)*)?)\)\s*\{')
 
     @classmethod
     def parse(cls, data):
@@ -35,14 +41,15 @@ class GroovyFunctionParser(object):
         """
         try:
             # Parse the function here
-            result = cls.FuncDefn.parseString(data)
-            result_list = result.asList()
-            args = result_list[3:result_list.index(')')]
+            result = cls.FuncDefn.match(data)
+            if result is None:
+                return None
+            args = [arg.strip() for arg in result.group(2).split(',') if arg.strip()]
             # Return single line or multi-line function body
             fn_body = re.sub(r'[^\{]+\{', '', data, count=1)
             parts = fn_body.strip().split('\n')
             fn_body = '\n'.join(parts[0:-1])
-            return GroovyFunction(result[1], args, fn_body, data)
+            return GroovyFunction(result.group(1), args, fn_body, data)
         except Exception as ex:
             return None
 
@@ -54,17 +61,8 @@ class GroovyImportParser(object):
     """
 
     # Simple Groovy sub-grammar definitions
-    ImportDef = pyparsing.Suppress(pyparsing.Keyword('import'))
-    ImportVarName = pyparsing.Regex(r'[A-Za-z_.\*]*')
-    CommentVar = pyparsing.Word(pyparsing.alphas, pyparsing.alphanums).setName('comment')
-    OptionalSpace = pyparsing.Optional(' ')
-    ImportDefn = ImportDef + \
-                 pyparsing.delimitedList(ImportVarName, delim='.').setResultsName('imports') + \
-                 pyparsing.Suppress(";") + \
-                 pyparsing.Optional(
-                     pyparsing.Suppress('//') +
-                     pyparsing.delimitedList(CommentVar, delim=pyparsing.Empty()).setResultsName('comment')
-                 )
+    ImportDefn = re.compile(r'\s*import\s+([A-Za-z_.\*]*)\s*;(?:\s*//(.*))?')
+    CommentVars = re.compile(r'\s*((?:[A-Za-z][A-Za-z0-9]*\s*)*)')
 
     @classmethod
     def parse(cls, data):
@@ -78,14 +76,14 @@ class GroovyImportParser(object):
         """
         try:
             # Parse the function here
-            result = cls.ImportDefn.parseString(data)
-            package_list = []
-            if 'imports' in result:
-                package_list = result['imports'].asList()
+            result = cls.ImportDefn.match(data)
+            if result is None:
+                return None
+            package_list = [result.group(1)]
 
             comment_list = []
-            if 'comment' in result:
-                comment_list = result['comment'].asList()
+            if result.group(2) is not None:
+                comment_list = cls.CommentVars.match(result.group(2)).group(1).split()
 
             return GroovyImport(comment_list,
                                 package_list,
@@ -94,47 +92,110 @@ class GroovyImportParser(object):
             return None
 
 
-def parse(filename):
+def set_cache_dir(path):
     """
-    Parse Groovy code in the given file and return a list of information about each function necessary for usage in
-    queries to database.
-
-    :param filename: The file containing groovy code.
-    :type filename: str
-    :rtype: list
+    Keep the parsed files in ``path`` as well, so other processes parsing
+    the same unchanged files load them from there. ``None`` disables the
+    on-disk cache. Defaults to the ``GOBLIN_PARSE_CACHE_DIR`` environment
+    variable.
 
+    :param path: The cache directory, created if needed
+    :type path: str
     """
-    # Check cache before parsing file
-    global _parsed_file_cache
-    if filename in _parsed_file_cache:
-        return _parsed_file_cache[filename]
-
-    ImportDefnRegexp = r'^import.*'
-    FuncDefnRegexp = r'^def.*\{'
-    FuncEndRegexp = r'^\}.*$'
+    global _cache_dir
+    _cache_dir = path
+
+
+def _cache_path(filename):
+    digest = hashlib.sha1(os.path.abspath(filename).encode('utf-8'))
+    return os.path.join(_cache_dir, digest.hexdigest() + '.json')
+
+
+def _load_cached(filename, mtime):
+    """ The parsed file from the on-disk cache, ``None`` if missing or stale """
+    try:
+        with open(_cache_path(filename), 'r') as f:
+            cached = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if (cached.get('version') != _CACHE_VERSION or
+            cached.get('path') != os.path.abspath(filename) or
+            cached.get('mtime') != mtime):
+        return None
+    return GroovyFileDef(
+        [fn if fn is None else GroovyFunction(*fn) for fn in cached['functions']],
+        [im if im is None else GroovyImport(*im) for im in cached['imports']],
+        filename)
+
+
+def _store_cached(filename, mtime, result):
+    """ Write the parsed file to the on-disk cache, ignoring failures """
+    cached = {'version': _CACHE_VERSION, 'path': os.path.abspath(filename),
+              'mtime': mtime, 'functions': result.functions,
+              'imports': result.imports}
+    path = _cache_path(filename)
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    try:
+        if not os.path.isdir(_cache_dir):
+            os.makedirs(_cache_dir)
+        with open(tmp_path, 'w') as f:
+            json.dump(cached, f)
+        # atomic, so concurrent workers never read a partial entry
+        os.rename(tmp_path, path)
+    except (IOError, OSError) as e:
+        logger.debug("Could not cache %s in %s: %s", filename, _cache_dir, e)
+
+
+def _parse_file(filename):
+    ImportDefnRegexp = re.compile(r'^import.*')
+    FuncDefnRegexp = re.compile(r'^def.*\{')
+    FuncEndRegexp = re.compile(r'^\}.*$')
     passedFirstFunction = False
     with open(filename, 'r') as f:
         file_lines = [line.rstrip('\n') for line in f.readlines()]
     all_fns = []
     all_imports = []
-    fn_lines = ''
+    fn_lines = []
     for line in file_lines:
-        if not passedFirstFunction and re.match(ImportDefnRegexp, line):
+        if not passedFirstFunction and ImportDefnRegexp.match(line):
             all_imports.append(line)
-        elif len(fn_lines) > 0:
-            if re.match(FuncEndRegexp, line):
-                fn_lines += line + "\n"
-                all_fns.append(fn_lines)
-                fn_lines = ''
-            else:
-                fn_lines += line + "\n"
-        elif re.match(FuncDefnRegexp, line):
-            fn_lines += line + "\n"
+        elif fn_lines:
+            fn_lines.append(line + "\n")
+            if FuncEndRegexp.match(line):
+                all_fns.append(''.join(fn_lines))
+                fn_lines = []
+        elif FuncDefnRegexp.match(line):
+            fn_lines.append(line + "\n")
             passedFirstFunction = True
 
     import_results = [GroovyImportParser.parse(im) for im in all_imports]
     func_results = [GroovyFunctionParser.parse(fn) for fn in all_fns]
 
-    result = GroovyFileDef(func_results, import_results, filename)
-    _parsed_file_cache[filename] = result
+    return GroovyFileDef(func_results, import_results, filename)
+
+
+def parse(filename):
+    """
+    Parse Groovy code in the given file and return a list of information about each function necessary for usage in
+    queries to database.
+
+    :param filename: The file containing groovy code.
+    :type filename: str
+    :rtype: list
+
+    """
+    # Check cache before parsing file
+    mtime = os.path.getmtime(filename)
+    cached = _parsed_file_cache.get(filename)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    result = None
+    if _cache_dir is not None:
+        result = _load_cached(filename, mtime)
+    if result is None:
+        result = _parse_file(filename)
+        if _cache_dir is not None:
+            _store_cached(filename, mtime, result)
+    _parsed_file_cache[filename] = (mtime, result)
     return result
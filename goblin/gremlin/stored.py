@@ -0,0 +1,179 @@
+"""
+Gremlin methods stored on the server.
+
+By default every call of a Gremlin method sends the imports and the body of
+its function as the script. With::
+
+    connection.setup(url, stored_methods=True)
+
+the first call of a method on a pool sends the function definition along
+with the call. The Gremlin Server keeps the functions defined by scripts
+available to later scripts, so the calls that follow only send
+``name(arg1, arg2)`` and the bindings. If the server lost the definition,
+for example after a restart, the call is sent again with the definition.
+
+The stored functions are named after their method and a hash of their
+definition, so functions of the same name in different files, or changed
+between releases, don't clash. To have them defined when the server starts,
+add the output of :func:`init_script` to the scripts of its script engine.
+"""
+from __future__ import unicode_literals
+import hashlib
+import logging
+import weakref
+
+from goblin import connection
+from goblin.coroutines import Return, run
+
+
+logger = logging.getLogger(__name__)
+
+# pool -> names of the functions defined through it
+_defined = weakref.WeakKeyDictionary()
+
+
+def stored_name(method):
+    """ The name of the server-side function of a Gremlin method """
+    method._setup()
+    digest = hashlib.sha1(method.function_def.encode('utf-8')).hexdigest()
+    return '_goblin_{}_{}'.format(method.method_name, digest[:10])
+
+
+def _imports(method):
+    import_list = []
+    for imp in method.imports + method.extra_imports:
+        if imp is not None:
+            import_list.extend(imp.import_list)
+    return import_list
+
+
+def definition(method):
+    """ The definition of the server-side function of a Gremlin method """
+    return 'def {}({}) {{\n{}\n}}'.format(
+        stored_name(method), ', '.join(method.arg_list),
+        method.function_body)
+
+
+def call_script(method):
+    """ The script calling the server-side function with the bindings """
+    return '{}({})'.format(stored_name(method), ', '.join(method.arg_list))
+
+
+def init_script(*classes):
+    """
+    A script defining the server-side functions of the Gremlin methods of
+    ``classes``, for the script engine of the Gremlin Server.
+    """
+    import_list = []
+    definitions = []
+    for klass in classes:
+        for name in sorted(klass._gremlin_methods):
+            method = klass._gremlin_methods[name]
+            text = definition(method)
+            if text in definitions:
+                continue
+            definitions.append(text)
+            for import_string in _imports(method):
+                if import_string not in import_list:
+                    import_list.append(import_string)
+    return '\n'.join(import_list + definitions) + '\n'
+
+
+def forget(pool=None):
+    """
+    Forget the functions defined through ``pool``, or every pool, so their
+    next calls send the definitions again.
+    """
+    if pool is None:
+        _defined.clear()
+    else:
+        _defined.pop(pool, None)
+
+
+def _is_missing(error, name):
+    message = str(error)
+    return name in message and ('MissingMethodException' in message or
+                                'No signature of method' in message)
+
+
+def submit(method, params, **query_kwargs):
+    """
+    Operation calling the server-side function of ``method``, defining it
+    first if needed. Returns the response stream.
+    """
+    pool = query_kwargs.get('pool') or connection._connection_pool
+    defined = _defined.setdefault(pool, set())
+    name = stored_name(method)
+
+    def send(define):
+        if define:
+            script = '\n'.join(_imports(method) + [
+                definition(method), call_script(method)])
+            defined.add(name)
+        else:
+            script = call_script(method)
+        stream = yield connection.submit(script, bindings=params,
+                                         **query_kwargs)
+        raise Return(stream)
+
+    if name not in defined:
+        stream = yield send(True)
+        raise Return(stream)
+    stream = yield send(False)
+    raise Return(StoredStream(stream, lambda: send(True), name,
+                              pool.future_class))
+
+
+class StoredStream(object):
+    """
+    Stand-in for a :py:class:`gremlinclient.connection.Stream` sending the
+    call again with the function definition if the server lost it.
+    """
+
+    def __init__(self, stream, resend, name, future_class):
+        self._stream = stream
+        self._resend = resend
+        self._name = name
+        self._future_class = future_class
+        self._handlers = []
+        self._checked = False
+
+    @property
+    def _conn(self):
+        return getattr(self._stream, '_conn', None)
+
+    @property
+    def _closed(self):
+        return getattr(self._stream, '_closed', False)
+
+    @_closed.setter
+    def _closed(self, closed):
+        self._stream._closed = closed
+
+    def add_handler(self, handler):
+        self._handlers.append(handler)
+        self._stream.add_handler(handler)
+
+    def read(self):
+        """
+        Read a message from the response.
+
+        :returns: Future
+        """
+        if self._checked:
+            return self._stream.read()
+        return run(self._read(), self._future_class())
+
+    def _read(self):
+        try:
+            message = yield self._stream.read()
+        except RuntimeError as e:
+            if not _is_missing(e, self._name):
+                raise
+            logger.info("Defining %s again on the server", self._name)
+            self._stream = yield self._resend()
+            for handler in self._handlers:
+                self._stream.add_handler(handler)
+            message = yield self._stream.read()
+        self._checked = True
+        raise Return(message)
@@ -0,0 +1,111 @@
+"""
+Identity map of the elements loaded in a unit of work.
+
+Inside an :class:`IdentityMap` block, every element loaded from the graph
+is deserialized once: the same vertex or edge coming back again, through
+another query or traversal, is the same instance, and
+:meth:`get<goblin.models.element.BaseElement.get>` returns elements already
+loaded without querying the graph::
+
+    with IdentityMap():
+        person = yield Person.get(person_id)
+        friends = yield person.outV(Knows)
+        # the same instance, not a copy
+        assert (yield Person.get(person_id)) is person
+
+Saves and deletes made in the block update the map. The values of an
+element are not refreshed when it is read again; use
+:meth:`reload<goblin.models.element.BaseElement.reload>` for that.
+
+The current map is tracked with :py:mod:`contextvars` where available, so
+concurrent coroutines each see the map of the block they run in. On older
+Pythons it is tracked per thread.
+"""
+from __future__ import unicode_literals
+import threading
+
+from goblin.constants import EDGE_TRAVERSAL, VERTEX_TRAVERSAL
+
+try:
+    import contextvars
+except ImportError:  # pragma: no cover
+    contextvars = None
+
+
+# GraphSON element type -> traversal step loading it
+SOURCES = {'vertex': VERTEX_TRAVERSAL, 'edge': EDGE_TRAVERSAL}
+
+if contextvars is not None:
+    _current = contextvars.ContextVar('goblin_identity_map', default=None)
+
+    def current():
+        """ The identity map of the current block, ``None`` outside one """
+        return _current.get()
+
+    def _set_current(identity_map):
+        _current.set(identity_map)
+
+else:  # pragma: no cover
+    _local = threading.local()
+
+    def current():
+        """ The identity map of the current block, ``None`` outside one """
+        return getattr(_local, 'identity_map', None)
+
+    def _set_current(identity_map):
+        _local.identity_map = identity_map
+
+
+def _key(source, id):
+    try:
+        hash(id)
+    except TypeError:
+        return None
+    return source, id
+
+
+class IdentityMap(object):
+    """ Maps ``(source, id)`` to the loaded element, see module docs """
+
+    def __init__(self):
+        self._elements = {}
+        self._previous = []
+
+    def __enter__(self):
+        self._previous.append(current())
+        _set_current(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _set_current(self._previous.pop())
+        return False
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __contains__(self, element):
+        key = _key(element._source, element._id)
+        return self._elements.get(key) is element
+
+    def get(self, source, id):
+        """
+        The element loaded from ``source`` (``V`` or ``E``) with ``id``,
+        ``None`` if it was not loaded
+        """
+        return self._elements.get(_key(source, id))
+
+    def add(self, element):
+        """ Add or replace a saved or loaded element """
+        key = _key(element._source, element._id)
+        if key is not None and key[1] is not None:
+            self._elements[key] = element
+        return element
+
+    def discard(self, element):
+        """ Forget a deleted element """
+        key = _key(element._source, element._id)
+        if self._elements.get(key) is element:
+            del self._elements[key]
+
+    def clear(self):
+        self._elements.clear()
@@ -0,0 +1,3 @@
+from .client import Pool, GraphDatabase, get_graph
+from .functions import groovy_function, register_groovy_file
+from .graph import MemoryGraph
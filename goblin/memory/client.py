@@ -0,0 +1,327 @@
+from __future__ import unicode_literals
+import collections
+import json
+import logging
+
+from gremlinclient.graph import GraphDatabase as BaseGraphDatabase
+from gremlinclient.pool import Pool as BasePool
+from gremlinclient.response import Response as BaseResponse
+
+from goblin._compat import array_types, iteritems
+from goblin.bytecode import decode, encode
+from goblin.constants import RESULT_ITERATION_BATCH_SIZE
+from goblin.memory.functions import (
+    find_function, find_property_key_script, find_stored_function)
+from goblin.memory.graph import (MemoryEdge, MemoryElement, MemoryGraph,
+                                 MemoryVertex)
+from goblin.memory.traversal import evaluate, evaluate_bytecode
+from goblin.pipelining import split
+
+
+logger = logging.getLogger(__name__)
+
+
+# Gremlin Server status codes
+SUCCESS = 200
+NO_CONTENT = 204
+PARTIAL_CONTENT = 206
+SERVER_ERROR_SCRIPT_EVALUATION = 597
+
+DEFAULT_BATCH_SIZE = RESULT_ITERATION_BATCH_SIZE
+
+# url -> MemoryGraph, so pools created for the same url share their data the
+# way connections to the same server would
+_graphs = {}
+
+
+def get_graph(url):
+    """
+    Return the :class:`goblin.memory.graph.MemoryGraph` served at ``url``,
+    creating it on first use.
+
+    :param str url: url passed to :func:`goblin.connection.setup`
+    :rtype: goblin.memory.graph.MemoryGraph
+    """
+    if url not in _graphs:
+        _graphs[url] = MemoryGraph()
+    return _graphs[url]
+
+
+def _get_future_class():
+    try:
+        from tornado.concurrent import Future
+    except ImportError:  # pragma: no cover
+        from asyncio import Future
+    return Future
+
+
+def _serialize(obj):
+    """ Recursively convert graph elements into their GraphSON form """
+    if isinstance(obj, MemoryElement):
+        return obj.serialize()
+    if isinstance(obj, dict):
+        return {k: _serialize(v) for k, v in obj.items()}
+    if isinstance(obj, array_types):
+        return [_serialize(v) for v in obj]
+    return obj
+
+
+def _graphson(obj):
+    """ The GraphSON 3 form of a traversal result """
+    if isinstance(obj, MemoryVertex):
+        properties = {}
+        for key, props in iteritems(obj.properties):
+            properties[key] = [
+                {'@type': 'g:VertexProperty',
+                 '@value': {'id': encode(pid), 'value': encode(value),
+                            'label': key}}
+                for pid, value in props]
+        return {'@type': 'g:Vertex',
+                '@value': {'id': encode(obj.id), 'label': obj.label,
+                           'properties': properties}}
+    if isinstance(obj, MemoryEdge):
+        properties = {key: {'@type': 'g:Property',
+                            '@value': {'key': key, 'value': encode(value)}}
+                      for key, value in iteritems(obj.properties)}
+        return {'@type': 'g:Edge',
+                '@value': {'id': encode(obj.id), 'label': obj.label,
+                           'inVLabel': obj.in_v.label,
+                           'outVLabel': obj.out_v.label,
+                           'inV': encode(obj.in_v.id),
+                           'outV': encode(obj.out_v.id),
+                           'properties': properties}}
+    return encode(obj)
+
+
+def _traversers(batch):
+    """ A batch of traversal results as the traversal processor sends it """
+    return {'@type': 'g:List',
+            '@value': [{'@type': 'g:Traverser',
+                        '@value': {'bulk': encode(1),
+                                   'value': _graphson(obj)}}
+                       for obj in batch]}
+
+
+def evaluate_script(graph, script, bindings, aliases):
+    """
+    Evaluate a script and return its results as a list, unrolling
+    iterables the way the Gremlin Server does.
+    """
+    queries = split(script, bindings)
+    if queries is not None:
+        # a composite script from goblin.pipelining
+        results = []
+        for query, query_bindings in queries:
+            try:
+                results.append([True, evaluate_script(
+                    graph, query, query_bindings, aliases)])
+            except Exception as e:
+                results.append([False, '%s: %s' % (type(e).__name__, e)])
+        return results
+    function = (find_function(script) or find_property_key_script(script) or
+                find_stored_function(graph, script))
+    if function is not None:
+        name, func = function
+        result = func(graph, **bindings)
+    else:
+        result = evaluate(graph, script, bindings, aliases)
+    if result is None:
+        return []
+    if isinstance(result, (list, tuple)):
+        return list(result)
+    return [result]
+
+
+def _frame(request_id, status, data, message=''):
+    frame = {'requestId': request_id,
+             'status': {'code': status, 'message': message,
+                        'attributes': {}},
+             'result': {'data': data, 'meta': {}}}
+    return json.dumps(frame).encode('utf-8')
+
+
+def handle_request(graph, msg, binary=True, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Evaluate a request message against ``graph`` and return the encoded
+    response frames the Gremlin Server would send for it.
+
+    :param goblin.memory.graph.MemoryGraph graph: The graph to serve
+    :param bytes msg: The request, prefixed with its mime type header when
+        ``binary`` is ``True``
+    :param int batch_size: number of results per response frame
+
+    :returns: list of bytes
+    """
+    if binary:
+        mime_len = ord(msg[0:1])
+        msg = msg[mime_len + 1:].decode('utf-8')
+    message = json.loads(msg)
+    request_id = message['requestId']
+    args = message['args']
+    bytecode = message.get('op') == 'bytecode'
+    try:
+        if bytecode:
+            results = evaluate_bytecode(graph, decode(args['gremlin']))
+        else:
+            results = evaluate_script(graph, args['gremlin'],
+                                      args.get('bindings') or {},
+                                      args.get('aliases') or {})
+    except Exception as e:
+        logger.debug("Error evaluating script: %s", e)
+        return [_frame(request_id, SERVER_ERROR_SCRIPT_EVALUATION, None,
+                       '{}: {}'.format(e.__class__.__name__, e))]
+    if not results:
+        return [_frame(request_id, NO_CONTENT, None)]
+    frames = []
+    for start in range(0, len(results), batch_size):
+        batch = results[start:start + batch_size]
+        if start + batch_size < len(results):
+            status = PARTIAL_CONTENT
+        else:
+            status = SUCCESS
+        if bytecode:
+            data = _traversers(batch)
+        else:
+            data = _serialize(batch)
+        frames.append(_frame(request_id, status, data))
+    return frames
+
+
+class Response(BaseResponse):
+    """
+    In-process stand-in for a websocket connection to the Gremlin Server.
+
+    Requests written with :meth:`send` are evaluated immediately against a
+    :class:`goblin.memory.graph.MemoryGraph` and their response frames are
+    queued, encoded exactly as the server would send them, for
+    :meth:`receive` to hand back one at a time.
+
+    :param goblin.memory.graph.MemoryGraph graph: The graph to serve
+    :param class future_class: type of Future
+    :param int batch_size: number of results per response frame
+    """
+
+    def __init__(self, graph, future_class, loop=None,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        super(Response, self).__init__(graph, future_class, loop=loop)
+        self._frames = collections.deque()
+        self._closed = False
+        self._batch_size = batch_size
+
+    @property
+    def graph(self):
+        return self._conn
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        self._closed = True
+        self._frames.clear()
+        future = self._future_class()
+        future.set_result(None)
+        return future
+
+    def send(self, msg, binary=True):
+        """
+        Evaluate a request message and queue its response frames.
+
+        :param bytes msg: The request, prefixed with its mime type header
+            as produced by :py:class:`gremlinclient.connection.Connection`
+        """
+        self._frames.extend(
+            handle_request(self.graph, msg, binary=binary,
+                           batch_size=self._batch_size))
+
+    def receive(self, callback=None):
+        """
+        Read the next queued response frame.
+
+        :param callback: To be called on message read.
+
+        :returns: Future
+        """
+        future = self._future_class()
+        if self._frames:
+            future.set_result(self._frames.popleft())
+        else:
+            future.set_exception(RuntimeError("No response pending"))
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+
+class GraphDatabase(BaseGraphDatabase):
+    """
+    Creates connections to an in-process
+    :class:`goblin.memory.graph.MemoryGraph` instead of a Gremlin Server.
+
+    :param str url: url used to select the in-process graph. Nothing is
+        contacted over the network.
+    :param goblin.memory.graph.MemoryGraph memory_graph: The graph to serve
+        (optional). Defaults to the graph registered for ``url``
+    :param int batch_size: number of results per response frame
+    """
+
+    def __init__(self, url, timeout=None, username="", password="",
+                 loop=None, future_class=None, connector=None,
+                 memory_graph=None, batch_size=DEFAULT_BATCH_SIZE):
+        if future_class is None:
+            future_class = _get_future_class()
+        super(GraphDatabase, self).__init__(
+            url, timeout=timeout, username=username, password=password,
+            loop=loop, future_class=future_class)
+        if memory_graph is None:
+            memory_graph = get_graph(url)
+        self._memory_graph = memory_graph
+        self._batch_size = batch_size
+
+    @property
+    def memory_graph(self):
+        return self._memory_graph
+
+    def _connect(self, conn_type, session, force_close, force_release,
+                 pool):
+        future = self._future_class()
+        resp = Response(self._memory_graph, self._future_class, self._loop,
+                        batch_size=self._batch_size)
+        conn = conn_type(resp, self._future_class, self._timeout,
+                         self._username, self._password, self._loop,
+                         force_close, pool, force_release, session)
+        future.set_result(conn)
+        return future
+
+
+class Pool(BasePool):
+    """
+    Pool of connections to an in-process graph. A drop in replacement for
+    :py:class:`gremlinclient.tornado_client.Pool` for use with
+    :func:`goblin.connection.setup`::
+
+        from goblin import connection
+        from goblin.memory import Pool
+
+        connection.setup('ws://localhost:8182/', pool_class=Pool)
+
+    :param str url: url used to select the in-process graph
+    :param goblin.memory.graph.MemoryGraph memory_graph: The graph to serve
+        (optional). Defaults to the graph registered for ``url``
+    :param int batch_size: number of results per response frame
+    """
+
+    def __init__(self, url, graph=None, timeout=None, username="",
+                 password="", maxsize=256, loop=None, force_release=False,
+                 future_class=None, connector=None, memory_graph=None,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        graph = GraphDatabase(url,
+                              timeout=timeout,
+                              username=username,
+                              password=password,
+                              future_class=future_class,
+                              loop=loop,
+                              memory_graph=memory_graph,
+                              batch_size=batch_size)
+        super(Pool, self).__init__(graph, maxsize=maxsize, loop=loop,
+                                   force_release=force_release,
+                                   future_class=future_class)
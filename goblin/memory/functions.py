@@ -0,0 +1,492 @@
+from __future__ import unicode_literals
+import functools
+import logging
+import os.path
+import re
+from collections import OrderedDict
+
+from goblin.gremlin.groovy import parse
+from goblin.memory.graph import IllegalArgumentException, MemoryVertex
+from goblin.memory.traversal import P
+
+
+logger = logging.getLogger(__name__)
+
+
+# name -> python implementation of a groovy function
+_functions = {}
+
+# stripped function body -> function name
+_function_bodies = {}
+
+# a function defined and called by goblin.gremlin.stored
+_DEFINITION_RE = re.compile(
+    r'^def (\w+)\(([\w, ]*)\) \{\n(.*)\n\}\n\1\(([\w, ]*)\)$', re.S)
+_CALL_RE = re.compile(r'^(\w+)\(([\w, ]*)\)$')
+# the property key scripts of goblin.spec, with the key name inline, once
+# their whitespace is collapsed
+_MAKE_PROPERTY_KEY_RE = re.compile(
+    r"mgmt = graph\.openManagement\(\) name = mgmt\.makePropertyKey\("
+    r"'([^']*)'\)\.dataType\((\w+)\.class\)\.cardinality\("
+    r"Cardinality\.(\w+)\)\.make\(\) mgmt\.commit\(\)")
+_GET_PROPERTY_KEY_RE = re.compile(
+    r"mgmt = graph\.openManagement\(\) prop = mgmt\.getPropertyKey\("
+    r"'([^']*)'\) return prop ")
+_CHANGE_PROPERTY_KEY_NAME_RE = re.compile(
+    r"mgmt = graph\.openManagement\(\) prop = mgmt\.getPropertyKey\("
+    r"'([^']*)'\) mgmt\.changeName\(prop, '([^']*)'\) mgmt\.commit\(\)")
+
+
+class MissingMethodException(Exception):
+    """ Raised for calls of functions the graph has no definition of """
+
+
+def groovy_function(name):
+    """
+    Register the decorated callable as the in-process implementation of the
+    groovy function ``name``. The callable receives the graph followed by the
+    request bindings as keyword arguments.
+
+    :param str name: The name of the function in its ``.groovy`` file
+    """
+    def decorator(func):
+        _functions[name] = func
+        return func
+    return decorator
+
+
+def register_groovy_file(path):
+    """
+    Index every function defined in a ``.groovy`` file so scripts sent by
+    :class:`goblin.gremlin.GremlinMethod` can be matched to their in-process
+    implementation.
+
+    :param str path: Path to the groovy file
+    """
+    for func in parse(path).functions:
+        if func is not None:
+            _function_bodies[func.body.strip()] = func.name
+
+
+def find_function(script):
+    """
+    Return ``(name, callable)`` for the groovy function whose body makes up
+    ``script``, or ``None`` if the script is not a known function body.
+    """
+    lines = [line for line in script.strip().split('\n')
+             if not line.startswith('import ')]
+    name = _function_bodies.get('\n'.join(lines).strip())
+    if name is None:
+        return None
+    func = _functions.get(name)
+    if func is None:
+        return None
+    return name, func
+
+
+def find_stored_function(graph, script):
+    """
+    Return ``(name, callable)`` for the groovy function a script defines
+    and calls, or only calls, keeping the definitions in ``graph`` the way
+    the Gremlin Server keeps the functions defined by scripts. ``None`` if
+    the script is not a function definition or call.
+    """
+    script = '\n'.join(line for line in script.strip().split('\n')
+                       if not line.startswith('import '))
+    match = _DEFINITION_RE.match(script)
+    if match is not None:
+        function = find_function(match.group(3))
+        if function is not None:
+            graph.functions[match.group(1)] = function
+        return function
+    match = _CALL_RE.match(script)
+    if match is None:
+        return None
+    function = graph.functions.get(match.group(1))
+    if function is None:
+        raise MissingMethodException(
+            'No signature of method: Script1.{}() is applicable'.format(
+                match.group(1)))
+    return function
+
+
+def find_property_key_script(script):
+    """
+    Return ``(name, callable)`` for the property key scripts built by
+    :func:`goblin.spec.make_property_key`,
+    :func:`goblin.spec.get_property_key` and
+    :func:`goblin.spec.change_property_key_name`, or ``None`` for other
+    scripts.
+    """
+    script = ' '.join(script.split())
+    match = _MAKE_PROPERTY_KEY_RE.search(script)
+    if match is not None:
+        name, data_type, cardinality = match.groups()
+        return 'make_property_key', functools.partial(
+            _make_property_key, name=name, data_type=data_type,
+            cardinality=cardinality)
+    match = _GET_PROPERTY_KEY_RE.search(script)
+    if match is not None:
+        return 'get_property_key', functools.partial(
+            _get_property_key, name=match.group(1))
+    match = _CHANGE_PROPERTY_KEY_NAME_RE.search(script)
+    if match is not None:
+        old_name, new_name = match.groups()
+        return 'change_property_key_name', functools.partial(
+            _change_property_key_name, old_name=old_name, new_name=new_name)
+    return None
+
+
+def _make_property_key(graph, name, data_type, cardinality):
+    if name in graph.property_keys:
+        raise IllegalArgumentException(
+            "Name already used: {}".format(name))
+    graph.property_keys[name] = (data_type, cardinality)
+    graph.schema.setdefault('property_keys', []).append(name)
+    # the null returned by mgmt.commit()
+    return [None]
+
+
+def _get_property_key(graph, name):
+    return [name if name in graph.property_keys else None]
+
+
+def _change_property_key_name(graph, old_name, new_name):
+    if new_name in graph.property_keys:
+        raise IllegalArgumentException(
+            "Name already used: {}".format(new_name))
+    graph.property_keys[new_name] = graph.property_keys.pop(old_name)
+    names = graph.schema.get('property_keys', [])
+    names[names.index(old_name)] = new_name
+    # the values of the key are found under its new name
+    for element in (list(graph.vertices.values()) +
+                    list(graph.edges.values())):
+        if old_name in element.properties:
+            element.properties[new_name] = element.properties.pop(old_name)
+    return [None]
+
+
+def _labels(labels):
+    return set(labels or [])
+
+
+def _traverse(vertex, operation, labels):
+    if operation == 'inV':
+        return list(vertex.vertices('in', labels))
+    elif operation == 'outV':
+        return list(vertex.vertices('out', labels))
+    elif operation == 'bothV':
+        return list(vertex.vertices('both', labels))
+    elif operation == 'inE':
+        return list(vertex.edges('in', labels))
+    elif operation == 'outE':
+        return list(vertex.edges('out', labels))
+    elif operation == 'bothE':
+        return list(vertex.edges('both', labels))
+    raise NameError(operation)
+
+
+def _find_by_value(elements, label, field, val):
+    results = []
+    for element in elements:
+        if element.label != label or field not in element.properties:
+            continue
+        if isinstance(element, MemoryVertex):
+            values = list(element.values(field))
+        else:
+            values = [element.value(field)]
+        if val in values:
+            results.append(element)
+    return results
+
+
+def _find_by_predicate(elements, label, field, compare, values, order_key,
+                       descending, limit):
+    predicate = P(compare, values)
+    results = [element for element in elements
+               if element.label == label and
+               any(predicate(v) for v in element.values(field))]
+    if order_key is not None:
+        def key(element):
+            value = next(element.values(order_key), None)
+            # elements without the property come last
+            return (value is None) != descending, value
+        results.sort(key=key, reverse=descending)
+    if limit is not None:
+        results = results[:limit]
+    return results
+
+
+@groovy_function('_save_vertex')
+def _save_vertex(graph, vid, vlabel, attrs, geo_attrs, id_only):
+    if vid is None:
+        vertex = graph.add_vertex(vlabel)
+    else:
+        vertex = graph.get_vertex(vid)
+    graph.set_properties(vertex, attrs, geo_attrs)
+    return vertex.id if id_only else vertex
+
+
+@groovy_function('_bulk_create_vertices')
+def _bulk_create_vertices(graph, vlabel, vertices):
+    ids = []
+    for attrs, geo_attrs in vertices:
+        vertex = graph.add_vertex(vlabel)
+        graph.set_properties(vertex, attrs, geo_attrs)
+        ids.append(vertex.id)
+    return ids
+
+
+@groovy_function('_upsert_vertices')
+def _upsert_vertices(graph, vlabel, vertices, key, update):
+    results = []
+    for attrs, geo_attrs in vertices:
+        found = _find_by_value(graph.vertices.values(), vlabel, key,
+                               attrs[key])
+        created = not found
+        vertex = graph.add_vertex(vlabel) if created else found[0]
+        if created or update:
+            graph.set_properties(vertex, attrs, geo_attrs)
+        results.append([vertex, created])
+    return results
+
+
+@groovy_function('_flush_session')
+def _flush_session(graph, operations):
+    ids = []
+
+    def resolve(ref):
+        return ids[ref[1]] if ref[0] else ref[1]
+
+    for op in operations:
+        if op[0] == 'save_vertex':
+            _, ref, vlabel, attrs, geo_attrs = op
+            if ref is None:
+                element = graph.add_vertex(vlabel)
+            else:
+                element = graph.get_vertex(resolve(ref))
+            graph.set_properties(element, attrs, geo_attrs)
+        elif op[0] == 'save_edge':
+            _, ref, out_v, in_v, elabel, attrs, geo_attrs, exclusive = op
+            if ref is None:
+                element = _save_edge(graph, None, resolve(out_v),
+                                     resolve(in_v), elabel, attrs, geo_attrs,
+                                     exclusive, False)
+            else:
+                element = graph.get_edge(resolve(ref))
+                graph.set_properties(element, attrs, geo_attrs)
+        elif op[0] == 'delete_vertex':
+            element = graph.get_vertex(resolve(op[1]))
+            graph.remove_vertex(element)
+        else:
+            element = graph.edges.get(resolve(op[1]))
+            if element is not None:
+                graph.remove_edge(element)
+            ids.append(resolve(op[1]))
+            continue
+        ids.append(element.id)
+    return ids
+
+
+@groovy_function('_create_relationships')
+def _create_relationships(graph, vlabel, relationships, vid, in_direction,
+                          elabel):
+    existing = graph.get_vertex(vid)
+    results = []
+    for vertex_attrs, vertex_geo_attrs, edge_attrs, edge_geo_attrs in \
+            relationships:
+        vertex = graph.add_vertex(vlabel)
+        graph.set_properties(vertex, vertex_attrs, vertex_geo_attrs)
+        if in_direction:
+            edge = graph.add_edge(elabel, vertex, existing)
+        else:
+            edge = graph.add_edge(elabel, existing, vertex)
+        graph.set_properties(edge, edge_attrs, edge_geo_attrs)
+        results.append([edge.id, vertex.id])
+    return results
+
+
+@groovy_function('_delete_vertex')
+def _delete_vertex(graph, vid):
+    graph.remove_vertex(graph.get_vertex(vid))
+
+
+@groovy_function('_traversal')
+def _traversal(graph, vid, operation, labels, start, end, element_types):
+    results = _traverse(graph.get_vertex(vid), operation, _labels(labels))
+    if start is not None and end is not None:
+        results = results[start:end]
+    if element_types is not None:
+        results = [r for r in results if r.label in element_types]
+    return results
+
+
+@groovy_function('_delete_related')
+def _delete_related(graph, vid, operation, lbs, chunk_size):
+    if operation not in ('inV', 'outV', 'inE', 'outE'):
+        raise NameError(operation)
+    vertex = graph.get_vertex(vid)
+    while True:
+        related = _traverse(vertex, operation, _labels(lbs))
+        # vertices reached over several edges are removed once, as dedup()
+        chunk = list(OrderedDict((e.id, e) for e in related).values())
+        chunk = chunk[:chunk_size]
+        for element in chunk:
+            graph.remove(element)
+        graph.commit()
+        if len(chunk) < chunk_size:
+            break
+
+
+@groovy_function('_find_vertex_by_value')
+def _find_vertex_by_value(graph, vlabel, field, compare, values, order_key,
+                          descending, limit):
+    return _find_by_predicate(graph.vertices.values(), vlabel, field, compare,
+                              values, order_key, descending, limit)
+
+
+@groovy_function('_save_edge')
+def _save_edge(graph, eid, outV, inV, elabel, attrs, geo_attrs, exclusive,
+               id_only):
+    if eid is None:
+        source = graph.get_vertex(outV)
+        target = graph.get_vertex(inV)
+        edge = None
+        if exclusive:
+            for existing in source.edges('out', _labels([elabel])):
+                if existing.in_v is target:
+                    edge = existing
+                    break
+        if edge is None:
+            edge = graph.add_edge(elabel, source, target)
+    else:
+        edge = graph.get_edge(eid)
+    graph.set_properties(edge, attrs, geo_attrs)
+    return edge.id if id_only else edge
+
+
+@groovy_function('_bulk_create_edges')
+def _bulk_create_edges(graph, elabel, edges, exclusive):
+    vertices = {}
+    for out_v, in_v, _, _ in edges:
+        for vid in (out_v, in_v):
+            if vid not in vertices:
+                vertices[vid] = graph.get_vertex(vid)
+    existing = {}
+    if exclusive:
+        for out_v, _, _, _ in edges:
+            for edge in vertices[out_v].edges('out', _labels([elabel])):
+                existing[(out_v, edge.in_v.id)] = edge
+    ids = []
+    for out_v, in_v, attrs, geo_attrs in edges:
+        edge = existing.get((out_v, in_v)) if exclusive else None
+        if edge is None:
+            edge = graph.add_edge(elabel, vertices[out_v], vertices[in_v])
+            if exclusive:
+                existing[(out_v, in_v)] = edge
+        graph.set_properties(edge, attrs, geo_attrs)
+        ids.append(edge.id)
+    return ids
+
+
+@groovy_function('_delete_edge')
+def _delete_edge(graph, eid):
+    graph.remove_edge(graph.get_edge(eid))
+
+
+@groovy_function('_get_edges_between')
+def _get_edges_between(graph, out_v, in_v, elabel, page_num, per_page):
+    source = graph.get_vertex(out_v)
+    target = graph.get_vertex(in_v)
+    results = [e for e in source.edges('out', _labels([elabel]))
+               if e.in_v is target]
+    if page_num is not None and per_page is not None:
+        start = (page_num - 1) * per_page
+        results = results[start:start + per_page]
+    return results
+
+
+@groovy_function('_find_edge_by_value')
+def _find_edge_by_value(graph, elabel, field, compare, values, order_key,
+                        descending, limit):
+    return _find_by_predicate(graph.edges.values(), elabel, field, compare,
+                              values, order_key, descending, limit)
+
+
+@groovy_function('_read_schema')
+def _read_schema(graph):
+    return {key: list(names) for key, names in graph.schema.items()}
+
+
+@groovy_function('_apply_schema')
+def _apply_schema(graph, vertex_labels, edge_labels, property_keys,
+                  graph_indexes, edge_indexes, reindex):
+    schema = graph.schema
+    existing_keys = set(schema.get('property_keys', ()))
+
+    def status(keys):
+        # indexes over keys that existed before are enabled by the script,
+        # or left INSTALLED for the reindex
+        if reindex and existing_keys.intersection(keys):
+            return 'INSTALLED'
+        return 'ENABLED'
+
+    schema.setdefault('vertex_labels', []).extend(vertex_labels)
+    schema.setdefault('edge_labels', []).extend(edge_labels)
+    schema.setdefault('property_keys', []).extend(
+        key[0] for key in property_keys)
+    for name, data_type, cardinality in property_keys:
+        graph.property_keys[name] = (data_type, cardinality)
+    schema.setdefault('graph_indexes', []).extend(
+        index[0] for index in graph_indexes)
+    schema.setdefault('edge_indexes', []).extend(
+        [index[1], index[0]] for index in edge_indexes)
+    for name, element, label, keys, _ in graph_indexes:
+        graph.indexes[(None, name)] = {
+            'status': status(keys), 'label': label, 'keys': keys, 'job': None,
+            'edges': element == 'edge'}
+    for name, elabel, keys, _ in edge_indexes:
+        graph.indexes[(elabel, name)] = {
+            'status': status(keys), 'label': elabel, 'keys': keys, 'job': None,
+            'edges': True}
+    return [index[0] for index in graph_indexes + edge_indexes]
+
+
+@groovy_function('_index_status')
+def _index_status(graph, index_name, elabel):
+    index = graph.indexes[(elabel, index_name)]
+    if index['status'] == 'INSTALLED':
+        # every instance of the graph knows the index by the next read
+        index['status'] = 'REGISTERED'
+        return ['INSTALLED', None, None]
+    job = index['job']
+    if job is None:
+        return [index['status'], None, None]
+    # the job takes two reads to complete
+    job['reads'] += 1
+    done = job['reads'] >= 2
+    return [index['status'], done,
+            job['records'] if done else job['records'] // 2]
+
+
+@groovy_function('_update_index')
+def _update_index(graph, index_name, elabel, action):
+    index = graph.indexes[(elabel, index_name)]
+    if action == 'REINDEX':
+        elements = graph.edges if index['edges'] else graph.vertices
+        records = sum(1 for element in elements.values()
+                      if element.label == index['label'] and
+                      any(key in element.properties
+                          for key in index['keys']))
+        index['job'] = {'reads': 0, 'records': records}
+    elif action == 'ENABLE_INDEX':
+        index['status'] = 'ENABLED'
+    else:
+        raise ValueError(action)
+
+
+_goblin_path = os.path.dirname(os.path.dirname(__file__))
+_models_path = os.path.join(_goblin_path, 'models')
+register_groovy_file(os.path.join(_models_path, 'vertex.groovy'))
+register_groovy_file(os.path.join(_models_path, 'edge.groovy'))
+register_groovy_file(os.path.join(_goblin_path, 'spec.groovy'))
@@ -0,0 +1,359 @@
+from __future__ import unicode_literals
+import itertools
+import logging
+from collections import OrderedDict
+
+from goblin._compat import (array_types, float_types, integer_types,
+                            string_types)
+
+
+logger = logging.getLogger(__name__)
+
+
+class NoSuchElementException(Exception):
+    """ Mirrors the error raised by ``next()`` on an exhausted traversal """
+    pass
+
+
+class IllegalArgumentException(Exception):
+    """ Mirrors the error Titan raises for values of the wrong data type """
+    pass
+
+
+def _is_integer(bits):
+    def check(value):
+        return (isinstance(value, integer_types) and
+                not isinstance(value, bool) and
+                -2 ** (bits - 1) <= value < 2 ** (bits - 1))
+    return check
+
+
+def _is_number(value):
+    return (isinstance(value, integer_types + float_types) and
+            not isinstance(value, bool))
+
+
+# data type -> check of the values of its property keys. Titan converts any
+# value to a String, and Date, Geoshape and Object values are not checked.
+_DATA_TYPES = {
+    'Boolean': lambda value: isinstance(value, bool),
+    'Short': _is_integer(16),
+    'Integer': _is_integer(32),
+    'Long': _is_integer(64),
+    'Float': _is_number,
+    'Double': _is_number,
+}
+
+
+class MemoryElement(object):
+    """ Base class for elements stored in a :class:`MemoryGraph` """
+
+    element_type = None
+
+    def __init__(self, graph, id, label):
+        self.graph = graph
+        self.id = id
+        self.label = label
+        self.properties = OrderedDict()
+
+    def __repr__(self):
+        return "{}(id={}, label={})".format(
+            self.__class__.__name__, self.id, self.label)
+
+    def value(self, key):
+        """
+        Return the value stored under ``key``.
+
+        :raises: KeyError if the property does not exist
+        """
+        raise NotImplementedError
+
+    def values(self, *keys):
+        raise NotImplementedError
+
+    def remove_property(self, key):
+        self.properties.pop(key, None)
+
+
+class MemoryVertex(MemoryElement):
+    """ Vertex stored in a :class:`MemoryGraph` """
+
+    element_type = 'vertex'
+
+    def __init__(self, graph, id, label):
+        super(MemoryVertex, self).__init__(graph, id, label)
+        self.out_edges = OrderedDict()
+        self.in_edges = OrderedDict()
+
+    def set_property(self, key, value, multi=False):
+        """
+        Set a vertex property. Vertex properties are multi-properties, so
+        ``multi=True`` appends a new value instead of replacing the existing
+        ones.
+        """
+        self.graph.check_value(key, value)
+        prop = (self.graph.next_property_id(), value)
+        if multi and key in self.properties:
+            self.properties[key].append(prop)
+        else:
+            self.properties[key] = [prop]
+
+    def value(self, key):
+        props = self.properties[key]
+        if len(props) > 1:
+            return [v for _, v in props]
+        return props[0][1]
+
+    def values(self, *keys):
+        keys = keys or self.properties.keys()
+        for key in keys:
+            for _, v in self.properties.get(key, []):
+                yield v
+
+    def edges(self, direction, labels=None):
+        if direction in ('out', 'both'):
+            for e in list(self.out_edges.values()):
+                if not labels or e.label in labels:
+                    yield e
+        if direction in ('in', 'both'):
+            for e in list(self.in_edges.values()):
+                if not labels or e.label in labels:
+                    yield e
+
+    def vertices(self, direction, labels=None):
+        for e in self.edges(direction, labels):
+            yield e.in_v if e.out_v is self else e.out_v
+
+    def serialize(self):
+        properties = OrderedDict()
+        for key, props in self.properties.items():
+            properties[key] = [{'id': pid, 'value': v} for pid, v in props]
+        return {'id': self.id, 'label': self.label, 'type': 'vertex',
+                'properties': properties}
+
+
+class MemoryEdge(MemoryElement):
+    """ Edge stored in a :class:`MemoryGraph` """
+
+    element_type = 'edge'
+
+    def __init__(self, graph, id, label, out_v, in_v):
+        super(MemoryEdge, self).__init__(graph, id, label)
+        self.out_v = out_v
+        self.in_v = in_v
+
+    def set_property(self, key, value, multi=False):
+        self.graph.check_value(key, value)
+        self.properties[key] = value
+
+    def value(self, key):
+        return self.properties[key]
+
+    def values(self, *keys):
+        keys = keys or self.properties.keys()
+        for key in keys:
+            if key in self.properties:
+                yield self.properties[key]
+
+    def vertices(self, direction):
+        if direction in ('out', 'both'):
+            yield self.out_v
+        if direction in ('in', 'both'):
+            yield self.in_v
+
+    def serialize(self):
+        return {'id': self.id, 'label': self.label, 'type': 'edge',
+                'inVLabel': self.in_v.label, 'outVLabel': self.out_v.label,
+                'inV': self.in_v.id, 'outV': self.out_v.id,
+                'properties': dict(self.properties)}
+
+
+class MemoryGraph(object):
+    """
+    A minimal property graph held in process memory.
+
+    Vertex ids are integers and edge ids are strings, following the id
+    formats a Titan backed Gremlin Server hands out. Every mutation is
+    applied immediately, so transaction handling is a no-op.
+    """
+
+    def __init__(self):
+        self.vertices = OrderedDict()
+        self.edges = OrderedDict()
+        self._vertex_ids = itertools.count(1)
+        self._edge_ids = itertools.count(1)
+        self._property_ids = itertools.count(1)
+        # name -> (name, callable) of the functions defined by scripts,
+        # kept like the script engine of the Gremlin Server keeps them
+        self.functions = {}
+        # names of the schema elements made by goblin.spec.sync_spec
+        self.schema = {}
+        # name -> (data type, cardinality) of the property keys made by
+        # goblin.spec, which are kept when the graph is cleared like the
+        # schema of a Titan graph
+        self.property_keys = {}
+        # (edge label or None, name) -> status, elements and reindex job of
+        # the indexes made by goblin.spec.sync_spec
+        self.indexes = {}
+        # number of transactions committed by the stand-in functions that
+        # commit more than once per request
+        self.commits = 0
+
+    def __repr__(self):
+        return "{}(vertices={}, edges={})".format(
+            self.__class__.__name__, len(self.vertices), len(self.edges))
+
+    def next_property_id(self):
+        return '{}p'.format(next(self._property_ids))
+
+    def clear(self):
+        """ Remove every element from the graph """
+        self.vertices.clear()
+        self.edges.clear()
+
+    def commit(self):
+        """ Count a committed transaction, the graph being always up to date """
+        self.commits += 1
+
+    def check_value(self, key, value):
+        """
+        Check ``value`` against the data type of the property key ``key``
+
+        :raises: IllegalArgumentException
+        """
+        try:
+            data_type = self.property_keys[key][0]
+        except KeyError:
+            return
+        check = _DATA_TYPES.get(data_type)
+        if check is not None and not check(value):
+            raise IllegalArgumentException(
+                "Value [{!r}] is not an instance of the expected data type "
+                "for property key [{}]: {}".format(value, key, data_type))
+
+    def add_vertex(self, label='vertex'):
+        vertex = MemoryVertex(self, next(self._vertex_ids), label)
+        self.vertices[vertex.id] = vertex
+        return vertex
+
+    def add_edge(self, label, out_v, in_v):
+        edge = MemoryEdge(self, '{}e'.format(next(self._edge_ids)), label,
+                          out_v, in_v)
+        self.edges[edge.id] = edge
+        out_v.out_edges[edge.id] = edge
+        in_v.in_edges[edge.id] = edge
+        return edge
+
+    def remove_vertex(self, vertex):
+        for edge in list(vertex.edges('both')):
+            self.remove_edge(edge)
+        self.vertices.pop(vertex.id, None)
+
+    def remove_edge(self, edge):
+        edge.out_v.out_edges.pop(edge.id, None)
+        edge.in_v.in_edges.pop(edge.id, None)
+        self.edges.pop(edge.id, None)
+
+    def remove(self, element):
+        if isinstance(element, MemoryVertex):
+            self.remove_vertex(element)
+        else:
+            self.remove_edge(element)
+
+    def get_vertex(self, vid):
+        """
+        Return the vertex with the given id. Element arguments are accepted
+        as well, as they are in Gremlin.
+
+        :raises: NoSuchElementException
+        """
+        if isinstance(vid, MemoryVertex):
+            return vid
+        if isinstance(vid, string_types) and vid.isdigit():
+            # Titan accepts vertex ids as strings
+            vid = int(vid)
+        try:
+            return self.vertices[vid]
+        except (KeyError, TypeError):
+            raise NoSuchElementException(
+                "Vertex with id {} does not exist".format(vid))
+
+    def get_edge(self, eid):
+        """
+        Return the edge with the given id.
+
+        :raises: NoSuchElementException
+        """
+        if isinstance(eid, MemoryEdge):
+            return eid
+        try:
+            return self.edges[eid]
+        except (KeyError, TypeError):
+            raise NoSuchElementException(
+                "Edge with id {} does not exist".format(eid))
+
+    def find_vertices(self, ids):
+        """ Yield the vertices with the given ids, skipping unknown ids """
+        if not ids:
+            for vertex in list(self.vertices.values()):
+                yield vertex
+        for vid in ids:
+            try:
+                yield self.get_vertex(vid)
+            except NoSuchElementException:
+                pass
+
+    def find_edges(self, ids):
+        """ Yield the edges with the given ids, skipping unknown ids """
+        if not ids:
+            for edge in list(self.edges.values()):
+                yield edge
+        for eid in ids:
+            try:
+                yield self.get_edge(eid)
+            except NoSuchElementException:
+                pass
+
+    def set_properties(self, element, attrs, geo_attrs=None):
+        """
+        Apply the ``attrs`` and ``geo_attrs`` maps sent by the model layer
+        to an element, following the rules of ``_save_vertex`` and
+        ``_save_edge``: ``None`` removes a property and lists become
+        multi-properties.
+        """
+        for key, value in (geo_attrs or {}).items():
+            if value is None:
+                element.remove_property(key)
+            else:
+                element.set_property(key, geoshape(*value))
+        for key, value in (attrs or {}).items():
+            if value is None:
+                element.remove_property(key)
+            elif isinstance(value, array_types):
+                element.remove_property(key)
+                for extra in value:
+                    element.set_property(key, extra, multi=True)
+            else:
+                element.set_property(key, value)
+
+
+def geoshape(shape, coords):
+    """
+    Convert a ``(shape, coords)`` pair, as produced by
+    :meth:`goblin.models.element.BaseElement.as_save_params`, to the GeoJSON
+    form Titan serializes geoshapes as.
+    """
+    if shape == 'point':
+        lat, lng = coords
+        return {'type': 'Point', 'coordinates': [lng, lat]}
+    elif shape == 'circle':
+        lat, lng, radius = coords
+        return {'type': 'Circle', 'coordinates': [lng, lat],
+                'radius': radius}
+    elif shape == 'box':
+        # Titan serializes a box as its four corners, not a closed ring
+        lat1, lng1, lat2, lng2 = coords
+        return {'type': 'Polygon',
+                'coordinates': [[lng1, lat1], [lng2, lat1], [lng2, lat2],
+                                [lng1, lat2]]}
+    raise ValueError("Unknown geoshape '{}'".format(shape))
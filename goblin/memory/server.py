@@ -0,0 +1,88 @@
+from __future__ import unicode_literals
+import logging
+
+from tornado import web, websocket
+from tornado.httpserver import HTTPServer
+from tornado.netutil import bind_sockets
+
+from goblin.memory.client import (DEFAULT_BATCH_SIZE, get_graph,
+                                  handle_request)
+
+
+logger = logging.getLogger(__name__)
+
+
+class GremlinHandler(websocket.WebSocketHandler):
+    """
+    Websocket handler answering Gremlin Server requests from a
+    :class:`goblin.memory.graph.MemoryGraph`.
+    """
+
+    def initialize(self, graph, batch_size=DEFAULT_BATCH_SIZE):
+        self.graph = graph
+        self.batch_size = batch_size
+
+    def open(self):
+        # responses are written as several small frames; don't let Nagle's
+        # algorithm hold back the last one
+        self.set_nodelay(True)
+
+    def on_message(self, message):
+        binary = not isinstance(message, type(''))
+        frames = handle_request(self.graph, message, binary=binary,
+                                batch_size=self.batch_size)
+        for frame in frames:
+            self.write_message(frame, binary=True)
+
+
+class StubServer(object):
+    """
+    A local websocket server speaking the Gremlin Server protocol on top of
+    the in-process backend. Unlike :class:`goblin.memory.client.Pool` it
+    exercises the real websocket client, so it can stand in for a Gremlin
+    Server in benchmarks that should include transport costs::
+
+        server = StubServer()
+        server.start()
+        connection.setup(server.url)
+
+    :param goblin.memory.graph.MemoryGraph graph: The graph to serve
+        (optional). Defaults to the graph registered for the server url
+    :param str host: Interface to listen on
+    :param int port: Port to listen on. ``0`` picks a free port
+    :param int batch_size: number of results per response frame
+    """
+
+    def __init__(self, graph=None, host='127.0.0.1', port=0,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self._graph = graph
+        self._server = None
+
+    @property
+    def url(self):
+        return 'ws://{}:{}/'.format(self.host, self.port)
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            self._graph = get_graph(self.url)
+        return self._graph
+
+    def start(self):
+        """ Start listening on the current IOLoop """
+        sockets = bind_sockets(self.port, address=self.host)
+        self.port = sockets[0].getsockname()[1]
+        app = web.Application([
+            (r'/', GremlinHandler,
+             {'graph': self.graph, 'batch_size': self.batch_size})])
+        self._server = HTTPServer(app)
+        self._server.add_sockets(sockets)
+        logger.debug("Stub Gremlin Server listening on %s", self.url)
+
+    def stop(self):
+        if self._server is not None:
+            self._server.stop()
+            self._server = None
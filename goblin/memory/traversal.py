@@ -0,0 +1,529 @@
+from __future__ import unicode_literals
+import itertools
+import logging
+import re
+
+from goblin._compat import array_types
+from goblin.memory.graph import MemoryElement, MemoryVertex
+
+
+logger = logging.getLogger(__name__)
+
+
+class ScriptError(Exception):
+    """ A script could not be parsed or evaluated by the in-process backend """
+    pass
+
+
+class Symbol(object):
+    """ An unbound identifier in a script, e.g. ``decr`` or ``T.id`` """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "Symbol({})".format(self.name)
+
+    def __eq__(self, other):
+        return isinstance(other, Symbol) and other.name == self.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+
+class Call(object):
+    """ A nested call in a step argument list, e.g. ``gt(b1)`` """
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __repr__(self):
+        return "Call({}, {})".format(self.name, self.args)
+
+
+class Anonymous(object):
+    """ An anonymous traversal passed to a step, e.g. ``sideEffect(drop())`` """
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def __call__(self, graph, traversers):
+        for name, args in self.steps:
+            traversers = STEPS[name](graph, traversers, *args)
+        return traversers
+
+
+class Spread(object):
+    """ A ``*binding`` argument """
+
+    def __init__(self, value):
+        self.value = value
+
+
+_TOKENS = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)[LlDdFf]?
+      | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<name>[A-Za-z_]\w*)
+      | (?P<op>[().,*])
+    )""", re.VERBOSE)
+
+_LITERALS = {'true': True, 'false': False, 'null': None}
+
+
+def tokenize(script):
+    tokens = []
+    pos = 0
+    script = script.strip()
+    while pos < len(script):
+        match = _TOKENS.match(script, pos)
+        if match is None or match.end() == pos:
+            raise ScriptError(
+                "Unsupported syntax at {!r}".format(script[pos:pos + 20]))
+        pos = match.end()
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+    return tokens
+
+
+class Parser(object):
+    """
+    Recursive descent parser for the single-expression traversal scripts the
+    model layer builds, e.g. ``g.V(vid).out(*b0).has('age', gt(b1))``.
+    """
+
+    def __init__(self, script):
+        self.tokens = tokenize(script)
+        self.pos = 0
+
+    def peek(self, offset=0):
+        try:
+            return self.tokens[self.pos + offset]
+        except IndexError:
+            return (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if ((kind is not None and token[0] != kind) or
+                (value is not None and token[1] != value)):
+            raise ScriptError("Unexpected token {!r}".format(token[1]))
+        self.pos += 1
+        return token
+
+    def parse(self):
+        """
+        Parse the script into its traversal source name and a list of
+        ``(step_name, args)`` pairs.
+        """
+        source = self.take('name')[1]
+        steps = []
+        while self.peek()[0] is not None:
+            self.take('op', '.')
+            name = self.take('name')[1]
+            self.take('op', '(')
+            steps.append((name, self.parse_args()))
+        return source, steps
+
+    def parse_args(self):
+        args = []
+        if self.peek() == ('op', ')'):
+            self.take()
+            return args
+        while True:
+            args.append(self.parse_arg())
+            token = self.take('op')
+            if token[1] == ')':
+                return args
+            if token[1] != ',':
+                raise ScriptError("Unexpected token {!r}".format(token[1]))
+
+    def parse_arg(self):
+        kind, value = self.take()
+        if kind == 'op' and value == '*':
+            return Spread(self.parse_arg())
+        if kind == 'number':
+            return float(value) if re.search(r'[.eE]', value) else int(value)
+        if kind == 'string':
+            return re.sub(r'\\(.)', r'\1', value[1:-1])
+        if kind == 'name':
+            if value in _LITERALS:
+                return _LITERALS[value]
+            if self.peek() == ('op', '('):
+                self.take()
+                return Call(value, self.parse_args())
+            while self.peek() == ('op', '.'):
+                self.take()
+                value += '.' + self.take('name')[1]
+            return Symbol(value)
+        raise ScriptError("Unexpected token {!r}".format(value))
+
+
+class Traverser(object):
+    """ A single object flowing through a traversal """
+    __slots__ = ('obj', 'prev')
+
+    def __init__(self, obj, prev=None):
+        self.obj = obj
+        self.prev = prev
+
+    def split(self, obj):
+        return Traverser(obj, self.obj)
+
+
+class P(object):
+    """ Gremlin predicate, e.g. ``gt(5)`` or ``within(1, 2)`` """
+
+    def __init__(self, name, args):
+        if name not in self.operators:
+            raise ScriptError("Unknown predicate '{}'".format(name))
+        self.name = name
+        self.args = args
+
+    def __call__(self, value):
+        return self.operators[self.name](value, self.args)
+
+    operators = {
+        'eq': lambda v, a: v == a[0],
+        'neq': lambda v, a: v != a[0],
+        'gt': lambda v, a: v is not None and v > a[0],
+        'gte': lambda v, a: v is not None and v >= a[0],
+        'lt': lambda v, a: v is not None and v < a[0],
+        'lte': lambda v, a: v is not None and v <= a[0],
+        'within': lambda v, a: v in a,
+        'without': lambda v, a: v not in a,
+        'inside': lambda v, a: v is not None and a[0] < v < a[1],
+        'outside': lambda v, a: v is not None and (v < a[0] or v > a[1]),
+        'between': lambda v, a: v is not None and a[0] <= v < a[1],
+    }
+
+
+def _labels(args):
+    return set(args)
+
+
+def _step_out(graph, traversers, *labels):
+    return (t.split(v) for t in traversers
+            for v in t.obj.vertices('out', _labels(labels)))
+
+
+def _step_in(graph, traversers, *labels):
+    return (t.split(v) for t in traversers
+            for v in t.obj.vertices('in', _labels(labels)))
+
+
+def _step_both(graph, traversers, *labels):
+    return (t.split(v) for t in traversers
+            for v in t.obj.vertices('both', _labels(labels)))
+
+
+def _step_out_e(graph, traversers, *labels):
+    return (t.split(e) for t in traversers
+            for e in t.obj.edges('out', _labels(labels)))
+
+
+def _step_in_e(graph, traversers, *labels):
+    return (t.split(e) for t in traversers
+            for e in t.obj.edges('in', _labels(labels)))
+
+
+def _step_both_e(graph, traversers, *labels):
+    return (t.split(e) for t in traversers
+            for e in t.obj.edges('both', _labels(labels)))
+
+
+def _step_out_v(graph, traversers):
+    return (t.split(t.obj.out_v) for t in traversers)
+
+
+def _step_in_v(graph, traversers):
+    return (t.split(t.obj.in_v) for t in traversers)
+
+
+def _step_both_v(graph, traversers):
+    return (t.split(v) for t in traversers for v in t.obj.vertices('both'))
+
+
+def _step_other_v(graph, traversers):
+    for t in traversers:
+        edge = t.obj
+        yield t.split(edge.in_v if t.prev is edge.out_v else edge.out_v)
+
+
+def _property_value(element, key):
+    try:
+        return element.value(key)
+    except KeyError:
+        return None
+
+
+def _step_has(graph, traversers, *args):
+    if len(args) == 1:
+        key, = args
+        return (t for t in traversers if key in t.obj.properties)
+    if len(args) == 3:
+        label, key, predicate = args
+        traversers = (t for t in traversers if t.obj.label == label)
+    else:
+        key, predicate = args
+    if not isinstance(predicate, P):
+        predicate = P('eq', [predicate])
+
+    def test(element):
+        if key in ('id', 'T.id'):
+            return predicate(element.id)
+        if key in ('label', 'T.label'):
+            return predicate(element.label)
+        if isinstance(element, MemoryVertex):
+            return any(predicate(v) for v in element.values(key))
+        return predicate(_property_value(element, key))
+
+    return (t for t in traversers if test(t.obj))
+
+
+def _step_has_not(graph, traversers, key):
+    return (t for t in traversers if key not in t.obj.properties)
+
+
+def _step_has_label(graph, traversers, *labels):
+    labels = _labels(labels)
+    return (t for t in traversers if t.obj.label in labels)
+
+
+def _step_has_id(graph, traversers, *ids):
+    ids = set(ids)
+    return (t for t in traversers if t.obj.id in ids)
+
+
+def _dedup_key(obj):
+    if isinstance(obj, MemoryElement):
+        return obj.element_type, obj.id
+    try:
+        hash(obj)
+    except TypeError:
+        return repr(obj)
+    return obj
+
+
+def _step_dedup(graph, traversers):
+    seen = set()
+    for t in traversers:
+        key = _dedup_key(t.obj)
+        if key not in seen:
+            seen.add(key)
+            yield t
+
+
+def _step_limit(graph, traversers, limit):
+    # read eagerly, so the steps after it may modify the graph
+    return iter(list(itertools.islice(traversers, limit)))
+
+
+def _step_range(graph, traversers, low, high):
+    return iter(list(itertools.islice(traversers, low, high)))
+
+
+def _order_value(obj, key):
+    if key is None:
+        return obj
+    if isinstance(obj, MemoryElement):
+        return next(obj.values(key), None)
+    raise ScriptError("Cannot order {!r} by '{}'".format(obj, key))
+
+
+def _step_order(graph, traversers, *modulators):
+    """ ``order()``, with the ``by()`` steps following it as modulators """
+    traversers = list(traversers)
+    # sort by the last modulator first, the sort is stable
+    for modulator in reversed(modulators or [[]]):
+        key = modulator[0] if modulator else None
+        order = modulator[1] if len(modulator) > 1 else Symbol('incr')
+        descending = order.name.split('.')[-1] in ('decr', 'desc')
+
+        def sort_key(t):
+            value = _order_value(t.obj, key)
+            # elements without the property come last
+            return (value is None) != descending, value
+
+        traversers.sort(key=sort_key, reverse=descending)
+    return iter(traversers)
+
+
+def _step_values(graph, traversers, *keys):
+    for t in traversers:
+        for value in t.obj.values(*keys):
+            yield t.split(value)
+
+
+def _step_count(graph, traversers):
+    return iter([Traverser(sum(1 for _ in traversers))])
+
+
+def _step_side_effect(graph, traversers, traversal):
+    for t in traversers:
+        for _ in traversal(graph, iter([t])):
+            pass
+        yield t
+
+
+def _step_drop(graph, traversers):
+    for t in list(traversers):
+        graph.remove(t.obj)
+    return iter([])
+
+
+STEPS = {
+    'out': _step_out,
+    'in': _step_in,
+    'both': _step_both,
+    'outE': _step_out_e,
+    'inE': _step_in_e,
+    'bothE': _step_both_e,
+    'outV': _step_out_v,
+    'inV': _step_in_v,
+    'bothV': _step_both_v,
+    'otherV': _step_other_v,
+    'has': _step_has,
+    'hasNot': _step_has_not,
+    'hasLabel': _step_has_label,
+    'hasId': _step_has_id,
+    'dedup': _step_dedup,
+    'limit': _step_limit,
+    'range': _step_range,
+    'order': _step_order,
+    'values': _step_values,
+    'count': _step_count,
+    'sideEffect': _step_side_effect,
+    'drop': _step_drop,
+}
+
+
+def _resolve(arg, bindings):
+    """ Resolve a parsed argument against the request bindings """
+    if isinstance(arg, Symbol):
+        if arg.name in bindings:
+            return bindings[arg.name]
+        return arg
+    if isinstance(arg, Call):
+        args = _resolve_args(arg.args, bindings)
+        if arg.name not in P.operators and arg.name in STEPS:
+            return Anonymous([(arg.name, args)])
+        return P(arg.name, args)
+    return arg
+
+
+def _resolve_args(args, bindings):
+    resolved = []
+    for arg in args:
+        if isinstance(arg, Spread):
+            value = _resolve(arg.value, bindings)
+            if not isinstance(value, array_types):
+                raise ScriptError("Cannot spread {!r}".format(value))
+            resolved.extend(value)
+        else:
+            resolved.append(_resolve(arg, bindings))
+    return resolved
+
+
+def evaluate(graph, script, bindings, aliases=None):
+    """
+    Evaluate a traversal script against ``graph``.
+
+    :param graph: The graph to traverse
+    :type graph: goblin.memory.graph.MemoryGraph
+    :param str script: A single traversal expression, e.g. ``g.V(vid)``,
+        or ``graph.addVertex(label, l0, k0, v0)``
+    :param dict bindings: The request bindings
+    :param dict aliases: The request aliases. Only the graph and traversal
+        source aliases are used to recognise the start of the expression.
+
+    :returns: list of traversal results
+    """
+    aliases = aliases or {}
+    source, steps = Parser(script).parse()
+    if (source in ('graph', aliases.get('graph')) and len(steps) == 1 and
+            steps[0][0] == 'addVertex'):
+        return [_add_vertex(graph, _resolve_args(steps[0][1], bindings))]
+    if source not in ('g', aliases.get('g')) or not steps:
+        raise ScriptError("Unsupported script: {}".format(script))
+    return _traverse(graph, ((name, _resolve_args(args, bindings))
+                             for name, args in steps))
+
+
+def _add_vertex(graph, args):
+    """ ``graph.addVertex`` with alternating keys and values """
+    if len(args) % 2:
+        raise ScriptError("addVertex takes keys and values")
+    label = 'vertex'
+    properties = []
+    for key, value in zip(args[::2], args[1::2]):
+        if key in (Symbol('label'), Symbol('T.label')):
+            label = value
+        else:
+            graph.check_value(key, value)
+            properties.append((key, value))
+    vertex = graph.add_vertex(label)
+    for key, value in properties:
+        vertex.set_property(key, value)
+    return vertex
+
+
+def evaluate_bytecode(graph, bytecode):
+    """
+    Evaluate a traversal sent as bytecode against ``graph``.
+
+    :param graph: The graph to traverse
+    :type graph: goblin.memory.graph.MemoryGraph
+    :param goblin.bytecode.Bytecode bytecode: The decoded traversal
+
+    :returns: list of traversal results
+    """
+    from goblin.bytecode import Enum, P as BytecodeP
+    steps = []
+    for step in bytecode.steps:
+        args = []
+        for arg in step[1:]:
+            if isinstance(arg, BytecodeP):
+                value = arg.value
+                if not isinstance(value, array_types):
+                    value = [value]
+                arg = P(arg.predicate, list(value))
+            elif isinstance(arg, Enum):
+                arg = Symbol(arg.name)
+            args.append(arg)
+        steps.append((step[0], args))
+    if not steps:
+        raise ScriptError("Empty traversal")
+    return _traverse(graph, steps)
+
+
+def _traverse(graph, steps):
+    """ Run the steps, with their arguments resolved, of a traversal """
+    folded = []
+    for name, args in steps:
+        if name == 'by':
+            # a modulator of the step before it
+            if not folded or folded[-1][0] != 'order':
+                raise ScriptError("Unsupported step 'by'")
+            folded[-1][1].append(list(args))
+        elif name == 'order':
+            folded.append((name, list(args)))
+        else:
+            folded.append((name, args))
+    steps = iter(folded)
+    start, start_args = next(steps)
+    if start == 'V':
+        traversers = (Traverser(v) for v in graph.find_vertices(start_args))
+    elif start == 'E':
+        traversers = (Traverser(e) for e in graph.find_edges(start_args))
+    else:
+        raise ScriptError("Unknown start step '{}'".format(start))
+
+    for name, args in steps:
+        try:
+            step = STEPS[name]
+        except KeyError:
+            raise ScriptError("Unsupported step '{}'".format(name))
+        traversers = step(graph, traversers, *args)
+
+    return [t.obj for t in traversers]
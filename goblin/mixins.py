@@ -0,0 +1,29 @@
+"""
+The ``async def`` API of the models, see :py:mod:`goblin.aio`. Before
+Python 3.5 the mixins are empty.
+"""
+from __future__ import unicode_literals
+
+from goblin._compat import PY35
+
+
+if PY35:
+    from goblin.aio import (AsyncElementMixin, AsyncVertexMixin,
+                            AsyncEdgeMixin, AsyncQueryMixin,
+                            AsyncRelationshipMixin)
+else:  # pragma: no cover
+
+    class AsyncElementMixin(object):
+        """ The ``async def`` API requires Python 3.5+ """
+
+    class AsyncVertexMixin(object):
+        pass
+
+    class AsyncEdgeMixin(object):
+        pass
+
+    class AsyncQueryMixin(object):
+        pass
+
+    class AsyncRelationshipMixin(object):
+        pass
@@ -1,7 +1,7 @@
 from .vertex import Vertex
 from .edge import Edge
 from .paginated_vertex import PaginatedVertex
-from .query import V
+from .query import E, V
 
 from goblin.constants import EQUAL, GREATER_THAN_EQUAL, GREATER_THAN, \
     LESS_THAN_EQUAL, LESS_THAN, NOT_EQUAL, OUT, IN, BOTH, WITHIN
@@ -1,5 +1,5 @@
 
-def _save_edge(eid, outV, inV, elabel, attrs, geo_attrs, exclusive) {
+def _save_edge(eid, outV, inV, elabel, attrs, geo_attrs, exclusive, id_only) {
 	/**
 	 * Saves an edge between two vertices
 	 * MAY NEED TO REWRITE THIS FUNCTION
@@ -8,6 +8,7 @@ def _save_edge(eid, outV, inV, elabel, attrs, geo_attrs, exclusive) {
 	 * :param outV: edge outv id
 	 * :param attrs: map of parameters to set on the edge
 	 * :param exclusive: if true, this will check for an existing edge of the same label and modify it, instead of creating another edge
+	 * :param id_only: if true, return the id of the edge instead of reading it again
 	 */
 	graph.tx().rollback()
 	try{
@@ -44,6 +45,9 @@ def _save_edge(eid, outV, inV, elabel, attrs, geo_attrs, exclusive) {
       }
 		}
 		graph.tx().commit()
+		if (id_only) {
+			return e.id()
+		}
 		return g.E(e.id()).next()
 	} catch (err) {
 		graph.tx().rollback()
@@ -52,6 +56,72 @@ def _save_edge(eid, outV, inV, elabel, attrs, geo_attrs, exclusive) {
 }
 
 
+def _bulk_create_edges(elabel, edges, exclusive) {
+    /**
+     * Creates edges in one transaction
+     *
+     * :param elabel: label of the edges
+     * :param edges: list of [outV, inV, attrs, geo_attrs], one per edge
+     * :param exclusive: if true, reuse the edge of the same label between
+     *                   the same vertices, existing or earlier in the list
+     * :returns: the ids of the edges, in order
+     */
+    graph.tx().rollback()
+    try {
+        def vids = (edges.collect{it[0]} + edges.collect{it[1]}).unique()
+        def vertices = [:]
+        g.V(*vids).each{vertices[it.id().toString()] = it}
+        for (vid in vids) {
+            if (!vertices.containsKey(vid.toString())) {
+                throw new IllegalArgumentException("Vertex " + vid + " does not exist")
+            }
+        }
+        def existing = [:]
+        if (exclusive) {
+            def out_ids = edges.collect{it[0]}.unique()
+            g.V(*out_ids).outE(elabel).each{
+                existing[[it.outVertex().id().toString(), it.inVertex().id().toString()]] = it
+            }
+        }
+        def ids = []
+        for (params in edges) {
+            def key = [params[0].toString(), params[1].toString()]
+            def e = exclusive ? existing[key] : null
+            if (e == null) {
+                e = vertices[key[0]].addEdge(elabel, vertices[key[1]])
+                if (exclusive) {
+                    existing[key] = e
+                }
+            }
+            for (item in params[3].entrySet()) {
+                if (item.value == null) {
+                    e.property(item.key).remove()
+                } else if (item.value[0] == 'point') {
+                    e.property(item.key, Geoshape.point(*item.value[1]))
+                } else if (item.value[0] == 'circle') {
+                    e.property(item.key, Geoshape.circle(*item.value[1]))
+                } else if (item.value[0] == 'box') {
+                    e.property(item.key, Geoshape.box(*item.value[1]))
+                }
+            }
+            for (item in params[2].entrySet()) {
+                if (item.value == null) {
+                    e.property(item.key).remove()
+                } else {
+                    e.property(item.key, item.value)
+                }
+            }
+            ids.add(e.id())
+        }
+        graph.tx().commit()
+        return ids
+    } catch (err) {
+        graph.tx().rollback()
+        throw(err)
+    }
+}
+
+
 def _delete_edge(eid) {
     /**
      * Deletes an edge
@@ -91,16 +161,35 @@ def _get_edges_between(out_v, in_v, elabel, page_num, per_page) {
     }
 }
 
-def _find_edge_by_value(value_type, elabel, field, val) {
+def _find_edge_by_value(elabel, field, compare, values, order_key, descending, limit) {
+    /**
+     * Finds the edges of a label whose property matches a predicate,
+     * without lambdas so the graph can answer from its indexes
+     *
+     * :param compare: eq, gte, lt, between or within
+     * :param values: the arguments of the predicate
+     * :param order_key: the property to sort by, if any
+     * :param limit: the maximum number of edges, if any
+     */
     graph.tx().rollback()
     try {
-       if (value_type) {
-           return g.E().hasLabel(elabel).filter{it.get().value(field) == val}
-       } else {
-           return g.E().hasLabel(elabel).has(field, val)
-       }
+        def elements = g.E().hasLabel(elabel)
+        if (compare == 'within') {
+            elements = elements.has(field, within(values))
+        } else if (compare == 'between') {
+            elements = elements.has(field, between(values[0], values[1]))
+        } else {
+            elements = elements.has(field, new P(Compare.valueOf(compare), values[0]))
+        }
+        if (order_key != null) {
+            elements = elements.order().by(order_key, descending ? decr : incr)
+        }
+        if (limit != null) {
+            elements = elements.limit(limit)
+        }
+        return elements
     } catch (err) {
         graph.tx().rollback()
-        raise(err)
+        throw(err)
     }
 }
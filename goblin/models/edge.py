@@ -1,12 +1,16 @@
 import logging
 
 
-from goblin import connection
-from goblin.constants import EDGE_TRAVERSAL
+from goblin import connection, identity, session
+from goblin.constants import (BULK_CREATE_BATCH_SIZE,
+                              BULK_CREATE_CONCURRENCY, EDGE_TRAVERSAL, EQUAL)
 from goblin._compat import (
-    array_types, integer_types, float_types, string_types, add_metaclass)
+    array_types, integer_types, string_types, add_metaclass)
+from goblin.coroutines import Return, run
+from goblin.mixins import AsyncEdgeMixin
 from goblin.exceptions import (
-    ElementDefinitionException, GoblinQueryError, ValidationError)
+    ElementDefinitionException, GoblinException, GoblinQueryError,
+    ValidationError)
 from goblin.gremlin import GremlinMethod
 from .element import Element, ElementMetaClass, edge_types
 from .query import V
@@ -42,7 +46,7 @@ class EdgeMetaClass(ElementMetaClass):
 
 
 @add_metaclass(EdgeMetaClass)
-class Edge(Element):
+class Edge(AsyncEdgeMixin, Element):
     """Base class for all edges."""
 
     # __metaclass__ = EdgeMetaClass
@@ -56,10 +60,15 @@ class Edge(Element):
 
     gremlin_path = 'edge.groovy'
 
-    _save_edge = GremlinMethod()
+    # traversal step loading elements by id
+    _source = EDGE_TRAVERSAL
+
+    _save_edge = GremlinMethod(defaults={'id_only': False})
+    _bulk_create_edges = GremlinMethod(classmethod=True)
     _delete_edge = GremlinMethod()
-    _get_edges_between = GremlinMethod(classmethod=True)
-    _find_edge_by_value = GremlinMethod(classmethod=True)
+    _get_edges_between = GremlinMethod(classmethod=True, write=False)
+    _find_edge_by_value = GremlinMethod(classmethod=True, write=False)
+    _find_method = '_find_edge_by_value'
 
     FACTORY_CLASS = None
     # edge id
@@ -103,7 +112,8 @@ class Edge(Element):
         return self
 
     @classmethod
-    def find_by_value(cls, field, value, as_dict=False, **kwargs):
+    def find_by_value(cls, field, value, as_dict=False, limit=None,
+                      order_by=None, **kwargs):
         """
         Returns edges that match the given field/value pair.
 
@@ -113,48 +123,104 @@ class Edge(Element):
         :type value: str
         :param as_dict: Return results as a dictionary
         :type as_dict: boolean
+        :param limit: The maximum number of edges returned
+        :type limit: int
+        :param order_by: The field to sort by, prefixed with ``-`` for
+            descending order
+        :type order_by: str
         :rtype: [goblin.models.Edge]
         """
-        _field = cls.get_property_by_name(field)
-        _label = cls.get_label()
+        return cls._find(EQUAL, field, [value], as_dict=as_dict, limit=limit,
+                         order_by=order_by, **kwargs)
+
+    @classmethod
+    def _find_by_value(cls, *args, **kwargs):
+        stream = yield super(Edge, cls)._find_by_value(*args, **kwargs)
+        # no edges found is an empty list
+        stream.add_handler(lambda data: [] if data is None else data)
+        raise Return(stream)
 
-        value_type = False
-        if isinstance(value, integer_types + float_types):
-            value_type = True
+    @classmethod
+    def bulk_create(cls, rows, batch_size=BULK_CREATE_BATCH_SIZE,
+                    concurrency=BULK_CREATE_CONCURRENCY, **kwargs):
+        """
+        Create many edges of this type with few queries. The edges are
+        validated first, then sent ``batch_size`` at a time: the vertices of
+        a batch are looked up together and its edges created in a single
+        transaction, with up to ``concurrency`` batches in flight. Exclusive
+        edges reuse the edge already between their vertices, or created
+        earlier in the batch. If a batch fails, it is rolled back and its
+        error raised; the batches committed before it stay in the graph.
+
+        :param rows: ``(outV, inV)`` or ``(outV, inV, properties)`` tuples,
+            where the vertices are saved vertices or their ids, or unsaved
+            instances of this class
+        :type rows: list
+        :param batch_size: The number of edges created per query
+        :type batch_size: int
+        :param concurrency: The maximum number of queries in flight
+        :type concurrency: int
+        :returns: Future - list of the ids of the edges, in order
 
+        """
+        edges = cls._bulk_prepare(rows)
         future = connection.get_future(kwargs)
-        future_results = cls._find_edge_by_value(
-            value_type=value_type,
-            elabel=_label,
-            field=_field,
-            val=value
-        )
-
-        def by_value_handler(data):
-            if data is None:
-                data = []
-            if as_dict:  # pragma: no cover
-                data = {v._id: v for v in data}
-            return data
+        return run(cls._bulk_create(edges, batch_size=batch_size,
+                                    concurrency=concurrency, **kwargs),
+                   future)
 
-        def on_find_by_value(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
+    @classmethod
+    def _bulk_prepare(cls, rows):
+        """ Build and validate the edges of :meth:`bulk_create` """
+        if cls.__abstract__:
+            raise GoblinException('cant save abstract elements')
+        edges = []
+        for row in rows:
+            if isinstance(row, cls):
+                edge = row
+                if edge._id is not None:
+                    raise GoblinException("%r is already saved" % (edge, ))
+            elif isinstance(row, (tuple, list)) and len(row) in (2, 3):
+                values = row[2] if len(row) == 3 else {}
+                edge = cls(row[0], row[1], **values)
             else:
-                stream.add_handler(by_value_handler)
-                future.set_result(stream)
-
-        future_results.add_done_callback(on_find_by_value)
+                raise GoblinException(
+                    "bulk_create takes (outV, inV[, properties]) tuples or "
+                    "%s instances, not %r" % (cls.__name__, row))
+            for vertex in (edge._outV, edge._inV):
+                if getattr(vertex, '_id', vertex) is None:
+                    raise GoblinException(
+                        "%r is not saved" % (vertex, ))
+            edge.pre_save()
+            edges.append(edge)
+        return edges
 
-        return future
+    @classmethod
+    def _bulk_create(cls, edges, batch_size=BULK_CREATE_BATCH_SIZE,
+                     concurrency=BULK_CREATE_CONCURRENCY, **kwargs):
+        """ Operation behind :meth:`bulk_create` """
+        params = []
+        for edge in edges:
+            attrs, geo_attrs = edge.as_save_params()
+            params.append([getattr(edge._outV, '_id', edge._outV),
+                           getattr(edge._inV, '_id', edge._inV),
+                           attrs, geo_attrs])
+        ids = yield cls._bulk_submit('_bulk_create_edges', params,
+                                     batch_size, concurrency,
+                                     exclusive=cls.__exclusive__, **kwargs)
+        cls._bulk_saved(edges, ids)
+        raise Return(ids)
 
     @classmethod
     def all(cls, ids=None, as_dict=False, *args, **kwargs):
         return super(Edge, cls).all(
             EDGE_TRAVERSAL, ids=ids, as_dict=as_dict, *args, **kwargs)
 
+    @classmethod
+    def _all(cls, ids=None, as_dict=False, **kwargs):
+        return cls._all_from(EDGE_TRAVERSAL, ids=ids, as_dict=as_dict,
+                             **kwargs)
+
     @classmethod
     def get_label(cls):
         """
@@ -204,76 +270,76 @@ class Edge(Element):
     def save(self, *args, **kwargs):
         """
         Save this edge to the graph database.
+
+        :param id_only: Read back only the id of the saved edge and update
+            this instance in place, instead of the whole edge. Defaults to
+            the ``__id_only_saves__`` attribute of the model
+        :type id_only: bool
         """
         super(Edge, self).save()
         future = connection.get_future(kwargs)
+        return run(self._save(**kwargs), future)
+
+    def _save(self, **kwargs):
+        """ Operation saving the edge, see :py:mod:`goblin.coroutines` """
+        if self._is_unmodified():
+            raise Return(self)
+        unit_of_work = session.current()
+        if unit_of_work is not None:
+            result = yield unit_of_work.record_save(self)
+            raise Return(result)
         attrs, geo_attrs = self.as_save_params()
-        future_result = self._save_edge(self._outV,
-                                        self._inV,
-                                        self.get_label(),
-                                        attrs,
-                                        geo_attrs,
-                                        exclusive=self.__exclusive__,
-                                        **kwargs)
-
-        def on_read(f2):
-            try:
-                result = f2.result()[0]
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future.set_result(result)
-
-        def on_save(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
+        id_only = self._saves_id_only(kwargs.pop('id_only', None))
+        stream = yield self._gremlin_methods['_save_edge'].submit(
+            self,
+            self._outV,
+            self._inV,
+            self.get_label(),
+            attrs,
+            geo_attrs,
+            exclusive=self.__exclusive__,
+            id_only=id_only,
+            deserialize=not id_only,
+            **kwargs)
+        result = yield stream.read()
+        if id_only:
+            self._id = result.data[0]
+            self._mark_saved()
+            result = self
+        else:
+            result = result[0]
+            self._id = result._id
+            self._mark_saved(result)
+        element_cache = connection.get_cache()
+        if element_cache is not None:
+            if self.__exclusive__:
+                # saving an exclusive edge drops the other ones
+                element_cache.invalidate_source(EDGE_TRAVERSAL)
             else:
-                future_read = stream.read()
-                future_read.add_done_callback(on_read)
-
-        future_result.add_done_callback(on_save)
-
-        return future
+                element_cache.invalidate(EDGE_TRAVERSAL, self._id)
+        identity_map = identity.current()
+        if identity_map is not None:
+            result = identity_map.add(self)
+        raise Return(result)
 
     def _reload_values(self, *args, **kwargs):
-        """ Re-read the values for this edge from the graph database. """
+        """ Operation re-reading the values for this edge from the graph
+        database. """
+        query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+        query_kwargs.pop('future_class', None)
+        stream = yield connection.submit('g.E(eid)', {'eid': self._id},
+                                         **query_kwargs)
+        result = yield stream.read()
+        result = result.data[0]
         reloaded_values = {}
-        future = connection.get_future(kwargs)
-        future_result = connection.execute_query(
-            'g.E(eid)', {'eid': self._id}, **kwargs)
-
-        def on_read(f2):
-            try:
-                result = f2.result()
-                result = result.data[0]
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                if result:
-                    # del result['type']
-                    reloaded_values['id'] = result['id']
-                    for name, value in result.get('properties', {}).items():
-                        reloaded_values[name] = value
-                    if result['id']:
-                        setattr(self, 'id', result['id'])
-                    future.set_result(reloaded_values)
-                else:
-                    future.set_result({})
-
-        def on_reload(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future_read = stream.read()
-                future_read.add_done_callback(on_read)
-
-        future_result.add_done_callback(on_reload)
-
-        return future
+        if result:
+            # del result['type']
+            reloaded_values['id'] = result['id']
+            for name, value in result.get('properties', {}).items():
+                reloaded_values[name] = value
+            if result['id']:
+                setattr(self, 'id', result['id'])
+        raise Return(reloaded_values)
 
     @classmethod
     def create(cls, outV, inV, label=None, *args, **kwargs):
@@ -296,32 +362,32 @@ class Edge(Element):
         """
         if self.__abstract__:  # pragma: no cover
             raise GoblinQueryError('cant delete abstract elements')
-        if self._id is None:
+        if self._id is None and session.current() is None:
             return self
-
         future = connection.get_future(kwargs)
-        future_result = self._delete_edge()
-
-        def on_read(f2):
-            try:
-                result = f2.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future.set_result(result)
+        return run(self._delete(**kwargs), future)
 
-        def on_delete(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future_read = stream.read()
-                future_read.add_done_callback(on_read)
-
-        future_result.add_done_callback(on_delete)
-
-        return future
+    def _delete(self, **kwargs):
+        """ Operation deleting the edge, see :py:mod:`goblin.coroutines` """
+        if self.__abstract__:  # pragma: no cover
+            raise GoblinQueryError('cant delete abstract elements')
+        unit_of_work = session.current()
+        if unit_of_work is not None:
+            # elements saved in the session are deleted once created
+            result = yield unit_of_work.record_delete(self)
+            raise Return(result)
+        if self._id is None:
+            raise Return(self)
+        stream = yield self._gremlin_methods['_delete_edge'].submit(
+            self, **kwargs)
+        result = yield stream.read()
+        element_cache = connection.get_cache()
+        if element_cache is not None:
+            element_cache.invalidate(EDGE_TRAVERSAL, self._id)
+        identity_map = identity.current()
+        if identity_map is not None:
+            identity_map.discard(self)
+        raise Return(result)
 
     def _simple_traversal(self, operation, *args, **kwargs):
         """
@@ -333,18 +399,42 @@ class Edge(Element):
         :rtype: list
 
         """
+        future = connection.get_future(kwargs)
+        return run(self._traverse(operation, **kwargs), future)
+
+    def _traverse(self, operation, **kwargs):
+        """ Operation behind :meth:`_simple_traversal` """
         deserialize = kwargs.pop('deserialize', True)
+        query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+        query_kwargs.pop('future_class', None)
 
         def edge_traversal_handler(data):
             if deserialize:
                 data = [Element.deserialize(d) for d in data]
             return data
 
-        future_results = connection.execute_query(
+        stream = yield connection.submit(
             'g.E(id).%s()' % operation, {'id': self.id},
-            handler=edge_traversal_handler, **kwargs)
+            handler=edge_traversal_handler, **query_kwargs)
+        raise Return(stream)
+
+    def _vertex(self, operation, **kwargs):
+        """
+        Operation returning the vertex this edge goes into or comes out of,
+        loading it if only its id is known.
 
-        return future_results
+        :param operation: ``inV`` or ``outV``
+        :type operation: str
+        """
+        attr = '_inV' if operation == 'inV' else '_outV'
+        vertex = getattr(self, attr)
+        if vertex is None:
+            stream = yield self._traverse(operation, **kwargs)
+            vertex = (yield stream.read())[0]
+        elif isinstance(vertex, string_types + integer_types):
+            vertex = yield V(vertex)._get_element(**kwargs)
+        setattr(self, attr, vertex)
+        raise Return(vertex)
 
     def inV(self, *args, **kwargs):
         """
@@ -353,97 +443,15 @@ class Edge(Element):
         :rtype: Vertex
 
         """
-        from goblin.models.vertex import Vertex
         future = connection.get_future(kwargs)
-        if self._inV is None:
-            future_results = self._simple_traversal('inV', **kwargs)
-
-            def on_traversal(f):
-                try:
-                    result = f.result()
-                except Exception as e:
-                    future.set_exception(e)
-                else:
-                    self._inV = result[0]
-                    if isinstance(self._inV, string_types + integer_types):
-                        future_results = V(self._inV).get(**kwargs)
-
-                        def on_get(f2):
-                            try:
-                                result = f2.result()
-                            except Exception as e:
-                                future.set_exception(e)
-                            else:
-                                self._inV = result
-
-                        future_results.add_done_callback(on_get)
-                    future.set_result(self._inV)
-                future_results.add_done_callback(on_traversal)
-
-        elif isinstance(self._inV, string_types + integer_types):
-            future_results = V(self._inV).get(**kwargs)
-
-            def on_get(f2):
-                try:
-                    result = f2.result()
-                except Exception as e:
-                    future.set_exception(e)
-                else:
-                    self._inV = result
-                    future.set_result(self._inV)
-
-            future_results.add_done_callback(on_get)
-        else:
-            future.set_result(self._inV)
-        return future
+        return run(self._vertex('inV', **kwargs), future)
 
     def outV(self, *args, **kwargs):
         """
-        Return the vertex that this edge goes into.
+        Return the vertex that this edge comes out of.
 
         :rtype: Vertex
 
         """
-        from goblin.models.vertex import Vertex
         future = connection.get_future(kwargs)
-        if self._inV is None:
-            future_results = self._simple_traversal('outV', **kwargs)
-
-            def on_traversal(f):
-                try:
-                    result = f.result()
-                except Exception as e:
-                    future.set_exception(e)
-                else:
-                    self._outV = result[0]
-                    if isinstance(self._outV, string_types + integer_types):
-                        future_results = V(self._outV).get(**kwargs)
-
-                        def on_get(f2):
-                            try:
-                                result = f2.result()
-                            except Exception as e:
-                                future.set_exception(e)
-                            else:
-                                self._outV = result
-
-                        future_results.add_done_callback(on_get)
-                    future.set_result(self._outV)
-                future_results.add_done_callback(on_traversal)
-
-        elif isinstance(self._outV, string_types + integer_types):
-            future_results = V(self._outV).get(**kwargs)
-
-            def on_get(f2):
-                try:
-                    result = f2.result()
-                except Exception as e:
-                    future.set_exception(e)
-                else:
-                    self._outV = result
-                    future.set_result(self._outV)
-
-            future_results.add_done_callback(on_get)
-        else:
-            future.set_result(self._outV)
-        return future
+        return run(self._vertex('outV', **kwargs), future)
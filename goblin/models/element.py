@@ -5,7 +5,16 @@ import warnings
 import inflection
 from collections import OrderedDict
 
-from goblin import connection
+from goblin import connection, identity
+from goblin.batching import id_key
+from goblin.cache import MISSING
+from goblin.coalescing import SharedResponse
+from goblin.constants import (BETWEEN, DELETE_CHUNK_SIZE, EDGE_TRAVERSAL,
+                              GREATER_THAN_EQUAL, LESS_THAN,
+                              RESULT_ITERATION_BATCH_SIZE, VERTEX_TRAVERSAL,
+                              WITHIN)
+from goblin.coroutines import Return, gather, run
+from goblin.mixins import AsyncElementMixin
 from goblin._compat import string_types, print_, add_metaclass
 from goblin.tools import import_string
 from goblin import properties
@@ -15,6 +24,7 @@ from goblin.exceptions import (
 from goblin.gremlin import BaseGremlinMethod
 from goblin.properties.base import BaseValueManager
 from goblin.properties.properties import Point, Circle, Box
+from goblin.streaming import ResultStream
 
 
 logger = logging.getLogger(__name__)
@@ -24,6 +34,46 @@ vertex_types = {}
 edge_types = {}
 
 
+def drop_in_chunks(script, bindings, chunk_size=DELETE_CHUNK_SIZE,
+                   sources=(VERTEX_TRAVERSAL, EDGE_TRAVERSAL), **kwargs):
+    """
+    Operation removing the elements returned by the traversal ``script``,
+    ``chunk_size`` per request, so every chunk is committed on its own.
+    Returns the number of elements removed.
+
+    :param tuple sources: The element types (``V``, ``E``) the traversal
+        may remove, to invalidate in the element cache
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+    query_kwargs.pop('future_class', None)
+    bindings = dict(bindings, chunk_size=chunk_size)
+    script = '%s.dedup().limit(chunk_size).sideEffect(drop()).count()' % (
+        script, )
+    removed = 0
+    try:
+        while True:
+            stream = yield connection.submit(script, bindings=bindings,
+                                             write=True, **query_kwargs)
+            count = 0
+            while True:
+                message = yield stream.read()
+                if message is None:
+                    break
+                count += sum(message.data or [])
+            removed += count
+            if count < chunk_size:
+                break
+    finally:
+        element_cache = connection.get_cache()
+        if element_cache is not None:
+            # the ids of the removed elements are not known
+            for source in sources:
+                element_cache.invalidate_source(source)
+    raise Return(removed)
+
+
 class BaseElement(object):
     """
     The base model class, don't inherit from this, inherit from Model, defined
@@ -31,6 +81,12 @@ class BaseElement(object):
     """
     # __enum_id_only__ = True
     FACTORY_CLASS = None
+    # save only the modified properties, None for the connection default
+    __partial_saves__ = None
+    # saves read back the id of the element only, not the whole element
+    __id_only_saves__ = False
+    # gremlin method finding the elements by property value
+    _find_method = None
 
     class DoesNotExist(GoblinException):
         """
@@ -179,12 +235,15 @@ class BaseElement(object):
         values = {}
         geo_values = {}
         was_saved = self._id is not None
+        partial = was_saved and self._saves_partially()
         for name, prop in self._properties.items():
             # Determine the save strategy for this column
             prop_strategy = prop.get_save_strategy()
 
             # Enforce the save strategy
             vm = self._values[name]
+            if partial and not vm.modified:
+                continue
             should_save = prop_strategy.condition(
                 previous_value=vm.previous_value, value=vm.value,
                 has_changed=vm.changed, first_save=was_saved,
@@ -210,6 +269,8 @@ class BaseElement(object):
             if prop is None:
                 # Remove this property entirely
                 values[name] = None
+            elif partial and not prop.modified:
+                continue
             else:
                 # Determine the save strategy
                 prop_strategy = prop.strategy
@@ -222,6 +283,56 @@ class BaseElement(object):
 
         return values, geo_values
 
+    @classmethod
+    def _saves_partially(cls):
+        """
+        Whether saving an element of this model only sends its modified
+        properties, see :func:`goblin.connection.setup`
+        """
+        if cls.__partial_saves__ is None:
+            return connection.get_partial_saves()
+        return cls.__partial_saves__
+
+    @classmethod
+    def _saves_id_only(cls, id_only=None):
+        """
+        Whether a save reads back the id of the element only and updates
+        the instance in place, instead of deserializing the saved element
+        """
+        if id_only is None:
+            return cls.__id_only_saves__
+        return id_only
+
+    def _is_unmodified(self):
+        """
+        Whether saving the element can be skipped: it was saved before and
+        none of its values were modified since, in partial save mode.
+        """
+        if self._id is None or not self._saves_partially():
+            return False
+        return not any(
+            vm is None or vm.modified for vm in
+            list(self._values.values()) + list(self._manual_values.values()))
+
+    def _mark_saved(self, saved=None):
+        """
+        Record the values of the element as the saved ones.
+
+        :param saved: The element returned by the graph, whose values are
+            recorded instead of the current ones (optional)
+        """
+        for name, vm in self._values.items():
+            if saved is not None:
+                vm.previous_value = saved._values[name].previous_value
+            else:
+                vm.previous_value = vm.value
+        for name, vm in list(self._manual_values.items()):
+            if vm is None:
+                # the property was removed
+                del self._manual_values[name]
+            else:
+                vm.previous_value = vm.value
+
     @classmethod
     def translate_db_fields(cls, data):
         """
@@ -261,38 +372,57 @@ class BaseElement(object):
         """
         if id is None:
             raise cls.DoesNotExist
-
-        future_results = cls.all([id], **kwargs)
         future = connection.get_future(kwargs)
+        return run(cls._get(id, **kwargs), future)
 
-        def on_read(f2):
-            try:
-                result = f2.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                result = result[0]
-                if not isinstance(result, cls):
-                    e = cls.WrongElementType(
-                        '%s is not an instance or subclass of %s' % (
-                            result.__class__.__name__, cls.__name__)
-                    )
-                    future.set_exception(e)
-                else:
-                    future.set_result(result)
-
-        def on_get(f):
+    @classmethod
+    def _get(cls, id, **kwargs):
+        if id is None:
+            raise cls.DoesNotExist
+        identity_map = identity.current()
+        if identity_map is not None:
+            result = identity_map.get(cls._source, id)
+            if isinstance(result, cls):
+                raise Return(result)
+        label = cls.get_label()
+        element_cache = connection.get_cache(kwargs)
+        result = None
+        if element_cache is not None:
+            result = element_cache.get(cls._source, id, label)
+            if result is MISSING:
+                raise cls.DoesNotExist
+        if result is None:
             try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future_read = stream.read()
-                future_read.add_done_callback(on_read)
-
-        future_results.add_done_callback(on_get)
+                result = yield cls._load(id, label, **kwargs)
+            except cls.DoesNotExist:
+                if element_cache is not None:
+                    element_cache.put_missing(cls._source, id, label)
+                raise
+            if element_cache is not None:
+                element_cache.put(cls._source, result)
+        # deserializing rewrites the properties of the result
+        result = Element.deserialize(dict(result))
+        if not isinstance(result, cls):
+            raise cls.WrongElementType(
+                '%s is not an instance or subclass of %s' % (
+                    result.__class__.__name__, cls.__name__))
+        raise Return(result)
 
-        return future
+    @classmethod
+    def _load(cls, id, label, **kwargs):
+        """ Operation loading the raw element with ``id`` from the graph """
+        loader = connection.get_loader(kwargs)
+        if loader is not None:
+            result = yield loader.load(cls._source, id, label,
+                                       future_class=kwargs.get('future_class'))
+            if result is None:
+                raise cls.DoesNotExist
+        else:
+            kwargs.update(deserialize=False, cache=False)
+            stream = yield cls._all_from(cls._source, [id], **kwargs)
+            result = yield stream.read()
+            result = result[0]
+        raise Return(result)
 
     @classmethod
     def all(cls, source, ids=None, as_dict=False, **kwargs):
@@ -306,23 +436,56 @@ class BaseElement(object):
         :type ids: list
         :param as_dict: Toggle whether to return a dictionary or list
         :type as_dict: boolean
+        :param cache: Read the elements from the element cache, if one is
+            set up. See :py:mod:`goblin.cache`
+        :type cache: boolean
         :rtype: dict | list
 
         """
+        future = connection.get_future(kwargs)
+        return run(cls._all_from(source, ids=ids, as_dict=as_dict, **kwargs),
+                   future)
 
+    @classmethod
+    def stream_all(cls, ids=None, deserialize=True, **kwargs):
+        """
+        Like :meth:`all`, but reads the elements one server batch at a time
+
+        :param ids: A list of titan ids
+        :type ids: list
+        :rtype: goblin.streaming.ResultStream
+
+        """
+        return ResultStream(cls._all(ids=ids, deserialize=False, **kwargs),
+                            deserialize=deserialize,
+                            future_class=kwargs.get('future_class'))
+
+    @classmethod
+    def _all_from(cls, source, ids=None, as_dict=False, **kwargs):
         if ids is None:
             ids = []
 
         deserialize = kwargs.pop('deserialize', True)
+        use_cache = kwargs.pop('cache', True)
+        query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+        future_class = query_kwargs.pop('future_class', None)
+        element_cache = None
+        if use_cache:
+            element_cache = connection.get_cache(query_kwargs)
         handlers = []
-        future = connection.get_future(kwargs)
 
         if ids:
+            # results arrive in batches of at most resultIterationBatchSize,
+            # so a batch only proves elements missing once it is short
+            seen = [0]
 
             def id_handler(results):
                 if not results:
                     raise cls.DoesNotExist
-                if len(results) != len(ids):
+                remaining = len(ids) - seen[0]
+                seen[0] += len(results)
+                if (seen[0] > len(ids) or len(results) < min(
+                        remaining, RESULT_ITERATION_BATCH_SIZE)):
                     raise GoblinQueryError(
                         "the number of results don't match the number of " +
                         "ids requested")
@@ -342,22 +505,205 @@ class BaseElement(object):
 
         handlers.append(result_handler)
 
-        def on_all(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                [stream.add_handler(h) for h in handlers]
-                future.set_result(stream)
+        if ids and element_cache is not None:
+            stream = yield cls._all_cached(source, ids, element_cache,
+                                           future_class)
+        else:
+            stream = yield connection.submit(
+                'g.%s(*eids).hasLabel(x)' % source,
+                bindings={'eids': ids, "x": cls.get_label()}, **query_kwargs)
+        for handler in handlers:
+            stream.add_handler(handler)
+        raise Return(stream)
+
+    @classmethod
+    def _all_cached(cls, source, ids, element_cache, future_class=None):
+        """
+        Operation reading the elements with ``ids`` from ``element_cache``,
+        loading the ones it misses. Returns a stream of the raw elements.
+        """
+        label = cls.get_label()
+        found = {}
+        missing = []
+        for id in ids:
+            result = element_cache.get(source, id, label)
+            if result is None:
+                missing.append(id)
+            elif result is not MISSING:
+                found[id_key(id)] = result
+        if missing:
+            stream = yield connection.submit(
+                'g.%s(*eids).hasLabel(x)' % source,
+                bindings={'eids': missing, 'x': label})
+            while True:
+                message = yield stream.read()
+                if message is None:
+                    break
+                for result in message.data or []:
+                    element_cache.put(source, result)
+                    found[id_key(result['id'])] = result
+            for id in missing:
+                if id_key(id) not in found:
+                    element_cache.put_missing(source, id, label)
+        if future_class is None:
+            future_class = connection.get_future({}).__class__
+        results = [found[id_key(id)] for id in ids if id_key(id) in found]
+        raise Return(SharedResponse.replay(results, future_class).stream())
+
+    @classmethod
+    def _bulk_submit(cls, method_name, params, batch_size, concurrency,
+                     **kwargs):
+        """
+        Operation calling the bulk gremlin method ``method_name`` with the
+        label of this class and ``params`` split in batches of
+        ``batch_size``, with up to ``concurrency`` calls in flight. Returns
+        the results of the batches, concatenated.
+        """
+        if batch_size < 1 or concurrency < 1:
+            raise ValueError("batch_size and concurrency must be positive")
+        method = cls._gremlin_methods[method_name]
+        label = cls.get_label()
+
+        def submit_batch(batch):
+            stream = yield method.submit(cls, label, batch,
+                                         deserialize=False, **kwargs)
+            results = []
+            while True:
+                message = yield stream.read()
+                if message is None:
+                    break
+                results.extend(message.data or [])
+            raise Return(results)
+
+        batches = yield gather(
+            (submit_batch(params[i:i + batch_size])
+             for i in range(0, len(params), batch_size)),
+            lambda: connection.get_future(kwargs), limit=concurrency)
+        raise Return([result for batch in batches for result in batch])
+
+    @classmethod
+    def _bulk_saved(cls, elements, ids):
+        """ Update ``elements`` once saved in bulk with ``ids`` """
+        element_cache = connection.get_cache()
+        identity_map = identity.current()
+        for element, id in zip(elements, ids):
+            element._id = id
+            element._mark_saved()
+            if element_cache is not None:
+                element_cache.invalidate(cls._source, id)
+            if identity_map is not None:
+                identity_map.add(element)
+
+    @classmethod
+    def delete_where(cls, chunk_size=DELETE_CHUNK_SIZE, **filters):
+        """
+        Delete the elements of this type whose properties have the given
+        values, or all of them without filters, on the server. The elements
+        are removed ``chunk_size`` per transaction.
+
+        :param chunk_size: The number of elements removed per transaction
+        :type chunk_size: int
+        :returns: Future - the number of elements removed
 
-        future_results = connection.execute_query(
-            'g.%s(*eids).hasLabel(x)' % source,
-            bindings={'eids': ids, "x": cls.get_label()}, **kwargs)
+        """
+        query_kwargs = connection.pop_execute_query_kwargs(filters)
+        future = connection.get_future(query_kwargs)
+        return run(cls._delete_where(chunk_size, filters, **query_kwargs),
+                   future)
 
-        future_results.add_done_callback(on_all)
+    @classmethod
+    def _delete_where(cls, chunk_size, filters, **kwargs):
+        """ Operation behind :meth:`delete_where` """
+        steps = ['hasLabel(x)']
+        bindings = {'x': cls.get_label()}
+        for i, name in enumerate(sorted(filters)):
+            prop = cls._properties.get(name)
+            if prop is None:
+                raise GoblinQueryError(
+                    "%s has no property %s" % (cls.__name__, name))
+            bindings['k%d' % i] = prop.db_field_name or name
+            bindings['v%d' % i] = prop.to_database(filters[name])
+            steps.append('has(k%d, v%d)' % (i, i))
+        script = 'g.%s().%s' % (cls._source, '.'.join(steps))
+        # removing vertices removes their edges
+        sources = (cls._source, EDGE_TRAVERSAL)
+        removed = yield drop_in_chunks(script, bindings, chunk_size,
+                                       sources=sources, **kwargs)
+        raise Return(removed)
 
-        return future
+    @classmethod
+    def find_by_range(cls, field, lo=None, hi=None, as_dict=False,
+                      limit=None, order_by=None, **kwargs):
+        """
+        Returns the elements of this type whose ``field`` is at least ``lo``
+        and less than ``hi``. Either bound may be left out.
+
+        :param field: The field to search
+        :type field: str
+        :param limit: The maximum number of elements returned
+        :type limit: int
+        :param order_by: The field to sort by, prefixed with ``-`` for
+            descending order
+        :type order_by: str
+        :returns: Future - the response stream
+        """
+        if lo is None and hi is None:
+            raise ValueError("find_by_range needs lo, hi or both")
+        if hi is None:
+            compare, values = GREATER_THAN_EQUAL, [lo]
+        elif lo is None:
+            compare, values = LESS_THAN, [hi]
+        else:
+            compare, values = BETWEEN, [lo, hi]
+        return cls._find(compare, field, values, as_dict=as_dict,
+                         limit=limit, order_by=order_by, **kwargs)
+
+    @classmethod
+    def find_in(cls, field, values, as_dict=False, limit=None,
+                order_by=None, **kwargs):
+        """
+        Returns the elements of this type whose ``field`` has one of
+        ``values``. See :meth:`find_by_range` for the other parameters.
+
+        :returns: Future - the response stream
+        """
+        return cls._find(WITHIN, field, list(values), as_dict=as_dict,
+                         limit=limit, order_by=order_by, **kwargs)
+
+    @classmethod
+    def _find(cls, compare, field, values, **kwargs):
+        future = connection.get_future(kwargs)
+        return run(cls._find_by_value(compare, field, values, **kwargs),
+                   future)
+
+    @classmethod
+    def _find_by_value(cls, compare, field, values, as_dict=False,
+                       limit=None, order_by=None, **kwargs):
+        """
+        Operation sending the lookup of the elements whose ``field``
+        matches the predicate ``compare`` of ``values``, returning the
+        response stream. The lookup has no lambda, so the graph can answer
+        it from its indexes.
+        """
+        prop = cls._properties.get(field)
+        if prop is not None:
+            values = [prop.to_database(value) for value in values]
+        order_key = None
+        descending = False
+        if order_by is not None:
+            descending = order_by.startswith('-')
+            order_key = cls.get_property_by_name(order_by.lstrip('-'))
+
+        def by_value_handler(data):
+            if as_dict:  # pragma: no cover
+                data = {v._id: v for v in data or []}
+            return data
+
+        stream = yield cls._gremlin_methods[cls._find_method].submit(
+            cls, cls.get_label(), cls.get_property_by_name(field), compare,
+            values, order_key, descending, limit, **kwargs)
+        stream.add_handler(by_value_handler)
+        raise Return(stream)
 
     @classmethod
     def create(cls, *args, **kwargs):
@@ -401,6 +747,7 @@ class BaseElement(object):
                     raise ModelException("Cannot manually add property that "
                                          "already exists")
                 self._manual_values[k] = BaseValueManager(None, v)
+                self._manual_values[k].previous_value = None
 
         self.pre_update(**values)
 
@@ -409,9 +756,9 @@ class BaseElement(object):
 
         return self.save()
 
-    def _reload_values(self):
+    def _reload_values(self, **kwargs):
         """
-        Base method for reloading an element from the database.
+        Base operation reloading an element's values from the database.
 
         """
         raise NotImplementedError
@@ -422,24 +769,18 @@ class BaseElement(object):
 
         """
         future = connection.get_future(kwargs)
-        future_values = self._reload_values(**kwargs)
-
-        def on_reload(f):
-            try:
-                values = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                for name, prop in self._properties.items():
-                    value = values.get(prop.db_field_name, None)
-                    if value is not None:
-                        value = prop.to_python(value)
-                    setattr(self, name, value)
-                future.set_result(self)
-
-        future_values.add_done_callback(on_reload)
+        return run(self._reload(**kwargs), future)
 
-        return future
+    def _reload(self, **kwargs):
+        values = yield self._reload_values(**kwargs)
+        for name, prop in self._properties.items():
+            value = values.get(prop.db_field_name, None)
+            if value is not None:
+                value = prop.to_python(value)
+            setattr(self, name, value)
+            # the reloaded values are the saved ones
+            self._values[name].previous_value = self._values[name].value
+        raise Return(self)
 
     @classmethod
     def get_property_by_name(cls, key):
@@ -496,6 +837,7 @@ class BaseElement(object):
                 # manual entry doesn't exist, create
                 from goblin.properties.base import BaseValueManager
                 self._manual_values[key] = BaseValueManager(None, value)
+                self._manual_values[key].previous_value = None
 
     def __delitem__(self, key):
         prop = self._properties.get(key, None)
@@ -663,10 +1005,15 @@ class ElementMetaClass(type):
         def wrap_method(method):
             def method_wrapper(self, *args, **kwargs):
                 return method(self, *args, **kwargs)
+            method_wrapper.gremlin_method = method
             return method_wrapper
 
         for k, v in body.items():
-            if isinstance(v, BaseGremlinMethod):
+            # add_metaclass rebuilds the class from the already wrapped body
+            wrapped = getattr(v, '__func__', getattr(v, 'fget', v))
+            if hasattr(wrapped, 'gremlin_method'):
+                gremlin_methods[k] = wrapped.gremlin_method
+            elif isinstance(v, BaseGremlinMethod):
                 gremlin_methods[k] = v
                 method = wrap_method(v)
                 body[k] = method
@@ -689,13 +1036,24 @@ class ElementMetaClass(type):
 
 
 @add_metaclass(ElementMetaClass)
-class Element(BaseElement):
+class Element(AsyncElementMixin, BaseElement):
 
     # __metaclass__ = ElementMetaClass
 
     @classmethod
     def deserialize(cls, data):
         """ Deserializes rexpro response into vertex or edge objects """
+        identity_map = identity.current()
+        if identity_map is not None:
+            element = identity_map.get(identity.SOURCES.get(data.get('type')),
+                                       data.get('id'))
+            if element is not None:
+                return element
+            return identity_map.add(cls._deserialize(data))
+        return cls._deserialize(data)
+
+    @classmethod
+    def _deserialize(cls, data):
         dtype = data.get('type')
         data_id = data.get('id')
         properties = data.get('properties')
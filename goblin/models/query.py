@@ -3,9 +3,16 @@ import logging
 
 from goblin._compat import float_types, print_, integer_types, string_types
 from goblin import connection
+from goblin.bytecode import (Bytecode, Enum, P,
+                             results as bytecode_results)
+from goblin.cache import MISSING
+from goblin.coroutines import Return, run
+from goblin.mixins import AsyncQueryMixin
 from goblin.exceptions import GoblinQueryError
-from .element import Element
-from goblin.constants import (EQUAL, NOT_EQUAL, GREATER_THAN,
+from goblin.streaming import ResultStream
+from .element import Element, drop_in_chunks
+from goblin.constants import (DELETE_CHUNK_SIZE, VERTEX_TRAVERSAL, EQUAL,
+                              NOT_EQUAL, GREATER_THAN,
                               GREATER_THAN_EQUAL, LESS_THAN,
                               LESS_THAN_EQUAL, WITHIN, INSIDE,
                               OUTSIDE, BETWEEN)
@@ -15,26 +22,84 @@ from goblin.properties.base import GraphProperty
 logger = logging.getLogger(__name__)
 
 
-class V(object):
+class V(AsyncQueryMixin):
     """
     All query operations return a new query object, which currently deviates
     from blueprints. The blueprints query object modifies and returns the same
     object This method seems more flexible, and consistent w/ the rest of
     Gremlin.
+
+    Besides a single vertex, a query can start from several vertices with
+    :meth:`ids`, or from every vertex with a label with :meth:`label`.
     """
-    _limit = None
+    # the start step of the traversal
+    _source = 'V'
+    # the query returns elements, not property values
+    _elements = True
+    # ids of the start elements, None when starting from ``_vertex``
+    _ids = None
 
     def __init__(self, vertex):
         self._vertex = vertex
         self._steps = []
         self._bindings = {}
+        # the steps as bytecode instructions, see goblin.bytecode
+        self._instructions = []
+
+    @classmethod
+    def ids(cls, elements):
+        """
+        Start the query from several elements at once.
+
+        :param elements: The elements, or their ids
+        :type elements: list
+        :rtype: V
+        """
+        ids = [cls._element_id(element) for element in elements]
+        if not ids:
+            raise ValueError("At least one element is required")
+        q = cls(None)
+        q._ids = ids
+        return q
+
+    @classmethod
+    def label(cls, *labels):
+        """
+        Start the query from all the elements with one of ``labels``, so
+        that the ``has`` steps following it can use the graph indexes.
+
+        :param labels: The labels, or the models
+        :rtype: V
+        """
+        if not labels:
+            raise ValueError("At least one label is required")
+        q = cls(None)
+        q._ids = []
+        return q.has_label(*labels)
+
+    def __copy__(self):
+        q = self.__class__.__new__(self.__class__)
+        q.__dict__.update(self.__dict__)
+        q._steps = list(self._steps)
+        q._bindings = dict(self._bindings)
+        q._instructions = list(self._instructions)
+        return q
 
     def count(self, *args, **kwargs):
         """
-        :returns: number of matching vertices
+        Count the results of the query on the server.
+
+        :returns: Future - number of matching elements
         :rtype: int
         """
-        pass
+        future = connection.get_future(kwargs)
+        return run(self._count(**kwargs), future)
+
+    def _count(self, **kwargs):
+        """ Operation behind :meth:`count` """
+        stream = yield self._simple_step("count")._stream(False, **kwargs)
+        result = yield stream.read()
+        raise Return(result[0] if result else 0)
 
     def has(self, key, value, compare=EQUAL):
         """
@@ -51,12 +116,15 @@ class V(object):
             msg = "Use %s.get_property_by_name" % (self.__class__.__name__)
             logger.error(msg)
             raise GoblinQueryError(msg)
-        binding = self._get_binding(value)
+        binding = q._get_binding(value)
         if compare in [INSIDE, OUTSIDE, BETWEEN, WITHIN]:
             step = "has('{}', {}(*{}))".format(key, compare, binding)
+            predicate = P(compare, list(value))
         else:
             step = "has('{}', {}({}))".format(key, compare, binding)
+            predicate = P(compare, value)
         q._steps.append(step)
+        q._instructions.append(['has', key, predicate])
         return q
 
     def has_label(self, *labels):
@@ -122,13 +190,15 @@ class V(object):
         q = copy.copy(self)
         step = '{}()'.format(func)
         q._steps.append(step)
+        q._instructions.append([func])
         return q
 
     def _unpack_step(self, func, vals):
         q = copy.copy(self)
-        binding = self._get_binding(vals)
+        binding = q._get_binding(vals)
         step = '{}(*{})'.format(func, binding)
         q._steps.append(step)
+        q._instructions.append([func] + list(vals))
         return q
 
     def _get_binding(self, val):
@@ -137,68 +207,199 @@ class V(object):
         return binding
 
     def limit(self, limit):
-        pass
+        """
+        :param int limit: The maximum number of results
+        :rtype: V
+        """
+        return self._step_as("limit", limit)
 
-    def get(self, deserialize=True, *args, **kwargs):
+    def range(self, low, high):
+        """
+        :param int low: Index of the first result returned
+        :param int high: Index after the last result returned
+        :rtype: V
+        """
+        return self._step_as("range", low, high)
+
+    def order_by(self, key, desc=False):
+        """
+        Sort the results by the value of a property.
+
+        :param str key: The property key
+        :param bool desc: Sort in descending order
+        :rtype: V
+        """
+        order = 'decr' if desc else 'incr'
+        q = self._simple_step("order")
+        q._steps.append("by('{}', {})".format(key, order))
+        q._instructions.append(['by', key, Enum('Order', order)])
+        return q
+
+    def dedup(self):
+        """
+        Remove the duplicate results
 
-        if isinstance(self._vertex, string_types + integer_types):
-            vid = self._vertex
+        :rtype: V
+        """
+        return self._simple_step("dedup")
+
+    def values(self, *keys):
+        """
+        Return the values of the properties ``keys`` of the results, all
+        properties without ``keys``, instead of the results.
+
+        :rtype: V
+        """
+        q = self._unpack_step("values", keys)
+        q._elements = False
+        return q
+
+    def _step_as(self, func, *vals):
+        q = copy.copy(self)
+        bindings = [q._get_binding(val) for val in vals]
+        q._steps.append('{}({})'.format(func, ', '.join(bindings)))
+        q._instructions.append([func] + list(vals))
+        return q
+
+    def get(self, deserialize=True, *args, **kwargs):
+        future = connection.get_future(kwargs)
+        if self._gets_start():
+            operation = self._get_element(deserialize, **kwargs)
         else:
-            vid = self._vertex._id
-        self._bindings.update({"vid": vid})
+            operation = self._stream(deserialize, **kwargs)
+        return run(operation, future)
+
+    def _gets_start(self):
+        """ Whether the query returns its single start vertex itself """
+        return not self._steps and self._ids is None and self._source == 'V'
 
-        steps = self._get()
-        script = "g.V(vid){}".format(steps)
-        if steps:
-            future_results = self._get_stream(script, deserialize, **kwargs)
+    def drop(self, chunk_size=DELETE_CHUNK_SIZE, **kwargs):
+        """
+        Remove the elements the query returns on the server, ``chunk_size``
+        per transaction.
+
+        :returns: Future - the number of elements removed
+        """
+        future = connection.get_future(kwargs)
+        return run(self._drop(chunk_size, **kwargs), future)
+
+    def _drop(self, chunk_size=DELETE_CHUNK_SIZE, **kwargs):
+        """ Operation behind :meth:`drop` """
+        return drop_in_chunks(self._script(), self._bindings, chunk_size,
+                              **kwargs)
+
+    def stream(self, deserialize=True, **kwargs):
+        """
+        Like :meth:`get`, but reads the results one server batch at a time
+
+        :rtype: goblin.streaming.ResultStream
+        """
+        return ResultStream(self._stream(False, **kwargs),
+                            deserialize=deserialize,
+                            future_class=kwargs.get('future_class'))
+
+    @staticmethod
+    def _element_id(element):
+        if isinstance(element, string_types + integer_types):
+            return element
+        return element._id
+
+    def _vertex_id(self):
+        return self._element_id(self._vertex)
+
+    def _start_ids(self):
+        if self._ids is None:
+            return [self._vertex_id()]
+        return self._ids
+
+    def _script(self):
+        if self._ids is None:
+            self._bindings.update({"vid": self._vertex_id()})
+            start = "vid"
         else:
-            future_results = self._get_simple(deserialize, **kwargs)
+            self._bindings.update({"vids": self._ids})
+            start = "*vids"
+        return "g.{}({}){}".format(self._source, start, self._get())
 
-        return future_results
+    def bytecode(self):
+        """
+        The query as Gremlin bytecode
 
-    def _get_stream(self, script, deserialize, **kwargs):
+        :rtype: goblin.bytecode.Bytecode
+        """
+        return Bytecode([[self._source] + list(self._start_ids())] +
+                        self._instructions)
+
+    def _stream(self, deserialize=True, **kwargs):
+        """
+        Operation sending the query, returning the response stream. See
+        :py:mod:`goblin.coroutines`.
+        """
+        query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+        query_kwargs.pop('future_class', None)
+        bytecode = connection.get_bytecode()
 
         def process_results(results):
+            if bytecode:
+                results = bytecode_results(results)
             if not results:
                 results = []
-            if deserialize:
+            if deserialize and self._elements:
                 results = [Element.deserialize(r) for r in results]
             return results
 
-        future_results = connection.execute_query(
-            script, bindings=self._bindings, handler=process_results,
-            **kwargs)
-        return future_results
-
-    def _get_simple(self, deserialize, **kwargs):
-        script = "g.V(vid)"
-        future_results = self._get_stream(script, deserialize, **kwargs)
-        future = connection.get_future(kwargs)
-
-        def on_read(f):
-            try:
-                result = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                if not result:
-                    future.set_exception(GoblinQueryError("Does not exist"))
-                future.set_result(result[0])
-
-        def on_stream(f2):
-            try:
-                stream = f2.result()
-            except Exception as e:
-                future.set_exception(e)
+        if bytecode:
+            stream = yield connection.submit_bytecode(
+                self.bytecode(), handler=process_results, **query_kwargs)
+        else:
+            stream = yield connection.submit(
+                self._script(), bindings=self._bindings,
+                handler=process_results, **query_kwargs)
+        raise Return(stream)
+
+    def _get_element(self, deserialize=True, **kwargs):
+        """ Operation returning the start vertex itself """
+        vid = self._vertex_id()
+        element_cache = connection.get_cache(kwargs)
+        result = None
+        if deserialize and element_cache is not None:
+            result = element_cache.get(VERTEX_TRAVERSAL, vid)
+            if result is MISSING:
+                raise GoblinQueryError("Does not exist")
+        if result is None:
+            loader = connection.get_loader(kwargs)
+            if deserialize and loader is not None:
+                result = yield loader.load(
+                    VERTEX_TRAVERSAL, vid,
+                    future_class=kwargs.get('future_class'))
             else:
-                future_read = stream.read()
-                future_read.add_done_callback(on_read)
-
-        future_results.add_done_callback(on_stream)
-        return future
+                stream = yield V(self._vertex)._stream(False, **kwargs)
+                result = yield stream.read()
+                result = result[0] if result else None
+            if deserialize and element_cache is not None:
+                if result is None:
+                    element_cache.put_missing(VERTEX_TRAVERSAL, vid)
+                else:
+                    element_cache.put(VERTEX_TRAVERSAL, result)
+            if result is None:
+                raise GoblinQueryError("Does not exist")
+        if deserialize:
+            # deserializing rewrites the properties of the result
+            result = Element.deserialize(dict(result))
+        raise Return(result)
 
     def _get(self):
         output = ''
         if self._steps:
             output = '.{}'.format('.'.join(self._steps))
         return output
+
+
+class E(V):
+    """
+    Edge query, starting from edges instead of vertices. See :class:`V`.
+    """
+    _source = 'E'
+
+    def __init__(self, edge):
+        super(E, self).__init__(edge)
@@ -1,10 +1,12 @@
 
-def _save_vertex(vid, vlabel, attrs, geo_attrs) {
+def _save_vertex(vid, vlabel, attrs, geo_attrs, id_only) {
     /**
      * Saves a vertex
      *
      * :param id: vertex id, if null, a new vertex is created
      * :param attrs: map of parameters to set on the vertex
+     * :param id_only: if true, return the id of the vertex instead of
+     *   reading it again
      */
     graph.tx().rollback()
     try {
@@ -36,6 +38,9 @@ def _save_vertex(vid, vlabel, attrs, geo_attrs) {
             }
         }
         graph.tx().commit()
+        if (id_only) {
+            return v.id()
+        }
         return g.V(v.id()).next()
     } catch (err) {
         graph.tx().rollback()
@@ -43,6 +48,195 @@ def _save_vertex(vid, vlabel, attrs, geo_attrs) {
     }
 }
 
+def _bulk_create_vertices(vlabel, vertices) {
+    /**
+     * Creates vertices in one transaction
+     *
+     * :param vlabel: label of the vertices
+     * :param vertices: list of [attrs, geo_attrs] pairs, one per vertex
+     * :returns: the ids of the new vertices, in order
+     */
+    graph.tx().rollback()
+    try {
+        def ids = []
+        for (params in vertices) {
+            def v = graph.addVertex(label, vlabel)
+
+            for (item in params[1].entrySet()) {
+                if (item.value == null) {
+                    continue
+                } else if (item.value[0] == 'point') {
+                    v.property(item.key, Geoshape.point(*item.value[1]))
+                } else if (item.value[0] == 'circle') {
+                    v.property(item.key, Geoshape.circle(*item.value[1]))
+                } else if (item.value[0] == 'box') {
+                    v.property(item.key, Geoshape.box(*item.value[1]))
+                }
+            }
+
+            for (item in params[0].entrySet()) {
+                if (item.value == null) {
+                    continue
+                } else if (item.value instanceof List) {
+                    for (extra in item.value) {
+                        v.property(item.key, extra)
+                    }
+                } else {
+                    v.property(item.key, item.value)
+                }
+            }
+            ids.add(v.id())
+        }
+        graph.tx().commit()
+        return ids
+    } catch (err) {
+        graph.tx().rollback()
+        throw(err)
+    }
+}
+
+def _upsert_vertices(vlabel, vertices, key, update) {
+    /**
+     * Gets or creates vertices by the value of a unique property, in one
+     * transaction
+     *
+     * :param vlabel: label of the vertices
+     * :param vertices: list of [attrs, geo_attrs] pairs, one per vertex
+     * :param key: name of the unique property
+     * :param update: if true, also set the properties of the vertices found
+     * :returns: [vertex, created] pairs, in order
+     */
+    graph.tx().rollback()
+    try {
+        def results = []
+        for (params in vertices) {
+            def val = params[0][key]
+            def created = false
+            def v = g.V().hasLabel(vlabel).has(key, val).fold().coalesce(
+                __.unfold(),
+                __.addV(T.label, vlabel, key, val).sideEffect{created = true}
+            ).next()
+
+            if (created || update) {
+                for (item in params[1].entrySet()) {
+                    if (item.value == null) {
+                        v.property(item.key).remove()
+                    } else if (item.value[0] == 'point') {
+                        v.property(item.key, Geoshape.point(*item.value[1]))
+                    } else if (item.value[0] == 'circle') {
+                        v.property(item.key, Geoshape.circle(*item.value[1]))
+                    } else if (item.value[0] == 'box') {
+                        v.property(item.key, Geoshape.box(*item.value[1]))
+                    }
+                }
+
+                for (item in params[0].entrySet()) {
+                    if (item.value == null) {
+                        v.property(item.key).remove()
+                    } else if (item.value instanceof List) {
+                        v.property(item.key).remove()
+                        for (extra in item.value) {
+                            v.property(item.key, extra)
+                        }
+                    } else {
+                        v.property(item.key, item.value)
+                    }
+                }
+            }
+            results.add([v, created])
+        }
+        graph.tx().commit()
+        return results
+    } catch (err) {
+        graph.tx().rollback()
+        throw(err)
+    }
+}
+
+def _flush_session(operations) {
+    /**
+     * Applies the saves and deletes recorded by a unit of work in one
+     * transaction
+     *
+     * :param operations: list of operations, in order:
+     *   ['save_vertex', ref, vlabel, attrs, geo_attrs],
+     *   ['save_edge', ref, outV, inV, elabel, attrs, geo_attrs, exclusive],
+     *   ['delete_vertex', ref] or ['delete_edge', ref]. A ref is
+     *   [true, index] for the element saved by the operation at index,
+     *   [false, id] for an element saved before, or null for a new element
+     * :returns: the ids of the elements, in order
+     */
+    graph.tx().rollback()
+    try {
+        def ids = []
+        def resolve = { ref -> ref[0] ? ids[ref[1]] : ref[1] }
+        def setProperties = { element, attrs, geo_attrs ->
+            for (item in geo_attrs.entrySet()) {
+                if (item.value == null) {
+                    element.property(item.key).remove()
+                } else if (item.value[0] == 'point') {
+                    element.property(item.key, Geoshape.point(*item.value[1]))
+                } else if (item.value[0] == 'circle') {
+                    element.property(item.key, Geoshape.circle(*item.value[1]))
+                } else if (item.value[0] == 'box') {
+                    element.property(item.key, Geoshape.box(*item.value[1]))
+                }
+            }
+            for (item in attrs.entrySet()) {
+                if (item.value == null) {
+                    element.property(item.key).remove()
+                } else if (item.value instanceof List) {
+                    for (extra in item.value) {
+                        element.property(item.key, extra)
+                    }
+                } else {
+                    element.property(item.key, item.value)
+                }
+            }
+        }
+        for (op in operations) {
+            switch (op[0]) {
+                case 'save_vertex':
+                    def v = op[1] == null ? graph.addVertex(label, op[2]) : g.V(resolve(op[1])).next()
+                    setProperties(v, op[3], op[4])
+                    ids.add(v.id())
+                    break
+                case 'save_edge':
+                    def e = null
+                    if (op[1] == null) {
+                        def source = g.V(resolve(op[2])).next()
+                        def target = g.V(resolve(op[3])).next()
+                        if (op[7]) {
+                            def existing = g.V(source).outE(op[4]).filter(inV().is(target)).toList()
+                            e = existing ? existing[0] : null
+                        }
+                        if (e == null) {
+                            e = source.addEdge(op[4], target)
+                        }
+                    } else {
+                        e = g.E(resolve(op[1])).next()
+                    }
+                    setProperties(e, op[5], op[6])
+                    ids.add(e.id())
+                    break
+                case 'delete_vertex':
+                    g.V(resolve(op[1])).next().remove()
+                    ids.add(resolve(op[1]))
+                    break
+                case 'delete_edge':
+                    g.E(resolve(op[1])).tryNext().ifPresent{it.remove()}
+                    ids.add(resolve(op[1]))
+                    break
+            }
+        }
+        graph.tx().commit()
+        return ids
+    } catch (err) {
+        graph.tx().rollback()
+        throw(err)
+    }
+}
+
 def _delete_vertex(vid) {
     /**
      * Deletes a vertex
@@ -60,37 +254,59 @@ def _delete_vertex(vid) {
      }
 }
 
-def _create_relationship(id, in_direction, edge_label, edge_attrs, vertex_attrs) {
+def _create_relationships(vlabel, relationships, vid, in_direction, elabel) {
     /*
-     * Creates an vertex and edge from the given vertex
+     * Creates vertices and the edges between them and an existing vertex, in
+     * one transaction
      *
-     * :param id: vertex id, cannot be null
-     * :param direction: direction of edge from original vertex
-     * :param edge_label: label of the edge
-     * :param edge_attrs: map of parameters to set on the edge
-     * :param vertex_attrs: map of parameters to set on the vertex
+     * :param vlabel: label of the new vertices
+     * :param relationships: list of [vertex_attrs, vertex_geo_attrs,
+     *   edge_attrs, edge_geo_attrs], one per new vertex
+     * :param vid: id of the existing vertex, cannot be null
+     * :param in_direction: if true, the edges go from the new vertices to
+     *   the existing one
+     * :param elabel: label of the edges
+     * :returns: [edge id, vertex id] pairs, in order
      */
     graph.tx().rollback()
     try {
-        def v1 = g.V(id).next()
-        def v2 = graph.addVertex()
-        def e
-
-        for (item in vertex_attrs.entrySet()) {
-                v2.property(item.key, item.value)
-        }
-        v2 = g.V(v2.id).next()
-        if(in_direction) {
-            e = graph.addEdge(v2, v1, edge_label)
-        } else {
-            e = graph.addEdge(v1, v2, edge_label)
+        def v1 = g.V(vid).next()
+        def results = []
+        def setProperties = { element, attrs, geo_attrs ->
+            for (item in geo_attrs.entrySet()) {
+                if (item.value == null) {
+                    continue
+                } else if (item.value[0] == 'point') {
+                    element.property(item.key, Geoshape.point(*item.value[1]))
+                } else if (item.value[0] == 'circle') {
+                    element.property(item.key, Geoshape.circle(*item.value[1]))
+                } else if (item.value[0] == 'box') {
+                    element.property(item.key, Geoshape.box(*item.value[1]))
+                }
+            }
+            for (item in attrs.entrySet()) {
+                if (item.value == null) {
+                    continue
+                } else if (item.value instanceof List) {
+                    for (extra in item.value) {
+                        element.property(item.key, extra)
+                    }
+                } else {
+                    element.property(item.key, item.value)
+                }
+            }
         }
-        for (item in edge_attrs.entrySet()) {
-            e.property(item.key, item.value)
+        for (params in relationships) {
+            def v2 = graph.addVertex(label, vlabel)
+            setProperties(v2, params[0], params[1])
+            def e = in_direction ? v2.addEdge(elabel, v1) : v1.addEdge(elabel, v2)
+            setProperties(e, params[2], params[3])
+            results.add([e.id(), v2.id()])
         }
-        return [g.E(e.id).next(), v2)]
+        graph.tx().commit()
+        return results
     } catch (err) {
-        g.stopTransaction(FAILURE)
+        graph.tx().rollback()
         throw(err)
     }
 }
@@ -139,51 +355,75 @@ def _traversal(vid, operation, labels, start, end, element_types) {
     return results
 }
 
-def _delete_related(vid, operation, lbs) {
+def _delete_related(vid, operation, lbs, chunk_size) {
     graph.tx().rollback()
     try{
         /**
-         * deletes connected vertices / edges
+         * deletes connected vertices / edges chunk_size at a time, each chunk
+         * in its own transaction. The traversal is run again for every chunk
+         * as the elements it returned are stale once committed
          */
-        def results = g.V(vid)
         def label_args = lbs == null ? [] : lbs
-        switch (operation) {
-            case "inV":
-                results = results.in(*label_args)
-                break
-            case "outV":
-                results = results.out(*label_args)
-                break
-            case "inE":
-                results = results.inE().hasLabel(*label_args)
-                break
-            case "outE":
-                results = results.outE().hasLabel(*label_args)
+        def related = {
+            def results = g.V(vid)
+            switch (operation) {
+                case "inV":
+                    return results.in(*label_args).dedup()
+                case "outV":
+                    return results.out(*label_args).dedup()
+                case "inE":
+                    return results.inE().hasLabel(*label_args)
+                case "outE":
+                    return results.outE().hasLabel(*label_args)
+                default:
+                    throw NamingException()
+            }
+        }
+        while (true) {
+            def chunk = related().limit(chunk_size).toList()
+            for (element in chunk) {
+                element.remove()
+            }
+            graph.tx().commit()
+            if (chunk.size() < chunk_size) {
                 break
-            default:
-                throw NamingException()
+            }
         }
-        results.each{it.remove()}
-        graph.tx().commit()
     } catch (err) {
         graph.tx().rollback()
         raise(err)
     }
 }
 
-def _find_vertex_by_value(value_type, vlabel, field, val) {
+def _find_vertex_by_value(vlabel, field, compare, values, order_key, descending, limit) {
     /**
-     * I'm not sure about the need for value_type
+     * Finds the vertices of a label whose property matches a predicate,
+     * without lambdas so the graph can answer from its indexes
+     *
+     * :param compare: eq, gte, lt, between or within
+     * :param values: the arguments of the predicate
+     * :param order_key: the property to sort by, if any
+     * :param limit: the maximum number of vertices, if any
      */
     graph.tx().rollback()
     try {
-       if (value_type) {
-           return g.V().hasLabel(vlabel).filter{it.get().value(field) == val}
-       } else {
-           return g.V().hasLabel(vlabel).has(field, val)
-       }
+        def elements = g.V().hasLabel(vlabel)
+        if (compare == 'within') {
+            elements = elements.has(field, within(values))
+        } else if (compare == 'between') {
+            elements = elements.has(field, between(values[0], values[1]))
+        } else {
+            elements = elements.has(field, new P(Compare.valueOf(compare), values[0]))
+        }
+        if (order_key != null) {
+            elements = elements.order().by(order_key, descending ? decr : incr)
+        }
+        if (limit != null) {
+            elements = elements.limit(limit)
+        }
+        return elements
     } catch (err) {
         graph.tx().rollback()
-        raise(err)
+        throw(err)
     }
 }
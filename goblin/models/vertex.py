@@ -2,12 +2,15 @@ from __future__ import unicode_literals
 import inspect
 import logging
 
-from goblin import connection
-from goblin.constants import VERTEX_TRAVERSAL
-from goblin._compat import (
-    array_types, string_types, add_metaclass, integer_types, float_types)
+from goblin import connection, identity, session
+from goblin.constants import (BULK_CREATE_BATCH_SIZE,
+                              BULK_CREATE_CONCURRENCY, DELETE_CHUNK_SIZE,
+                              EDGE_TRAVERSAL, EQUAL, VERTEX_TRAVERSAL)
+from goblin._compat import array_types, string_types, add_metaclass
 from goblin.exceptions import (
     GoblinException, ElementDefinitionException, GoblinQueryError)
+from goblin.coroutines import Return, run
+from goblin.mixins import AsyncVertexMixin
 from goblin.gremlin import GremlinMethod
 from .element import Element, ElementMetaClass, vertex_types
 
@@ -96,7 +99,7 @@ class EnumVertexBaseMeta(VertexMetaClass):
 
 
 @add_metaclass(VertexMetaClass)
-class Vertex(Element):
+class Vertex(AsyncVertexMixin, Element):
     """ The Vertex model base class.
 
     The element type is auto-generated from the subclass name, but can
@@ -107,11 +110,20 @@ class Vertex(Element):
 
     gremlin_path = 'vertex.groovy'
 
-    _save_vertex = GremlinMethod()
+    # traversal step loading elements by id
+    _source = VERTEX_TRAVERSAL
+
+    _save_vertex = GremlinMethod(defaults={'id_only': False})
+    _flush_session = GremlinMethod(classmethod=True)
+    _create_relationships = GremlinMethod(classmethod=True)
+    _bulk_create_vertices = GremlinMethod(classmethod=True)
+    _upsert_vertices = GremlinMethod(classmethod=True)
     _delete_vertex = GremlinMethod()
-    _traversal = GremlinMethod()
-    _delete_related = GremlinMethod()
-    _find_vertex_by_value = GremlinMethod(classmethod=True)
+    _traversal = GremlinMethod(write=False)
+    _delete_related = GremlinMethod(
+        defaults={'chunk_size': DELETE_CHUNK_SIZE})
+    _find_vertex_by_value = GremlinMethod(classmethod=True, write=False)
+    _find_method = '_find_vertex_by_value'
 
     _label = None
 
@@ -136,36 +148,26 @@ class Vertex(Element):
         return self
 
     @classmethod
-    def find_by_value(cls, field, value, as_dict=False, **kwargs):
+    def find_by_value(cls, field, value, as_dict=False, limit=None,
+                      order_by=None, **kwargs):
         """
         Returns vertices that match the given field/value pair.
-        ####REVIEW####
+
         :param field: The field to search
         :type field: str
         :param value: The value of the field
         :type value: str
         :param as_dict: Return results as a dictionary
         :type as_dict: boolean
+        :param limit: The maximum number of vertices returned
+        :type limit: int
+        :param order_by: The field to sort by, prefixed with ``-`` for
+            descending order
+        :type order_by: str
         :rtype: [goblin.models.Vertex]
         """
-        _field = cls.get_property_by_name(field)
-        _label = cls.get_label()
-
-        value_type = False
-        if isinstance(value, integer_types + float_types):
-            value_type = True
-        results = cls._find_vertex_by_value(
-            value_type=value_type,
-            vlabel=_label,
-            field=_field,
-            val=value,
-            **kwargs
-        )
-
-        if as_dict:  # pragma: no cover
-            return {v._id: v for v in results}
-
-        return results
+        return cls._find(EQUAL, field, [value], as_dict=as_dict, limit=limit,
+                         order_by=order_by, **kwargs)
 
     @classmethod
     def get_label(cls):
@@ -179,116 +181,265 @@ class Vertex(Element):
 
     def _reload_values(self, *args, **kwargs):
         """
-        Method for reloading the current vertex by reading its current values
+        Operation reloading the current vertex by reading its current values
         from the database.
 
         """
+        query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+        query_kwargs.pop('future_class', None)
+        stream = yield connection.submit('g.V(vid)', {'vid': self._id},
+                                         **query_kwargs)
+        result = yield stream.read()
+        result = result.data[0]
         reloaded_values = {}
-        future = connection.get_future(kwargs)
-        future_result = connection.execute_query(
-            'g.V(vid)', {'vid': self._id}, **kwargs)
-
-        def on_read(f2):
-            try:
-                result = f2.result()
-                result = result.data[0]
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                # del result['type']  # don't think I need this
-                reloaded_values['id'] = result['id']
-                for name, value in result.get('properties', {}).items():
-                    # This is a hack until decide how to deal with props
-                    reloaded_values[name] = value[0]['value']
-                future.set_result(reloaded_values)
-
-        def on_reload_values(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future_read = stream.read()
-                future_read.add_done_callback(on_read)
-        future_result.add_done_callback(on_reload_values)
-        return future
+        # del result['type']  # don't think I need this
+        reloaded_values['id'] = result['id']
+        for name, value in result.get('properties', {}).items():
+            # This is a hack until decide how to deal with props
+            reloaded_values[name] = value[0]['value']
+        raise Return(reloaded_values)
 
     def save(self, *args, **kwargs):
         """
         Save the current vertex using the configured save strategy, the default
         save strategy is to re-save all fields every time the object is saved.
+
+        :param id_only: Read back only the id of the saved vertex and update
+            this instance in place, instead of the whole vertex. Defaults to
+            the ``__id_only_saves__`` attribute of the model
+        :type id_only: bool
         """
         super(Vertex, self).save()
+        future = connection.get_future(kwargs)
+        return run(self._save(**kwargs), future)
+
+    def _save(self, **kwargs):
+        """ Operation saving the vertex, see :py:mod:`goblin.coroutines` """
+        if self._is_unmodified():
+            raise Return(self)
+        unit_of_work = session.current()
+        if unit_of_work is not None:
+            result = yield unit_of_work.record_save(self)
+            raise Return(result)
         params, geo_params = self.as_save_params()
         label = self.get_label()
-        # params['element_type'] = self.get_element_type()  don't think we need
-        # Here this is a future, have to set handler in callback
-        future = connection.get_future(kwargs)
-        future_result = self._save_vertex(label, params, geo_params, **kwargs)
         deserialize = kwargs.pop('deserialize', True)
-        def on_read(f2):
-            try:
-                result = f2.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                if deserialize:
-                    result = result[0]
-                    self._id = result._id
-                    for k, v in self._values.items():
-                        v.previous_value = result._values[k].previous_value
-                else:
-                    result = result.data
-                future.set_result(result)
-
-        def on_save(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
+        id_only = self._saves_id_only(kwargs.pop('id_only', None))
+        stream = yield self._gremlin_methods['_save_vertex'].submit(
+            self, label, params, geo_params, id_only=id_only,
+            deserialize=deserialize and not id_only, **kwargs)
+        result = yield stream.read()
+        if deserialize:
+            if id_only:
+                self._id = result.data[0]
+                self._mark_saved()
+                result = self
             else:
-                future_read = stream.read()
-                future_read.add_done_callback(on_read)
-
-        future_result.add_done_callback(on_save)
-
-        return future
+                result = result[0]
+                self._id = result._id
+                self._mark_saved(result)
+            vid = self._id
+        else:
+            result = result.data
+            vid = result[0] if id_only else result[0]['id']
+        element_cache = connection.get_cache()
+        if element_cache is not None:
+            element_cache.invalidate(VERTEX_TRAVERSAL, vid)
+        if deserialize:
+            identity_map = identity.current()
+            if identity_map is not None:
+                result = identity_map.add(self)
+        raise Return(result)
 
     def delete(self, **kwargs):
         """ Delete the current vertex from the graph. """
         if self.__abstract__:
             raise GoblinQueryError('Cant delete abstract elements')
-        if self._id is None:  # pragma: no cover
+        if self._id is None and session.current() is None:
             return self
         future = connection.get_future(kwargs)
-        future_result = self._delete_vertex()
+        return run(self._delete(**kwargs), future)
 
-        def on_read(f2):
-            try:
-                result = f2.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future.set_result(result)
+    def _delete(self, **kwargs):
+        """ Operation deleting the vertex, see :py:mod:`goblin.coroutines` """
+        if self.__abstract__:
+            raise GoblinQueryError('Cant delete abstract elements')
+        unit_of_work = session.current()
+        if unit_of_work is not None:
+            # elements saved in the session are deleted once created
+            result = yield unit_of_work.record_delete(self)
+            raise Return(result)
+        if self._id is None:  # pragma: no cover
+            raise Return(self)
+        stream = yield self._gremlin_methods['_delete_vertex'].submit(
+            self, **kwargs)
+        result = yield stream.read()
+        element_cache = connection.get_cache()
+        if element_cache is not None:
+            # the edges of the vertex are gone too
+            element_cache.invalidate(VERTEX_TRAVERSAL, self._id)
+            element_cache.invalidate_source(EDGE_TRAVERSAL)
+        identity_map = identity.current()
+        if identity_map is not None:
+            identity_map.discard(self)
+        raise Return(result)
 
-        def on_delete(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future_read = stream.read()
+    @classmethod
+    def bulk_create(cls, vertices, batch_size=BULK_CREATE_BATCH_SIZE,
+                    concurrency=BULK_CREATE_CONCURRENCY, **kwargs):
+        """
+        Create many vertices of this type with few queries. The vertices are
+        validated first, then sent ``batch_size`` at a time, each batch
+        created in a single transaction, with up to ``concurrency`` batches
+        in flight. If a batch fails, it is rolled back and its error raised;
+        the batches committed before it stay in the graph.
+
+        :param vertices: unsaved instances of this class, or dicts of their
+            property values
+        :type vertices: list
+        :param batch_size: The number of vertices created per query
+        :type batch_size: int
+        :param concurrency: The maximum number of queries in flight
+        :type concurrency: int
+        :returns: Future - list of the ids of the new vertices, in order
+
+        """
+        vertices = cls._bulk_prepare(vertices)
+        future = connection.get_future(kwargs)
+        return run(cls._bulk_create(vertices, batch_size=batch_size,
+                                    concurrency=concurrency, **kwargs),
+                   future)
 
-                future_read.add_done_callback(on_read)
+    @classmethod
+    def _bulk_prepare(cls, vertices):
+        """ Build and validate the vertices of :meth:`bulk_create` """
+        if cls.__abstract__:
+            raise GoblinException('cant save abstract elements')
+        prepared = []
+        for vertex in vertices:
+            if isinstance(vertex, dict):
+                vertex = cls(**vertex)
+            elif not isinstance(vertex, cls):
+                raise GoblinException(
+                    "bulk_create takes %s instances or dicts, not %r" % (
+                        cls.__name__, vertex))
+            elif vertex._id is not None:
+                raise GoblinException(
+                    "%r is already saved" % (vertex, ))
+            vertex.pre_save()
+            prepared.append(vertex)
+        return prepared
 
-        future_result.add_done_callback(on_delete)
-        return future
+    @classmethod
+    def _bulk_create(cls, vertices, batch_size=BULK_CREATE_BATCH_SIZE,
+                     concurrency=BULK_CREATE_CONCURRENCY, **kwargs):
+        """ Operation behind :meth:`bulk_create` """
+        params = [list(vertex.as_save_params()) for vertex in vertices]
+        ids = yield cls._bulk_submit('_bulk_create_vertices', params,
+                                     batch_size, concurrency, **kwargs)
+        cls._bulk_saved(vertices, ids)
+        raise Return(ids)
+
+    @classmethod
+    def get_or_create(cls, key_field, value, defaults=None, **kwargs):
+        """
+        Get the vertex of this type whose ``key_field`` property is
+        ``value``, or create it with the ``defaults`` property values, in a
+        single query. Only a unique index on ``key_field`` keeps concurrent
+        calls from creating the vertex twice.
+
+        :param key_field: The name of the unique property
+        :type key_field: str
+        :param value: The value of the property
+        :param defaults: The other property values of a new vertex
+        :type defaults: dict
+        :returns: Future - tuple of the vertex and whether it was created
+
+        """
+        values = dict(defaults or {})
+        values[key_field] = value
+        vertices, key = cls._upsert_prepare([values], key_field)
+        future = connection.get_future(kwargs)
+        return run(cls._get_or_create(vertices[0], key, **kwargs), future)
+
+    @classmethod
+    def _get_or_create(cls, vertex, key, **kwargs):
+        """ Operation behind :meth:`get_or_create` """
+        results = yield cls._bulk_submit(
+            '_upsert_vertices', [list(vertex.as_save_params())], 1, 1,
+            key=key, update=False, **kwargs)
+        result, created = results[0]
+        element_cache = connection.get_cache()
+        if element_cache is not None:
+            element_cache.invalidate(VERTEX_TRAVERSAL, result['id'])
+        raise Return((Element.deserialize(result), created))
+
+    @classmethod
+    def bulk_upsert(cls, rows, key, batch_size=BULK_CREATE_BATCH_SIZE,
+                    concurrency=BULK_CREATE_CONCURRENCY, **kwargs):
+        """
+        Create or update many vertices of this type, matched by the value of
+        their unique ``key`` property. The vertices found are saved with
+        every property of their row, like :meth:`save` does. Rows are sent
+        ``batch_size`` at a time, each batch upserted in a single
+        transaction, with up to ``concurrency`` batches in flight.
+
+        :param rows: unsaved instances of this class, or dicts of their
+            property values
+        :type rows: list
+        :param key: The name of the unique property
+        :type key: str
+        :param batch_size: The number of vertices upserted per query
+        :type batch_size: int
+        :param concurrency: The maximum number of queries in flight
+        :type concurrency: int
+        :returns: Future - list of ``(vertex, created)`` tuples, in order
+
+        """
+        vertices, db_key = cls._upsert_prepare(rows, key)
+        future = connection.get_future(kwargs)
+        return run(cls._bulk_upsert(vertices, db_key, batch_size=batch_size,
+                                    concurrency=concurrency, **kwargs),
+                   future)
+
+    @classmethod
+    def _upsert_prepare(cls, rows, key_field):
+        """
+        Build and validate the vertices of an upsert, returning them with
+        the database name of ``key_field``
+        """
+        prop = cls._properties.get(key_field)
+        if prop is None:
+            raise GoblinException(
+                "%s has no property %s" % (cls.__name__, key_field))
+        vertices = cls._bulk_prepare(rows)
+        for vertex in vertices:
+            if getattr(vertex, key_field) is None:
+                raise GoblinException("%r has no %s" % (vertex, key_field))
+        return vertices, prop.db_field_name or key_field
+
+    @classmethod
+    def _bulk_upsert(cls, vertices, key, batch_size=BULK_CREATE_BATCH_SIZE,
+                     concurrency=BULK_CREATE_CONCURRENCY, **kwargs):
+        """ Operation behind :meth:`bulk_upsert` """
+        params = [list(vertex.as_save_params()) for vertex in vertices]
+        results = yield cls._bulk_submit(
+            '_upsert_vertices', params, batch_size, concurrency, key=key,
+            update=True, **kwargs)
+        cls._bulk_saved(vertices, [result['id'] for result, _ in results])
+        raise Return([(vertex, created) for vertex, (_, created)
+                      in zip(vertices, results)])
 
     @classmethod
     def all(cls, ids=None, as_dict=False, *args, **kwargs):
         return super(Vertex, cls).all(
             VERTEX_TRAVERSAL, ids=ids, as_dict=as_dict, *args, **kwargs)
 
+    @classmethod
+    def _all(cls, ids=None, as_dict=False, **kwargs):
+        return cls._all_from(VERTEX_TRAVERSAL, ids=ids, as_dict=as_dict,
+                             **kwargs)
+
     # This section of the API is under review
     def _simple_traversal(self,
                           operation,
@@ -311,6 +462,17 @@ class Vertex(Element):
         :param types: The list of allowed result elements
         :type types: list
 
+        """
+        future = connection.get_future(kwargs)
+        return run(self._traversal_operation(
+            operation, labels, limit=limit, offset=offset, types=types,
+            **kwargs), future)
+
+    def _traversal_operation(self, operation, labels, limit=None,
+                             offset=None, types=None, **kwargs):
+        """
+        Check the arguments of :meth:`_simple_traversal` and return the
+        operation performing it
         """
         from goblin.models.edge import Edge
         label_strings = []
@@ -340,30 +502,20 @@ class Vertex(Element):
             end = offset + limit
         else:
             start = end = None
-        future = connection.get_future(kwargs)
-        future_result = self._traversal(operation,
-                                        label_strings,
-                                        start,
-                                        end,
-                                        allowed_elts,
-                                        **kwargs)
+        return self._traverse(operation, label_strings, start, end,
+                              allowed_elts, **kwargs)
 
+    def _traverse(self, operation, labels, start, end, types, **kwargs):
+        """ Operation behind :meth:`_simple_traversal` """
         def traversal_handler(data):
             if data is None:
                 data = []
             return data
 
-        def on_traversal(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                stream.add_handler(traversal_handler)
-                future.set_result(stream)
-
-        future_result.add_done_callback(on_traversal)
-        return future
+        stream = yield self._gremlin_methods['_traversal'].submit(
+            self, operation, labels, start, end, types, **kwargs)
+        stream.add_handler(traversal_handler)
+        raise Return(stream)
 
     def _simple_deletion(self, operation, labels, **kwargs):
         """
@@ -391,28 +543,21 @@ class Vertex(Element):
             label_strings.append(label_string)
 
         future = connection.get_future(kwargs)
-        future_result = self._delete_related(operation, label_strings)
-
-        def on_read(f2):
-            try:
-                result = f2.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future.set_result(result)
-
-        def on_save(f):
-            try:
-                stream = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                future_read = stream.read()
-                future_read.add_done_callback(on_read)
-
-        future_result.add_done_callback(on_save)
-
-        return future
+        return run(self._delete_related_elements(
+            operation, label_strings, **kwargs), future)
+
+    def _delete_related_elements(self, operation, labels, **kwargs):
+        """ Operation behind :meth:`_simple_deletion` """
+        stream = yield self._gremlin_methods['_delete_related'].submit(
+            self, operation, labels, **kwargs)
+        result = yield stream.read()
+        element_cache = connection.get_cache()
+        if element_cache is not None:
+            # the ids of the deleted elements are not known
+            element_cache.invalidate_source(EDGE_TRAVERSAL)
+            if operation.endswith('V'):
+                element_cache.invalidate_source(VERTEX_TRAVERSAL)
+        raise Return(result)
 
     def outV(self, *labels, **kwargs):
         """
@@ -0,0 +1,97 @@
+"""
+Several independent scripts sent as one request.
+
+:func:`goblin.connection.execute_many` merges its scripts into a single
+composite script with :func:`compose`: each script runs in its own closure,
+with its own bindings, and the composite returns a ``[succeeded, results]``
+pair per script, so a script failing does not fail the others::
+
+    futures = connection.execute_many([
+        ('g.V(vid)', {'vid': vid}),
+        ('g.V().hasLabel(x).count()', {'x': 'person'})])
+    vertices = yield futures[0]
+    count = (yield futures[1])[0]
+
+The scripts must not define functions or classes. ``import`` lines are
+moved to the top of the composite script.
+"""
+from __future__ import unicode_literals
+import re
+
+
+_HEADER = """def _goblin_results = []
+def _goblin_run = { entry ->
+    try {
+        def result = entry.call()
+        if (result instanceof Iterator) {
+            result = result.toList()
+        } else if (result instanceof Iterable) {
+            result = result.collect()
+        } else {
+            result = result == null ? [] : [result]
+        }
+        _goblin_results.add([true, result])
+    } catch (err) {
+        _goblin_results.add([false, err.toString()])
+    }
+}"""
+
+_ENTRY = """// goblin entry {index}
+_goblin_run({{ {params}->
+{script}
+// goblin entry end
+}}{curry})"""
+
+_ENTRY_RE = re.compile(
+    r'^// goblin entry (\d+)\n_goblin_run\(\{ ([\w, ]*)->\n(.*?)\n'
+    r'// goblin entry end$', re.M | re.S)
+
+
+def _binding(index, name):
+    return '_goblin_{}_{}'.format(index, name)
+
+
+def compose(queries):
+    """
+    Merge ``(script, bindings)`` pairs into one script.
+
+    :returns: tuple of the composite script and its bindings
+    """
+    imports = []
+    entries = []
+    bindings = {}
+    for index, (script, entry_bindings) in enumerate(queries):
+        lines = []
+        for line in script.strip().split('\n'):
+            if line.startswith('import '):
+                if line not in imports:
+                    imports.append(line)
+            else:
+                lines.append(line)
+        names = sorted(entry_bindings or {})
+        for name in names:
+            bindings[_binding(index, name)] = entry_bindings[name]
+        curry = ''
+        if names:
+            curry = '.curry({})'.format(
+                ', '.join(_binding(index, name) for name in names))
+        params = ', '.join(names) + ' ' if names else ''
+        entries.append(_ENTRY.format(index=index, params=params,
+                                     script='\n'.join(lines), curry=curry))
+    script = '\n'.join(imports + [_HEADER] + entries + ['_goblin_results'])
+    return script, bindings
+
+
+def split(script, bindings):
+    """
+    The ``(script, bindings)`` pairs merged by :func:`compose`, ``None`` if
+    ``script`` is not a composite script
+    """
+    if _HEADER not in script:
+        return None
+    queries = []
+    for index, params, body in _ENTRY_RE.findall(script):
+        names = [name.strip() for name in params.split(',') if name.strip()]
+        queries.append((body, {name: bindings[_binding(int(index), name)]
+                               for name in names}))
+    return queries
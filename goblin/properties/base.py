@@ -2,6 +2,7 @@ from __future__ import unicode_literals
 import copy
 import warnings
 
+from goblin.constants import SINGLE
 from goblin.exceptions import ValidationError
 from .strategy import Strategy, SaveAlways, SaveOnce
 from .validators import pass_all_validator
@@ -85,6 +86,16 @@ class BaseValueManager(object):
         except:
             return self.value != self.previous_value
 
+    @property
+    def modified(self):
+        """
+        Indicates whether or not this value differs from the one last saved
+        or loaded, regardless of the save strategy.
+
+        :rtype: bool
+        """
+        return self.value != self.previous_value
+
     def getval(self):
         """Return the current value."""
         return self.value
@@ -123,7 +134,9 @@ class BaseValueManager(object):
 
 class GraphProperty(object):
     """Base class for graph property types"""
+    # the java class and the cardinality of the property key in the schema
     data_type = "Object"
+    cardinality = SINGLE
     value_manager = BaseValueManager
     validator = pass_all_validator
     instance_counter = 0
@@ -132,7 +145,8 @@ class GraphProperty(object):
 
     def __init__(self, description=None, index=False, protected=False,
                  index_ext=None, db_field=None, choices=None, default=None,
-                 required=False, save_strategy=SaveAlways, db_field_prefix=''):
+                 required=False, save_strategy=SaveAlways, db_field_prefix='',
+                 cardinality=None):
         """
         Initialize this graph property with the given information.
 
@@ -156,6 +170,9 @@ class GraphProperty(object):
         :type save_strategy: strategy.Strategy
         :param db_field_prefix: The property prefix associated with the Model.
         :type db_field_prefix: basestring | None
+        :param cardinality: The cardinality of the property key, ``SINGLE``,
+            ``SET`` or ``LIST``, defaults to the one of the property type
+        :type cardinality: str
 
         """
         self.description = description
@@ -168,6 +185,8 @@ class GraphProperty(object):
         self.required = required
         self.save_strategy = save_strategy
         self.choices = choices
+        if cardinality is not None:
+            self.cardinality = cardinality
 
         # the graph property name in the model definition
         self.property_name = None
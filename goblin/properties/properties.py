@@ -13,6 +13,7 @@ from uuid import UUID as _UUID
 from goblin._compat import (
     text_type, string_types, float_types, integer_types, long_, PY3)
 
+from goblin.constants import LIST
 from goblin.properties.base import GraphProperty
 from goblin.properties import geoshapes
 from goblin.properties.validators import *
@@ -26,6 +27,7 @@ class String(GraphProperty):
     :param str max_length: minimum string length
     :param str encoding: string encoding - 'utf-8' by default
     """
+    data_type = "String"
 
     validator = string_validator
 
@@ -70,6 +72,7 @@ class Short(GraphProperty):
     """
     Short Data property type
     """
+    data_type = "Short"
     deserializer = int
     serializer = int
     validator = integer_validator
@@ -79,6 +82,7 @@ class Integer(GraphProperty):
     """
     Integer Data property type
     """
+    data_type = "Integer"
     serializer = long_
     deserializer = long_
     validator = long_validator
@@ -97,6 +101,7 @@ class Long(GraphProperty):
     """
     Long Data property type
     """
+    data_type = "Long"
     serializer = long_
     deserializer = long_
     validator = long_validator
@@ -204,6 +209,7 @@ class DateTime(GraphProperty):
 
 class UUID(GraphProperty):
     """Universally Unique Identifier (UUID) type"""
+    data_type = "String"
     serializer = str
     validator = validate_uuid
 
@@ -221,6 +227,7 @@ class Boolean(GraphProperty):
     """
     Boolean Data property type
     """
+    data_type = "Boolean"
     deserializer = bool
     validator = bool_validator
 
@@ -229,6 +236,7 @@ class Double(GraphProperty):
     """
     Double Data property type
     """
+    data_type = "Double"
     deserializer = float
     validator = float_validator
 
@@ -240,6 +248,7 @@ class Decimal(GraphProperty):
     """
     Decimal Data property type
     """
+    data_type = "Double"
     serializer = float
     validator = decimal_validator
 
@@ -276,6 +285,7 @@ class Email(GraphProperty):
     """
     Email Data property type
     """
+    data_type = "String"
 
     validator = validate_email
 
@@ -298,6 +308,7 @@ class IPV4(GraphProperty):
     """
     IPv4 Data property type
     """
+    data_type = "Long"
     serializer = int
     deserializer = ipaddress.IPv4Address
     validator = validate_ipv4_address
@@ -323,6 +334,8 @@ class IPV6(GraphProperty):
     """
     IPv6 Data property type
     """
+    data_type = "Long"
+    cardinality = LIST
 
     validator = validate_ipv6_address
 
@@ -347,7 +360,7 @@ class IPV6(GraphProperty):
 
 
 class Point(GraphProperty):
-
+    data_type = "Geoshape"
     validator = validate_point
 
     def to_python(self, value):
@@ -366,7 +379,7 @@ class Point(GraphProperty):
 
 
 class Circle(GraphProperty):
-
+    data_type = "Geoshape"
     validator = validate_circle
 
     def to_python(self, value):
@@ -385,7 +398,7 @@ class Circle(GraphProperty):
 
 
 class Box(GraphProperty):
-
+    data_type = "Geoshape"
     validator = validate_box
 
     def to_python(self, value):
@@ -406,6 +419,7 @@ class Slug(GraphProperty):
     """
     Slug Data property type
     """
+    data_type = "String"
 
     validator = validate_slug
 
@@ -3,12 +3,15 @@ import logging
 import warnings
 from functools import wraps
 
-from goblin import connection
+from goblin import connection, session
 from goblin._compat import array_types, string_types
+from goblin.coroutines import Return, run
+from goblin.mixins import AsyncRelationshipMixin
 from goblin.tools import LazyImportClass
 from goblin.exceptions import GoblinRelationshipException
 
-from goblin.constants import IN, OUT, BOTH
+from goblin.constants import (BULK_CREATE_BATCH_SIZE,
+                              BULK_CREATE_CONCURRENCY, IN, OUT, BOTH)
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +26,7 @@ def requires_vertex(method):
     return method_wrapper
 
 
-class Relationship(object):
+class Relationship(AsyncRelationshipMixin):
 
     """
     Define incoming and outgoing relationships that exist. Also enforce
@@ -112,12 +115,7 @@ class Relationship(object):
         :type callback: method
         :rtype: List[goblin.models.Vertex] | Object
         """
-        allowed_elts = []
-        allowed_vlts = []
-        for e in self.edge_classes:
-            allowed_elts += [e.get_label()]
-        for v in self.vertex_classes:
-            allowed_vlts += [v.get_label()]
+        allowed_elts = self._edge_labels()
 
         if limit is not None and offset is not None:
             start = offset
@@ -126,29 +124,20 @@ class Relationship(object):
             start = end = None
 
         operation = self.direction.lower() + 'V'
-        future_class = kwargs.get('future_class', None)
-        if future_class is None:
-            future_class = connection._future
-
-        future = future_class()
-        future_result = getattr(
-            self.top_level_vertex, operation)(*allowed_elts)
-
-        def on_vertices(f):
-            try:
-                result = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                if callback:
-                    result = callback(result)
-                elif self.vertex_callback:
-                    result = self.vertex_callback(result)
-                future.set_result(result)
+        future = connection.get_future(kwargs)
+        return run(self._related(operation, allowed_elts,
+                                 callback or self.vertex_callback), future)
 
-        future_result.add_done_callback(on_vertices)
+    def _edge_labels(self):
+        return [e.get_label() for e in self.edge_classes]
 
-        return future
+    def _related(self, operation, labels, callback=None):
+        """ Operation traversing from the current vertex """
+        result = yield self.top_level_vertex._traversal_operation(
+            operation, labels)
+        if callback:
+            result = callback(result)
+        raise Return(result)
 
     @requires_vertex
     def edges(self, limit=None, offset=None, callback=None, **kwargs):
@@ -163,9 +152,7 @@ class Relationship(object):
         :type callback: method
         :rtype: List[goblin.models.Edge] | Object
         """
-        allowed_elts = []
-        for e in self.edge_classes:
-            allowed_elts += [e.get_label()]
+        allowed_elts = self._edge_labels()
 
         if limit is not None and offset is not None:
             start = offset
@@ -174,29 +161,9 @@ class Relationship(object):
             start = end = None
 
         operation = self.direction.lower() + 'E'
-        future_class = kwargs.get('future_class', None)
-        if future_class is None:
-            future_class = connection._future
-
-        future = future_class()
-        future_result = getattr(
-            self.top_level_vertex, operation)(*allowed_elts)
-
-        def on_edges(f):
-            try:
-                result = f.result()
-            except Exception as e:
-                future.set_exception(e)
-            else:
-                if callback:
-                    result = callback(result)
-                elif self.edge_callback:
-                    result = self.edge_callback(result)
-                future.set_result(result)
-
-        future_result.add_done_callback(on_edges)
-
-        return future
+        future = connection.get_future(kwargs)
+        return run(self._related(operation, allowed_elts,
+                                 callback or self.edge_callback), future)
 
     def allowed(self, edge_type, vertex_type):
         """
@@ -275,6 +242,37 @@ class Relationship(object):
         else:
             return create_cls(**model_params)
 
+    def _new_entity(self, model_cls, model_params, outV=None, inV=None):
+        """
+        Instantiate a Vertex or Edge for the relationship without saving it,
+        bypassing the model factory
+
+        :rtype: goblin.models.Vertex | goblin.models.Edge
+        """
+        if isinstance(model_cls, LazyImportClass):
+            model_cls = model_cls.klass
+
+        from goblin.models.edge import Edge
+        if issubclass(model_cls, Edge):
+            return model_cls(outV, inV, **model_params)
+        else:
+            return model_cls(**model_params)
+
+    def _uses_factory(self, edge_type, vertex_type):
+        """ Whether either model is created by a factory class """
+        for model_cls in (edge_type, vertex_type):
+            if isinstance(model_cls, LazyImportClass):
+                model_cls = model_cls.klass
+            if getattr(model_cls, 'FACTORY_CLASS', None):
+                return True
+        return False
+
+    def _edge_vertices(self, new_vertex):
+        """ The out and in vertices of the edge to a new vertex """
+        if self.direction == IN:
+            return new_vertex, self.top_level_vertex
+        return self.top_level_vertex, new_vertex
+
     @requires_vertex
     def create(self, edge_params={}, vertex_params={}, edge_type=None,
                vertex_type=None, callback=None, **kwargs):
@@ -295,9 +293,22 @@ class Relationship(object):
         :param callback: (Optional) Callback function to handle results
         :type callback: method
         :rtype: tuple(goblin.models.Edge, goblin.models.Vertex) | Object
+
+        The vertex and edge are created in one call to the server, unless
+        one of their classes has a ``FACTORY_CLASS``. Inside a
+        :class:`goblin.session.Session` block, they are instantiated from
+        their classes, not their factories, and created when the session
+        is flushed.
         """
         # if not self.top_level_vertex:
         #    raise GoblinRelationshipException("No existing vertex known, haveyou created a vertex?")
+        edge_type, vertex_type = self._relationship_types(edge_type,
+                                                          vertex_type)
+        future = connection.get_future(kwargs)
+        return run(self._create(edge_params, vertex_params, edge_type,
+                                vertex_type, callback), future)
+
+    def _relationship_types(self, edge_type=None, vertex_type=None):
         if not vertex_type:
             vertex_type = self.vertex_classes[0]
         if not edge_type:
@@ -306,56 +317,113 @@ class Relationship(object):
             raise GoblinRelationshipException(
                 "That is not a valid relationship setup: %s <-%s-> %s" % (
                     edge_type, self.direction, vertex_type))
+        return edge_type, vertex_type
+
+    def _create(self, edge_params, vertex_params, edge_type, vertex_type,
+                callback=None):
+        """ Operation behind :meth:`create` """
+        unit_of_work = session.current()
+        if unit_of_work is not None:
+            new_edge, new_vertex = yield self._record_create(
+                unit_of_work, edge_params, vertex_params, edge_type,
+                vertex_type)
+        elif self._uses_factory(edge_type, vertex_type):
+            new_vertex = yield self._create_entity(vertex_type, vertex_params)
+            new_edge = yield self._create_entity(
+                edge_type, edge_params, *self._edge_vertices(new_vertex))
+        else:
+            pairs = self._bulk_prepare([(edge_params, vertex_params)],
+                                       edge_type, vertex_type)
+            pairs = yield self._bulk_create(pairs, 1, 1)
+            new_edge, new_vertex = pairs[0]
+        if callback:
+            result = callback(new_edge, new_vertex)
+        elif self.create_callback:
+            result = self.create_callback(new_edge, new_vertex)
+        else:
+            result = (new_edge, new_vertex)
+        raise Return(result)
 
-        future_class = kwargs.get('future_class', None)
-        if future_class is None:
-            future_class = connection._future
-
-        future = future_class()
-        if isinstance(vertex_type, string_types):
-
-            top_level_module = self.top_level_vertex.__module__
-        new_vertex_future = self._create_entity(vertex_type, vertex_params)
-
-        def on_vertex(f):
-            try:
-                new_vertex = f.result()
-            except Exception as e:
-                future.set_exception(e)
+    @requires_vertex
+    def bulk_create(self, rows, edge_type=None, vertex_type=None,
+                    batch_size=BULK_CREATE_BATCH_SIZE,
+                    concurrency=BULK_CREATE_CONCURRENCY, **kwargs):
+        """ Creates many vertices, and the edges between them and the current
+        Vertex, with few queries. The vertices and edges are validated first,
+        then sent ``batch_size`` at a time, each batch created in a single
+        transaction. Model factories are not used.
+
+        :param rows: vertex params dicts, or (edge params, vertex params)
+            tuples, one per relationship
+        :type rows: list
+        :param edge_type: (Optional) Edge class type, otherwise it defaults to
+            the first Edge type known
+        :type edge_type: goblin.models.Edge | None
+        :param vertex_type: (Optional) Vertex class type, otherwise it
+            defaults to the first Vertex type known
+        :type vertex_type: goblin.models.Vertex | None
+        :param batch_size: The number of relationships created per query
+        :type batch_size: int
+        :param concurrency: The maximum number of queries in flight
+        :type concurrency: int
+        :rtype: Future - list of (goblin.models.Edge, goblin.models.Vertex)
+            tuples, in order
+        """
+        edge_type, vertex_type = self._relationship_types(edge_type,
+                                                          vertex_type)
+        pairs = self._bulk_prepare(rows, edge_type, vertex_type)
+        future = connection.get_future(kwargs)
+        return run(self._bulk_create(pairs, batch_size, concurrency,
+                                     **kwargs), future)
+
+    def _bulk_prepare(self, rows, edge_type, vertex_type):
+        """ Build and validate the edges and vertices of :meth:`bulk_create` """
+        pairs = []
+        for row in rows:
+            if isinstance(row, dict):
+                edge_params, vertex_params = {}, row
             else:
-                if self.direction == IN:
-                    outV = new_vertex
-                    inV = self.top_level_vertex
-                else:
-                    outV = self.top_level_vertex
-                    inV = new_vertex
-
-                new_edge_future = self._create_entity(
-                    edge_type, edge_params, outV=outV, inV=inV)
-
-                def on_edge(f2):
-                    try:
-                        new_edge = f2.result()
-                    except Exception as e:
-                        future.set_exception(e)
-                    else:
-                        if callback:
-                            try:
-                                result = callback(new_edge, new_vertex)
-                            except Exception as e:
-                                future.set_exception(e)
-                        elif self.create_callback:
-                            try:
-                                result = self.create_callback(
-                                    new_edge, new_vertex)
-                            except Exception as e:
-                                future.set_exception(e)
-                        else:
-                            result = (new_edge, new_vertex)
-                        future.set_result(result)
-
-                new_edge_future.add_done_callback(on_edge)
-
-        new_vertex_future.add_done_callback(on_vertex)
-
-        return future
+                edge_params, vertex_params = row
+            new_vertex = self._new_entity(vertex_type, vertex_params)
+            new_edge = self._new_entity(edge_type, edge_params,
+                                        *self._edge_vertices(new_vertex))
+            new_vertex.pre_save()
+            new_edge.pre_save()
+            pairs.append((new_edge, new_vertex))
+        return pairs
+
+    def _bulk_create(self, pairs, batch_size=BULK_CREATE_BATCH_SIZE,
+                     concurrency=BULK_CREATE_CONCURRENCY, **kwargs):
+        """ Operation behind :meth:`bulk_create` """
+        if not pairs:
+            raise Return([])
+        edge_type, vertex_type = type(pairs[0][0]), type(pairs[0][1])
+        params = []
+        for new_edge, new_vertex in pairs:
+            params.append(list(new_vertex.as_save_params()) +
+                          list(new_edge.as_save_params()))
+        results = yield vertex_type._bulk_submit(
+            '_create_relationships', params, batch_size, concurrency,
+            vid=self.top_level_vertex._id,
+            in_direction=self.direction == IN,
+            elabel=edge_type.get_label(), **kwargs)
+        vertex_type._bulk_saved([v for _, v in pairs],
+                                [vid for _, vid in results])
+        edge_type._bulk_saved([e for e, _ in pairs],
+                              [eid for eid, _ in results])
+        raise Return(pairs)
+
+    def _record_create(self, unit_of_work, edge_params, vertex_params,
+                       edge_type, vertex_type):
+        """
+        Operation recording the vertex and edge of :meth:`create` in a
+        :class:`goblin.session.Session` and waiting for its flush
+        """
+        new_vertex = self._new_entity(vertex_type, vertex_params)
+        new_edge = self._new_entity(edge_type, edge_params,
+                                    *self._edge_vertices(new_vertex))
+        futures = [unit_of_work.save(element)
+                   for element in (new_vertex, new_edge)]
+        for future in futures:
+            yield future
+        raise Return((new_edge, new_vertex))
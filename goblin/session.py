@@ -0,0 +1,219 @@
+"""
+Unit of work sending many saves and deletes in one request.
+
+Inside a :class:`Session` block, the ``save`` and ``delete`` calls of
+vertices and edges and
+:meth:`Relationship.create<goblin.relationships.base.Relationship.create>`
+are recorded instead of being sent one by one. :meth:`Session.flush` sends
+them as a single request, applied by the server in one transaction, and
+resolves their futures::
+
+    session = Session()
+    with session:
+        person = Person(name='Leif')
+        saved = person.save()
+        # the edge refers to the person before it has an id
+        Knows(person, friend).save()
+        old_friend.delete()
+    yield session.flush()
+    assert (yield saved) is person
+
+Saved elements are updated in place with their ids. If the flush fails,
+nothing is applied and every recorded future fails with its error.
+
+Futures recorded in a block resolve once the session is flushed, so don't
+wait on them before: in ``async def`` code, record the calls with
+:meth:`Session.save` and :meth:`Session.delete` rather than awaiting
+``asave``.
+"""
+from __future__ import unicode_literals
+import logging
+import threading
+
+from goblin import connection, identity
+from goblin.constants import EDGE_TRAVERSAL, VERTEX_TRAVERSAL
+from goblin.coroutines import Return, run
+from goblin.exceptions import GoblinException
+
+try:
+    import contextvars
+except ImportError:  # pragma: no cover
+    contextvars = None
+
+
+logger = logging.getLogger(__name__)
+
+if contextvars is not None:
+    _current = contextvars.ContextVar('goblin_session', default=None)
+
+    def current():
+        """ The session of the current block, ``None`` outside one """
+        return _current.get()
+
+    def _set_current(session):
+        _current.set(session)
+
+else:  # pragma: no cover
+    _local = threading.local()
+
+    def current():
+        """ The session of the current block, ``None`` outside one """
+        return getattr(_local, 'session', None)
+
+    def _set_current(session):
+        _local.session = session
+
+
+class Session(object):
+    """ Records saves and deletes until flushed, see module docs """
+
+    def __init__(self):
+        # (operation, element, future) in order
+        self._operations = []
+        # id(element) -> (element, index of the operation creating it)
+        self._new = {}
+        self._previous = []
+
+    def __enter__(self):
+        self._previous.append(current())
+        _set_current(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _set_current(self._previous.pop())
+        return False
+
+    def __len__(self):
+        return len(self._operations)
+
+    def save(self, element, **kwargs):
+        """
+        Record the save of ``element``.
+
+        :returns: Future - the element, once flushed
+        """
+        with self:
+            return element.save(**kwargs)
+
+    def delete(self, element, **kwargs):
+        """
+        Record the deletion of ``element``.
+
+        :returns: Future - resolved once flushed
+        """
+        with self:
+            return element.delete(**kwargs)
+
+    def flush(self, **kwargs):
+        """
+        Send the recorded operations as one request and resolve their
+        futures.
+
+        :returns: Future - list of the results of the operations, in order
+        """
+        future = connection.get_future(kwargs)
+        return run(self._flush(**kwargs), future)
+
+    def _reference(self, element):
+        """ Refer to a vertex or edge saved before or in this session """
+        new = self._new.get(id(element))
+        if new is not None:
+            return [True, new[1]]
+        element_id = getattr(element, '_id', element)
+        if element_id is None:
+            return None
+        return [False, element_id]
+
+    def _record(self, operation, element):
+        future = connection.get_future({})
+        self._operations.append((operation, element, future))
+        return future
+
+    def record_save(self, element):
+        """
+        Record the save of a validated element.
+
+        :returns: Future - the element, once flushed
+        """
+        from goblin.models import Edge
+        attrs, geo_attrs = element.as_save_params()
+        ref = self._reference(element)
+        if isinstance(element, Edge):
+            vertices = []
+            if ref is None:
+                for vertex in (element._outV, element._inV):
+                    vertex_ref = self._reference(vertex)
+                    if vertex_ref is None:
+                        raise GoblinException(
+                            "%r is not saved" % (vertex, ))
+                    vertices.append(vertex_ref)
+            else:
+                vertices = [None, None]
+            operation = ['save_edge', ref] + vertices + [
+                element.get_label(), attrs, geo_attrs,
+                element.__exclusive__]
+        else:
+            operation = ['save_vertex', ref, element.get_label(), attrs,
+                         geo_attrs]
+        if ref is None:
+            self._new[id(element)] = (element, len(self._operations))
+        return self._record(operation, element)
+
+    def record_delete(self, element):
+        """
+        Record the deletion of an element, saved before or in this session.
+
+        :returns: Future - resolved once flushed
+        """
+        ref = self._reference(element)
+        if ref is None:
+            raise GoblinException("%r is not saved" % (element, ))
+        source = 'vertex' if element._source == VERTEX_TRAVERSAL else 'edge'
+        return self._record(['delete_' + source, ref], element)
+
+    def _flush(self, **kwargs):
+        """ Operation behind :meth:`flush` """
+        from goblin.models import Vertex
+        operations, self._operations = self._operations, []
+        self._new = {}
+        if not operations:
+            raise Return([])
+        logger.debug("Flushing %d operations", len(operations))
+        try:
+            stream = yield Vertex._gremlin_methods['_flush_session'].submit(
+                Vertex, [operation for operation, _, _ in operations],
+                deserialize=False, **kwargs)
+            ids = []
+            while True:
+                message = yield stream.read()
+                if message is None:
+                    break
+                ids.extend(message.data or [])
+        except Exception as e:
+            for _, _, future in operations:
+                future.set_exception(e)
+            raise
+        element_cache = connection.get_cache()
+        identity_map = identity.current()
+        results = []
+        for (operation, element, future), element_id in zip(operations, ids):
+            if operation[0].startswith('save'):
+                element._id = element_id
+                element._mark_saved()
+                if identity_map is not None:
+                    identity_map.add(element)
+                result = element
+            else:
+                if identity_map is not None:
+                    identity_map.discard(element)
+                result = None
+            if element_cache is not None:
+                if (operation[0] == 'delete_vertex' or
+                        operation[0] == 'save_edge' and operation[7]):
+                    # the edges of the vertex are gone too, or the other
+                    # edges replaced by an exclusive edge
+                    element_cache.invalidate_source(EDGE_TRAVERSAL)
+                element_cache.invalidate(element._source, element_id)
+            results.append(result)
+            future.set_result(result)
+        raise Return(results)
@@ -0,0 +1,183 @@
+
+def _read_schema() {
+    /**
+     * Reads the names of the schema elements of the graph
+     *
+     * :returns: map of the vertex labels, edge labels, property keys, graph
+     *   indexes and [edge label, name] of the vertex-centric edge indexes
+     */
+    def mgmt = graph.openManagement()
+    try {
+        def edgeLabels = mgmt.getRelationTypes(EdgeLabel.class).toList()
+        def edgeIndexes = []
+        for (edgeLabel in edgeLabels) {
+            for (index in mgmt.getRelationIndexes(edgeLabel)) {
+                edgeIndexes << [edgeLabel.name(), index.name()]
+            }
+        }
+        def graphIndexes = mgmt.getGraphIndexes(Vertex.class).toList() +
+            mgmt.getGraphIndexes(Edge.class).toList()
+        return [vertex_labels: mgmt.getVertexLabels().collect{it.name()},
+                edge_labels: edgeLabels.collect{it.name()},
+                property_keys: mgmt.getRelationTypes(PropertyKey.class).collect{it.name()},
+                graph_indexes: graphIndexes.collect{it.name()},
+                edge_indexes: edgeIndexes]
+    } finally {
+        mgmt.rollback()
+    }
+}
+
+def _apply_schema(vertex_labels, edge_labels, property_keys, graph_indexes, edge_indexes, reindex) {
+    /**
+     * Creates schema elements, then waits for the new indexes to be enabled
+     *
+     * :param vertex_labels: names of the vertex labels to create
+     * :param edge_labels: names of the edge labels to create
+     * :param property_keys: list of [name, data type, cardinality]
+     * :param graph_indexes: list of [name, 'vertex' or 'edge', label, keys,
+     *   backend], a composite index if the backend is null, else a mixed
+     *   index in that indexing backend
+     * :param edge_indexes: list of [name, edge label, keys, direction] of
+     *   the vertex-centric edge indexes
+     * :param reindex: leave the indexes over keys that existed before
+     *   INSTALLED, to be enabled once the existing elements are reindexed
+     */
+    def dataTypes = [String: String.class, Short: Short.class,
+                     Integer: Integer.class, Long: Long.class,
+                     Float: Float.class, Double: Double.class,
+                     Boolean: Boolean.class, Geoshape: Geoshape.class,
+                     Object: Object.class]
+    def mgmt = graph.openManagement()
+    try {
+        for (name in vertex_labels) {
+            mgmt.makeVertexLabel(name).make()
+        }
+        for (name in edge_labels) {
+            mgmt.makeEdgeLabel(name).make()
+        }
+        for (key in property_keys) {
+            mgmt.makePropertyKey(key[0]).dataType(dataTypes[key[1]]).cardinality(Cardinality.valueOf(key[2])).make()
+        }
+        for (index in graph_indexes) {
+            def builder = mgmt.buildIndex(index[0], index[1] == 'edge' ? Edge.class : Vertex.class)
+            for (key in index[3]) {
+                builder = builder.addKey(mgmt.getPropertyKey(key))
+            }
+            builder = builder.indexOnly(index[1] == 'edge' ? mgmt.getEdgeLabel(index[2]) : mgmt.getVertexLabel(index[2]))
+            if (index[4] == null) {
+                builder.buildCompositeIndex()
+            } else {
+                builder.buildMixedIndex(index[4])
+            }
+        }
+        for (index in edge_indexes) {
+            def keys = index[2].collect{mgmt.getPropertyKey(it)} as PropertyKey[]
+            mgmt.buildEdgeIndex(mgmt.getEdgeLabel(index[1]), index[0], Direction.valueOf(index[3]), keys)
+        }
+        mgmt.commit()
+    } catch (err) {
+        mgmt.rollback()
+        throw(err)
+    }
+
+    // indexes over keys that existed before stay INSTALLED until every
+    // instance of the graph knows them, then have to be enabled
+    def status = { mgmt2, index ->
+        if (index.size() == 5) {
+            def graphIndex = mgmt2.getGraphIndex(index[0])
+            return graphIndex.getIndexStatus(graphIndex.getFieldKeys()[0])
+        }
+        return mgmt2.getRelationIndex(mgmt2.getEdgeLabel(index[1]), index[0]).getIndexStatus()
+    }
+    def awaitStatus = { index, schemaStatus ->
+        if (index.size() == 5) {
+            ManagementSystem.awaitGraphIndexStatus(graph, index[0]).status(schemaStatus).call()
+        } else {
+            ManagementSystem.awaitRelationIndexStatus(graph, index[0], index[1]).status(schemaStatus).call()
+        }
+    }
+    def indexes = graph_indexes + edge_indexes
+    if (reindex) {
+        return indexes.collect{it[0]}
+    }
+    mgmt = graph.openManagement()
+    def installed = indexes.findAll{status(mgmt, it) == SchemaStatus.INSTALLED}
+    mgmt.rollback()
+    for (index in installed) {
+        awaitStatus(index, SchemaStatus.REGISTERED)
+    }
+    mgmt = graph.openManagement()
+    try {
+        def registered = indexes.findAll{status(mgmt, it) == SchemaStatus.REGISTERED}
+        for (index in registered) {
+            if (index.size() == 5) {
+                mgmt.updateIndex(mgmt.getGraphIndex(index[0]), SchemaAction.ENABLE_INDEX)
+            } else {
+                mgmt.updateIndex(mgmt.getRelationIndex(mgmt.getEdgeLabel(index[1]), index[0]), SchemaAction.ENABLE_INDEX)
+            }
+        }
+        mgmt.commit()
+        for (index in registered) {
+            awaitStatus(index, SchemaStatus.ENABLED)
+        }
+    } catch (err) {
+        mgmt.rollback()
+        throw(err)
+    }
+    return indexes.collect{it[0]}
+}
+
+def _index_status(index_name, elabel) {
+    /**
+     * Reads the status of an index and of its reindex job
+     *
+     * :param index_name: name of the graph index, or of the vertex-centric
+     *   index of elabel
+     * :param elabel: edge label of a vertex-centric index, null for a graph
+     *   index
+     * :returns: [status, done, records] of the index and of its last
+     *   reindex job, done and records are null without a job
+     */
+    def mgmt = graph.openManagement()
+    try {
+        def index
+        def status
+        if (elabel == null) {
+            index = mgmt.getGraphIndex(index_name)
+            status = index.getIndexStatus(index.getFieldKeys()[0])
+        } else {
+            index = mgmt.getRelationIndex(mgmt.getEdgeLabel(elabel), index_name)
+            status = index.getIndexStatus()
+        }
+        def job = mgmt.getIndexJobStatus(index)
+        if (job == null) {
+            return [status.name(), null, null]
+        }
+        // IndexRepairJob.ADDED_RECORDS_COUNT
+        def records = job.getIntermediateResult().getCustom('adds')
+        return [status.name(), job.isDone(), records]
+    } finally {
+        mgmt.rollback()
+    }
+}
+
+def _update_index(index_name, elabel, action) {
+    /**
+     * Starts an action on an index without waiting for it to complete
+     *
+     * :param index_name: name of the graph index, or of the vertex-centric
+     *   index of elabel
+     * :param elabel: edge label of a vertex-centric index, null for a graph
+     *   index
+     * :param action: name of the SchemaAction, e.g. REINDEX
+     */
+    def mgmt = graph.openManagement()
+    try {
+        def index = elabel == null ? mgmt.getGraphIndex(index_name) : mgmt.getRelationIndex(mgmt.getEdgeLabel(elabel), index_name)
+        mgmt.updateIndex(index, SchemaAction.valueOf(action))
+        mgmt.commit()
+    } catch (err) {
+        mgmt.rollback()
+        throw(err)
+    }
+}
@@ -1,8 +1,47 @@
+"""
+Schema of the graph.
+
+:py:func:`generate_spec` derives the schema the registered models need from
+their properties: a property key per property, with the ``data_type`` and
+``cardinality`` of the property type, and for the properties defined with
+``index=True``:
+
+* a composite index of the label, for equality lookups, or a mixed index
+  in the indexing backend named by ``index_ext``, e.g. ``'search'``, which
+  answers range and text predicates as well
+* a vertex-centric index of edge labels, ordering the edges of a vertex by
+  the property
+
+:py:func:`sync_spec` creates the parts missing from the graph::
+
+    >>> yield spec.sync_spec()
+
+Keys and indexes that exist are left as they are, the schema of a Titan
+graph cannot be changed once made.
+
+An index over a key that already holds data only covers the elements
+written after it is enabled. :py:func:`reindex` backfills it::
+
+    >>> yield spec.reindex('person_by_person_email')
+"""
 from __future__ import unicode_literals
 from six import print_
 import json
+import logging
+import os.path
+import time
 
 from goblin import connection
+from goblin.constants import BOTH, SINGLE
+from goblin.coroutines import Return, run
+from goblin.exceptions import ElementDefinitionException, GoblinException
+from goblin.gremlin import parse
+
+
+logger = logging.getLogger(__name__)
+
+
+_GROOVY_PATH = os.path.join(os.path.dirname(__file__), 'spec.groovy')
 
 
 def get_existing_indices():
@@ -57,7 +96,8 @@ def change_property_key_name(old_name, new_name, graph_name=None, **kwargs):
 
 def _property_handler(script, graph_name, **kwargs):
     future = connection.get_future(kwargs)
-    future_response = connection.execute_query(script, graph_name=graph_name)
+    future_response = connection.execute_query(script, graph_name=graph_name,
+                                                write=True)
 
     def on_read(f2):
         try:
@@ -80,52 +120,289 @@ def _property_handler(script, graph_name, **kwargs):
     return future
 
 
-def write_diff_indices_to_file(filename, spec=None):  # pragma: no cover
-    """ Preview of index diff specification to write to file
+def generate_spec(models=None):
+    """
+    The schema needed by ``models``, all the loaded models by default.
 
-    :param filename: The file to write to
-    :type filename: basestring
+    :param models: The vertex and edge models
+    :type models: list
+    :returns: dict of the ``vertex_labels`` and ``edge_labels`` names, the
+        ``property_keys``, ``composite_indexes``, ``mixed_indexes`` and
+        vertex-centric ``edge_indexes``, each a list of dicts
+    :raises: ElementDefinitionException if properties of different models
+        need different keys of the same name
     """
-    if not spec:
-        print_("Generating Specification...")
-        spec = connection.generate_spec()
-    print_("Writing Compiled Diff Indices to File %s ..." % filename)
-    vertex_indices, edge_indices = get_existing_indices()
-    with open(filename, 'wb') as f:
-        for s in spec:
-            for pn, pv in s['properties'].items():
-                if s['element_type'] == 'Edge' and pn not in edge_indices:
-                    f.writelines([pv['compiled'], ])
-                elif s['element_type'] == 'Vertex' and pn not in vertex_indices:
-                    f.writeliness([json.dumps(pv['compiled']), ])
+    from goblin.models import Edge, Vertex
+    if models is None:
+        models = connection._loaded_models
+    spec = {'vertex_labels': [], 'edge_labels': [], 'property_keys': [],
+            'composite_indexes': [], 'mixed_indexes': [], 'edge_indexes': []}
+    keys = {}
+    for model in models:
+        if model.__abstract__:
+            continue
+        if issubclass(model, Vertex):
+            element = 'vertex'
+        elif issubclass(model, Edge):
+            element = 'edge'
+        else:  # pragma: no cover
+            continue
+        label = model.get_label()
+        labels = spec['{}_labels'.format(element)]
+        if label in labels:
+            # a model defined again, e.g. by reloading its module
+            continue
+        labels.append(label)
+        for prop in sorted(model._properties.values(),
+                           key=lambda prop: prop.position):
+            name = prop.db_field_name
+            key = {'name': name, 'data_type': prop.data_type,
+                   'cardinality': prop.cardinality}
+            if element == 'edge' and prop.cardinality != SINGLE:
+                raise ElementDefinitionException(
+                    "{}.{}: edge properties have a single value".format(
+                        model.__name__, prop.property_name))
+            if name not in keys:
+                keys[name] = key
+                spec['property_keys'].append(key)
+            elif keys[name] != key:
+                raise ElementDefinitionException(
+                    "{}.{} needs the key {}, which is defined as {}".format(
+                        model.__name__, prop.property_name, key, keys[name]))
+            if not prop.index:
+                continue
+            index = {'element': element, 'label': label, 'keys': [name]}
+            if prop.index_ext:
+                index.update(name='{}_by_{}_{}'.format(label, name,
+                                                       prop.index_ext),
+                             backend=prop.index_ext)
+                spec['mixed_indexes'].append(index)
+            else:
+                index['name'] = '{}_by_{}'.format(label, name)
+                spec['composite_indexes'].append(index)
+            if element == 'edge':
+                spec['edge_indexes'].append({
+                    'name': 'by_{}'.format(name), 'label': label,
+                    'keys': [name], 'direction': BOTH.upper()})
+    return spec
 
 
-def write_compiled_indices_to_file(filename, spec=None):  # pragma: no cover
-    """ Write the compile index specification to file
+def diff_spec(spec, schema):
+    """
+    The parts of ``spec`` missing from ``schema``.
 
-    :param filename: The file to write to
-    :type filename: basestring
+    :param dict spec: The schema needed, see :func:`generate_spec`
+    :param dict schema: The names of the elements of the schema of the
+        graph, as read by :func:`sync_spec`
+    :returns: dict of the same form as ``spec``
     """
-    if not spec:
-        print_("Generating Specification...")
-        spec = connection.generate_spec()
-    print_("Writing Compiled Indices to File %s ..." % filename)
-    with open(filename, 'wb') as f:
-        for s in spec:
-            for pn, pv in s['properties'].items():
-                f.writelines([json.dumps(pv['compiled']), ])
+    graph_indexes = set(schema.get('graph_indexes') or [])
+    edge_indexes = set(tuple(index)
+                       for index in schema.get('edge_indexes') or [])
+    return {
+        'vertex_labels': [name for name in spec['vertex_labels']
+                          if name not in (schema.get('vertex_labels') or [])],
+        'edge_labels': [name for name in spec['edge_labels']
+                        if name not in (schema.get('edge_labels') or [])],
+        'property_keys': [key for key in spec['property_keys']
+                          if key['name'] not in (
+                              schema.get('property_keys') or [])],
+        'composite_indexes': [index for index in spec['composite_indexes']
+                              if index['name'] not in graph_indexes],
+        'mixed_indexes': [index for index in spec['mixed_indexes']
+                          if index['name'] not in graph_indexes],
+        'edge_indexes': [index for index in spec['edge_indexes']
+                         if (index['label'], index['name']) not in
+                         edge_indexes],
+    }
+
+
+def sync_spec(spec=None, dry_run=False, reindex=False, **kwargs):
+    """
+    Create the parts of ``spec`` missing from the schema of the graph, and
+    wait for the new indexes to be enabled.
+
+    :param dict spec: The schema needed, :func:`generate_spec` by default
+    :param bool dry_run: Only compare ``spec`` with the schema of the graph
+    :param bool reindex: Backfill the new indexes over keys that existed
+        before, enabling them only once backfilled, passing the
+        ``poll_interval``, ``metric_manager`` and ``loop`` keyword
+        arguments on to :func:`reindex`
+    :returns: Future - the missing parts, see :func:`diff_spec`
+    """
+    future = connection.get_future(kwargs)
+    return run(_sync_spec(spec, dry_run, reindex, **kwargs), future)
+
 
+def _sync_spec(spec, dry_run, reindex, **kwargs):
+    if spec is None:
+        spec = generate_spec()
+    reindex_kwargs = dict(kwargs)
+    query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+    query_kwargs.pop('future_class', None)
+    stream = yield connection.submit(_script('_read_schema'), **query_kwargs)
+    schema = (yield _read_all(stream))[0]
+    missing = diff_spec(spec, schema)
+    if dry_run or not any(missing.values()):
+        raise Return(missing)
+    graph_indexes = [
+        [index['name'], index['element'], index['label'], index['keys'],
+         index.get('backend')]
+        for index in missing['composite_indexes'] + missing['mixed_indexes']]
+    bindings = {
+        'vertex_labels': missing['vertex_labels'],
+        'edge_labels': missing['edge_labels'],
+        'property_keys': [[key['name'], key['data_type'], key['cardinality']]
+                          for key in missing['property_keys']],
+        'graph_indexes': graph_indexes,
+        'edge_indexes': [[index['name'], index['label'], index['keys'],
+                          index['direction']]
+                         for index in missing['edge_indexes']],
+        # the reindex enables the indexes over existing keys once done
+        'reindex': reindex}
+    stream = yield connection.submit(_script('_apply_schema'),
+                                     bindings=bindings, write=True,
+                                     **query_kwargs)
+    yield _read_all(stream)
+    if reindex:
+        new_keys = set(key['name'] for key in missing['property_keys'])
+        for index in (missing['composite_indexes'] +
+                      missing['mixed_indexes'] + missing['edge_indexes']):
+            if not new_keys.issuperset(index['keys']):
+                label = index['label'] if 'direction' in index else None
+                yield _reindex(index['name'], label, **reindex_kwargs)
+    raise Return(missing)
 
-def write_specs_to_file(filename):  # pragma: no cover
+
+def reindex(index_name, label=None, poll_interval=5, metric_manager=None,
+            loop=None, **kwargs):
+    """
+    Index the elements already in the graph for a new index, then enable
+    it. The index is polled every ``poll_interval`` seconds from the event
+    loop, so the reindex job of the server may take as long as it needs.
+
+    The number of elements indexed so far is added to the
+    ``goblin.reindex.<index_name>.records`` counters of ``metric_manager``
+    as the job progresses, and the duration of the reindex to its
+    ``goblin.reindex.<index_name>.timer`` timers once done.
+
+    :param str index_name: The name of the graph index, or of the
+        vertex-centric index of the edge label ``label``
+    :param str label: The edge label of a vertex-centric index
+    :param float poll_interval: Seconds between status reads
+    :param metric_manager: Reports the progress (optional)
+    :type metric_manager: goblin.metrics.manager.MetricManager
+    :param loop: The event loop, the current
+        :py:class:`tornado.ioloop.IOLoop` by default
+    :returns: Future - the number of elements indexed
+    """
+    future = connection.get_future(kwargs)
+    return run(_reindex(index_name, label, poll_interval, metric_manager,
+                        loop, **kwargs), future)
+
+
+def _reindex(index_name, label, poll_interval=5, metric_manager=None,
+             loop=None, **kwargs):
+    future_class = kwargs.get('future_class')
+    query_kwargs = connection.pop_execute_query_kwargs(kwargs)
+    query_kwargs.pop('future_class', None)
+    metric_key = 'goblin.reindex.{}'.format(index_name)
+    started = time.time()
+
+    def index_status():
+        stream = yield connection.submit(
+            _script('_index_status'),
+            bindings={'index_name': index_name, 'elabel': label},
+            **query_kwargs)
+        raise Return((yield _read_all(stream)))
+
+    def update_index(action):
+        stream = yield connection.submit(
+            _script('_update_index'),
+            bindings={'index_name': index_name, 'elabel': label,
+                      'action': action},
+            write=True, **query_kwargs)
+        yield _read_all(stream)
+
+    def wait():
+        return _sleep(poll_interval, loop, future_class)
+
+    status, done, records = yield index_status()
+    # the index is INSTALLED until every instance of the graph knows it
+    while status == 'INSTALLED':
+        yield wait()
+        status, done, records = yield index_status()
+    if status == 'DISABLED':
+        raise GoblinException("Index {} is disabled".format(index_name))
+
+    yield update_index('REINDEX')
+    logger.info("Reindexing %s", index_name)
+    reported = 0
+    while True:
+        yield wait()
+        status, done, records = yield index_status()
+        if records and records > reported:
+            if metric_manager is not None:
+                for counter in metric_manager.counters(
+                        metric_key + '.records'):
+                    counter.inc(records - reported)
+            reported = records
+            logger.info("Reindexing %s: %s elements", index_name, records)
+        if done is None or done:
+            break
+
+    if status == 'REGISTERED':
+        yield update_index('ENABLE_INDEX')
+    while status != 'ENABLED':
+        yield wait()
+        status, done, records = yield index_status()
+    if metric_manager is not None:
+        for timer in metric_manager.timers(metric_key + '.timer'):
+            timer._update(time.time() - started)
+    logger.info("Reindexed %s: %s elements", index_name, reported)
+    raise Return(reported)
+
+
+def _sleep(seconds, loop, future_class):
+    """ A future resolved after ``seconds``, without blocking the loop """
+    if loop is None:
+        try:
+            from tornado.ioloop import IOLoop
+        except ImportError:  # pragma: no cover
+            import asyncio
+            loop = asyncio.get_event_loop()
+        else:
+            loop = IOLoop.current()
+    future = connection.get_future({'future_class': future_class})
+    loop.call_later(seconds, future.set_result, None)
+    return future
+
+
+def _read_all(stream):
+    results = []
+    while True:
+        message = yield stream.read()
+        if message is None:
+            raise Return(results)
+        results.extend(message.data or [])
+
+
+def _script(name):
+    for function in parse(_GROOVY_PATH).functions:
+        if function is not None and function.name == name:
+            return function.body
+    raise KeyError(name)  # pragma: no cover
+
+
+def write_specs_to_file(filename, spec=None):  # pragma: no cover
     """ Generate and write a specification to file
 
     :param filename: The file to write to
     :type filename: basestring
     """
-    print_("Generating Specification...")
-    spec = connection.generate_spec()
+    if not spec:
+        print_("Generating Specification...")
+        spec = generate_spec()
     print_("Writing Specification to File %s ..." % filename)
-    with open(filename, 'wb') as f:
-        json.dump(spec, f)
-    write_compiled_indices_to_file(filename+'.idx', spec=spec)
-    write_compiled_indices_to_file(filename+'.idxdiff', spec=spec)
+    with open(filename, 'w') as f:
+        json.dump(spec, f, indent=2, sort_keys=True)
@@ -0,0 +1,118 @@
+"""
+Streaming reads of large results.
+
+A :class:`ResultStream` reads a response one server batch at a time. The
+next batch is only requested from the connection when the previous one has
+been consumed, so a slow consumer holds the server back instead of
+buffering the whole response, and results are deserialized as they are
+read rather than when the batch arrives. Closing the stream early drops
+its connection, which stops the server from sending the rest::
+
+    results = V(person).out_step(Knows).stream()
+    batch = yield results.read()
+    while batch is not None and not any(p.name == 'Leif' for p in batch):
+        batch = yield results.read()
+    yield results.close()
+"""
+from __future__ import unicode_literals
+import logging
+
+from goblin import connection
+from goblin.coroutines import Return, run
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResultStream(object):
+    """
+    Lazily deserialized results of an operation returning a response
+    stream. See :py:mod:`goblin.coroutines` for operations.
+
+    :param operation: Operation returning a raw response stream, i.e. one
+        sent with ``deserialize=False``
+    :param bool deserialize: Deserialize the raw results into elements
+    :param class future_class: type of Future (optional)
+    """
+
+    def __init__(self, operation, deserialize=True, future_class=None):
+        self._operation = operation
+        self._deserialize = deserialize
+        self._future_class = future_class
+        self._stream = None
+        self._closed = False
+
+    @property
+    def closed(self):
+        """ True once every batch was read or the stream was closed """
+        return self._closed
+
+    def read(self, **kwargs):
+        """
+        Read the next batch of results.
+
+        :returns: Future - list of results, or ``None`` once the stream is
+            exhausted
+        """
+        kwargs.setdefault('future_class', self._future_class)
+        future = connection.get_future(kwargs)
+        return run(self._read_batch(deserialize=True), future)
+
+    def close(self, **kwargs):
+        """
+        Stop reading. If the response is still being sent, its connection
+        is closed, so the server stops sending, and removed from the pool.
+
+        :returns: Future
+        """
+        kwargs.setdefault('future_class', self._future_class)
+        future = connection.get_future(kwargs)
+        return run(self._close(), future)
+
+    def deserialize(self, result):
+        """ Deserialize a single raw result as requested """
+        if self._deserialize:
+            from goblin.gremlin.base import GremlinMethod
+            return GremlinMethod._deserialize(result)
+        return result
+
+    def _open(self):
+        if self._stream is None:
+            self._stream = yield self._operation
+        raise Return(self._stream)
+
+    def _read_batch(self, deserialize=False):
+        """ Operation reading the next (raw) batch """
+        if self._closed:
+            raise Return(None)
+        stream = yield self._open()
+        batch = yield stream.read()
+        if batch is None:
+            self._closed = True
+            raise Return(None)
+        if hasattr(batch, 'data'):
+            # streams without handlers return the whole message
+            batch = batch.data
+        if batch is None:  # no content
+            batch = []
+        elif isinstance(batch, dict):
+            batch = list(batch.values())
+        if deserialize:
+            batch = [self.deserialize(result) for result in batch]
+        raise Return(batch)
+
+    def _close(self):
+        """ Operation behind :meth:`close` """
+        self._closed = True
+        # gremlinclient drops the connection of a stream once the last
+        # message was read
+        conn = getattr(self._stream, '_conn', None)
+        if conn is not None:
+            self._stream._closed = True
+            pool = conn._pool
+            logger.debug("Closing unfinished stream on %s", conn)
+            yield conn.close()
+            if pool is not None:
+                # forget the connection, releasing its slot
+                yield pool.release(conn)
+        raise Return(None)
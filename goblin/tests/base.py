@@ -4,12 +4,18 @@ from nose.tools import nottest
 from tornado import concurrent
 from tornado.ioloop import IOLoop
 from tornado.testing import gen_test, AsyncTestCase
-from gremlinclient.tornado_client import Pool
 from goblin.connection import setup, sync_spec, tear_down
 from goblin.models import Vertex, Edge
 from goblin.properties import Double, Integer, String
 import os
 
+# GOBLIN_TEST_BACKEND=memory runs the suites of tox.ini against the
+# in-process stand-in instead of a Gremlin Server listening on localhost:8182
+if os.environ.get('GOBLIN_TEST_BACKEND') == 'memory':
+    from goblin.memory import Pool
+else:
+    from gremlinclient.tornado_client import Pool
+
 _val = 0
 
 
@@ -1,5 +1,6 @@
 from __future__ import unicode_literals
 import datetime
+import os.path
 from pytz import utc
 from uuid import uuid4
 from nose.plugins.attrib import attr
@@ -7,6 +8,7 @@ from nose.plugins.attrib import attr
 from tornado.testing import gen_test
 
 from goblin.exceptions import GoblinGremlinException
+from goblin.memory.functions import groovy_function, register_groovy_file
 from goblin.tests.base import BaseGoblinTestCase
 
 from goblin.models import Vertex
@@ -29,6 +31,36 @@ class GroovyTestModel(Vertex):
     arg_test2 = gremlin.GremlinValue()
 
 
+# groovy_test_model.groovy for GOBLIN_TEST_BACKEND=memory
+register_groovy_file(os.path.join(os.path.dirname(__file__),
+                                  'groovy_test_model.groovy'))
+
+
+@groovy_function('get_self')
+def _get_self(graph, eid):
+    return [graph.get_vertex(eid)]
+
+
+@groovy_function('return_value')
+def _return_value(graph, eid, val):
+    return val
+
+
+@groovy_function('return_list')
+def _return_list(graph, eid):
+    return list(range(11))
+
+
+@groovy_function('arg_test1')
+def _arg_test1(graph, self):
+    return [graph.get_vertex(self)]
+
+
+@groovy_function('arg_test2')
+def _arg_test2(graph, my_id):
+    return [graph.get_vertex(my_id)]
+
+
 @attr('unit', 'gremlin')
 class TestMethodLoading(BaseGoblinTestCase):
 
@@ -1,11 +1,16 @@
 from __future__ import unicode_literals
 from goblin._compat import print_
 import os
+import shutil
+import tempfile
 from nose.plugins.attrib import attr
 from goblin.tests.base import BaseGoblinTestCase
+import goblin
+from goblin.gremlin import groovy
 from goblin.gremlin.groovy import (parse, GroovyImportParser,
                                    GroovyFunctionParser, GroovyImport,
                                    GroovyFunction, GroovyFileDef)
+from goblin.tests.base import TestVertexModel
 
 
 @attr('unit', 'groovy')
@@ -81,3 +86,54 @@ class GroovyScannerTest(BaseGoblinTestCase):
 
         result = GroovyFunctionParser.parse(1)
         self.assertEqual(result, None)
+
+
+@attr('unit', 'groovy')
+class GroovyParseCacheTest(BaseGoblinTestCase):
+    """
+    Test the caches of parsed groovy files
+    """
+
+    def setUp(self):
+        super(GroovyParseCacheTest, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.groovy_file = os.path.join(self.tmp_dir, 'test.groovy')
+        self.write('def first(a) {\n    a\n}\n', 1000)
+
+    def write(self, text, mtime):
+        with open(self.groovy_file, 'w') as f:
+            f.write(text)
+        os.utime(self.groovy_file, (mtime, mtime))
+
+    def test_modified_file_is_parsed_again(self):
+        self.assertEqual(parse(self.groovy_file).functions[0].name, 'first')
+        self.assertIs(parse(self.groovy_file), parse(self.groovy_file))
+        self.write('def second(a) {\n    a\n}\n', 2000)
+        self.assertEqual(parse(self.groovy_file).functions[0].name, 'second')
+
+    def test_cache_dir(self):
+        cache_dir = os.path.join(self.tmp_dir, 'cache')
+        groovy.set_cache_dir(cache_dir)
+        self.addCleanup(groovy.set_cache_dir, None)
+        result = parse(self.groovy_file)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        # another process loads the file from the cache
+        del groovy._parsed_file_cache[self.groovy_file]
+        parse_file = groovy._parse_file
+        groovy._parse_file = None
+        try:
+            self.assertEqual(parse(self.groovy_file), result)
+        finally:
+            groovy._parse_file = parse_file
+
+        self.write('def second(a) {\n    a\n}\n', 2000)
+        del groovy._parsed_file_cache[self.groovy_file]
+        self.assertEqual(parse(self.groovy_file).functions[0].name, 'second')
+
+    def test_warmup(self):
+        self.assertEqual(goblin.warmup([TestVertexModel]),
+                         len(TestVertexModel._gremlin_methods))
+        for method in TestVertexModel._gremlin_methods.values():
+            self.assertTrue(method.is_setup)
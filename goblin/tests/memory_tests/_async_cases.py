@@ -0,0 +1,143 @@
+from nose.plugins.attrib import attr
+from tornado.testing import gen_test
+
+from goblin import aio, connection
+from goblin.constants import RESULT_ITERATION_BATCH_SIZE
+from goblin.exceptions import GoblinQueryError
+from goblin.models import E, V
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase
+from goblin.tests.relationships_tests.vertex_relationship_io_tests import (
+    TestRelationshipVertexModel)
+
+
+@attr('unit', 'memory')
+class TestAsyncAPI(BaseMemoryTestCase):
+
+    @gen_test
+    async def test_save_get_reload_delete(self):
+        v1 = await TestVertexModel.acreate(name='a', test_val=1)
+        self.assertIsNotNone(v1.id)
+        v2 = await TestVertexModel.aget(v1.id)
+        self.assertEqual(v2, v1)
+        self.assertEqual(v2.name, 'a')
+
+        v2.test_val = 2
+        await v2.asave()
+        await v1.areload()
+        self.assertEqual(v1.test_val, 2)
+
+        await v1.adelete()
+        with self.assertRaises(TestVertexModel.DoesNotExist):
+            await TestVertexModel.aget(v1.id)
+
+    @gen_test
+    async def test_all(self):
+        v1 = await TestVertexModel.acreate(name='a')
+        v2 = await TestVertexModel.acreate(name='b')
+        results = await TestVertexModel.aall([v1.id, v2.id])
+        self.assertEqual(results, [v1, v2])
+        names = []
+        async for vertex in TestVertexModel.aall([v1.id, v2.id]):
+            names.append(vertex.name)
+        self.assertEqual(names, ['a', 'b'])
+
+    @gen_test
+    async def test_traversals(self):
+        v1 = await TestVertexModel.acreate(name='a')
+        v2 = await TestVertexModel.acreate(name='b')
+        e1 = await TestEdgeModel.acreate(v1, v2, name='e')
+
+        self.assertEqual(await v1.aoutV(TestEdgeModel), [v2])
+        self.assertEqual(await v2.ainE(), [e1])
+        self.assertEqual(await e1.aoutV(), v1)
+        self.assertEqual(await e1.ainV(), v2)
+
+        self.assertEqual(await V(v1).aget(), v1)
+        out = [v async for v in V(v1).out_step(TestEdgeModel)]
+        self.assertEqual(out, [v2])
+
+    @gen_test
+    async def test_streaming(self):
+        source = await TestVertexModel.acreate(name='source')
+        for i in range(RESULT_ITERATION_BATCH_SIZE + 1):
+            target = await TestVertexModel.acreate(name='target')
+            await TestEdgeModel.acreate(source, target)
+
+        pool = connection._connection_pool
+        async with V(source).out_step(TestEdgeModel).aget() as results:
+            vertex = await results.__anext__()
+            self.assertEqual(vertex.name, 'target')
+            # the rest of the batch is deserialized when reached
+            self.assertEqual(len(results._batch),
+                             RESULT_ITERATION_BATCH_SIZE - 1)
+            self.assertIsInstance(results._batch[0], dict)
+        self.assertTrue(results.closed)
+        self.assertEqual(pool.size, pool.freesize)
+        self.assertEqual([v async for v in results], [])
+
+        self.assertEqual(len(await source.aoutV()),
+                         RESULT_ITERATION_BATCH_SIZE + 1)
+
+    @gen_test
+    async def test_start_points(self):
+        v1 = await TestVertexModel.acreate(name='a')
+        v2 = await TestVertexModel.acreate(name='b')
+        e1 = await TestEdgeModel.acreate(v1, v2)
+        e2 = await TestEdgeModel.acreate(v2, v1)
+
+        self.assertEqual(await V.ids([v1, v2.id]).aget(), [v1, v2])
+        self.assertEqual([v async for v in V.ids([v2])], [v2])
+        self.assertEqual(await E(e1).aget(), [e1])
+        self.assertEqual([e async for e in E(e2)], [e2])
+        self.assertEqual(await E.ids([e1, e2]).out_v().aget(), [v1, v2])
+        self.assertEqual([e async for e in E.ids([e2.id])], [e2])
+        self.assertEqual(await V.label(TestVertexModel).acount(), 2)
+
+    @gen_test
+    async def test_missing_element(self):
+        with self.assertRaises(GoblinQueryError):
+            await V(-1).aget()
+
+    @gen_test
+    async def test_relationship(self):
+        v1 = await TestRelationshipVertexModel.acreate(name='a')
+        edge, vertex = await v1.relation.acreate(
+            vertex_params={'name': 'b'})
+        self.assertEqual(vertex.name, 'b')
+        self.assertEqual(await v1.relation.avertices(), [vertex])
+        self.assertEqual(await v1.relation.aedges(), [edge])
+        pairs = await v1.relation.abulk_create([{'name': 'c'}])
+        self.assertEqual(pairs[0][1].name, 'c')
+
+    @gen_test
+    async def test_execute_query(self):
+        v1 = await TestVertexModel.acreate(name='a')
+        stream = await aio.execute_query('g.V(vid)', {'vid': v1.id})
+        message = await stream.read()
+        self.assertEqual(message.data[0]['id'], v1.id)
+
+    @gen_test
+    async def test_bulk_create(self):
+        ids = await TestVertexModel.abulk_create(
+            [{'name': 'a'}, TestVertexModel(name='b')], batch_size=1)
+        vertices = await TestVertexModel.aall(ids)
+        self.assertEqual([v.name for v in vertices], ['a', 'b'])
+        ids = await TestEdgeModel.abulk_create([(ids[0], ids[1])])
+        self.assertEqual(len(await TestEdgeModel.aall(ids)), 1)
+
+    @gen_test
+    async def test_delete(self):
+        v1 = await TestVertexModel.acreate(name='a')
+        await TestVertexModel.acreate(name='b')
+        await TestEdgeModel.acreate(v1, v1)
+        self.assertEqual(await V(v1).out_e().adrop(), 1)
+        self.assertEqual(await TestVertexModel.adelete_where(name='a'), 1)
+
+    @gen_test
+    async def test_upsert(self):
+        v1, created = await TestVertexModel.aget_or_create('name', 'a')
+        self.assertTrue(created)
+        results = await TestVertexModel.abulk_upsert(
+            [{'name': 'a', 'test_val': 5}], key='name')
+        self.assertEqual(results, [(v1, False)])
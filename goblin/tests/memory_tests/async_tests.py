@@ -0,0 +1,7 @@
+from __future__ import unicode_literals
+
+from goblin._compat import PY35
+
+# the test cases use async def syntax
+if PY35:
+    from goblin.tests.memory_tests._async_cases import *  # noqa
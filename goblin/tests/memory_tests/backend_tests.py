@@ -0,0 +1,150 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado.testing import gen_test
+
+from goblin import connection, constants, spec
+from goblin.memory import MemoryGraph, Pool
+from goblin.memory.traversal import Parser, ScriptError, evaluate
+from goblin.models import V
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase
+
+
+@attr('unit', 'memory')
+class TestTraversalEvaluation(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestTraversalEvaluation, self).setUp()
+        self.g = MemoryGraph()
+        self.v1 = self.g.add_vertex('person')
+        self.v1.set_property('age', 30)
+        self.v2 = self.g.add_vertex('person')
+        self.v2.set_property('age', 40)
+        self.v3 = self.g.add_vertex('place')
+        self.e1 = self.g.add_edge('knows', self.v1, self.v2)
+        self.e2 = self.g.add_edge('lives_in', self.v1, self.v3)
+
+    def test_parse_steps(self):
+        source, steps = Parser(
+            "g.V(vid).out(*b0).has('age', gt(b1))").parse()
+        self.assertEqual(source, 'g')
+        self.assertEqual([s[0] for s in steps], ['V', 'out', 'has'])
+
+    def test_start_steps(self):
+        self.assertEqual(
+            evaluate(self.g, 'g.V(vid)', {'vid': self.v1.id}), [self.v1])
+        self.assertEqual(
+            evaluate(self.g, 'g.E(eid)', {'eid': self.e1.id}), [self.e1])
+        self.assertEqual(
+            evaluate(self.g, 'g.V(*eids).hasLabel(x)',
+                     {'eids': [], 'x': 'person'}), [self.v1, self.v2])
+
+    def test_vertex_steps(self):
+        self.assertEqual(
+            evaluate(self.g, 'g.V(vid).out(*b0)',
+                     {'vid': self.v1.id, 'b0': ['knows']}), [self.v2])
+        self.assertEqual(
+            evaluate(self.g, 'g.V(vid).both(*b0)',
+                     {'vid': self.v2.id, 'b0': []}), [self.v1])
+        self.assertEqual(
+            evaluate(self.g, 'g.V(vid).outE(*b0).otherV()',
+                     {'vid': self.v1.id, 'b0': ['lives_in']}), [self.v3])
+
+    def test_has_predicates(self):
+        bindings = {'vid': self.v1.id, 'b0': [], 'b1': 35}
+        self.assertEqual(
+            evaluate(self.g, "g.V(vid).out(*b0).has('age', gt(b1))",
+                     bindings), [self.v2])
+        bindings['b1'] = [30, 40]
+        self.assertEqual(
+            evaluate(self.g, "g.V().has('age', within(*b1))", bindings),
+            [self.v1, self.v2])
+
+    def test_unsupported_script(self):
+        with self.assertRaises(ScriptError):
+            evaluate(self.g, 'graph.openManagement()', {})
+        with self.assertRaises(ScriptError):
+            evaluate(self.g, 'g.V().repeat(out())', {})
+
+
+@attr('unit', 'memory')
+class TestMemoryBackend(BaseMemoryTestCase):
+
+    def test_setup(self):
+        self.assertIsInstance(connection._connection_pool, Pool)
+        self.assertEqual(connection._client_module,
+                         constants.MEMORY_CLIENT_MODULE)
+
+    @gen_test
+    def test_model_round_trip(self):
+        v1 = yield TestVertexModel.create(name='a', test_val=1)
+        v2 = yield TestVertexModel.create(name='b', test_val=2)
+        e1 = yield TestEdgeModel.create(v1, v2, test_val=3)
+        self.assertEqual(len(self.graph.vertices), 2)
+        self.assertEqual(len(self.graph.edges), 1)
+
+        stream = yield V(v1).out_step(TestEdgeModel).get()
+        results = yield stream.read()
+        self.assertEqual(results, [v2])
+
+        v3 = yield TestVertexModel.get(v1.id)
+        self.assertEqual(v3.name, 'a')
+
+        yield e1.delete()
+        yield v1.delete()
+        self.assertEqual(len(self.graph.edges), 0)
+        with self.assertRaises(TestVertexModel.DoesNotExist):
+            yield TestVertexModel.get(v1.id)
+
+    @gen_test
+    def test_results_are_batched(self):
+        for i in range(70):
+            self.graph.add_vertex(TestVertexModel.get_label())
+        stream = yield TestVertexModel.all()
+        first = yield stream.read()
+        second = yield stream.read()
+        self.assertEqual(len(first), 64)
+        self.assertEqual(len(second), 6)
+        end = yield stream.read()
+        self.assertIsNone(end)
+
+    @gen_test
+    def test_empty_result(self):
+        stream = yield connection.execute_query('g.V(vid)', {'vid': 1000})
+        message = yield stream.read()
+        self.assertEqual(message.status_code, 204)
+        self.assertIsNone(message.data)
+
+    @gen_test
+    def test_script_error(self):
+        stream = yield connection.execute_query(
+            'g.V().repeat(out())', {})
+        with self.assertRaises(RuntimeError):
+            yield stream.read()
+        # the connection was released and can be reused
+        stream = yield connection.execute_query('g.V()', {})
+        message = yield stream.read()
+        self.assertEqual(message.status_code, 204)
+
+    @gen_test
+    def test_property_keys(self):
+        self.addCleanup(self.graph.property_keys.pop, 'memory_count', None)
+        resp = yield spec.get_property_key('memory_count')
+        self.assertEqual(resp.data, [None])
+        yield spec.make_property_key('memory_count', 'Integer', 'SINGLE')
+        resp = yield spec.get_property_key('memory_count')
+        self.assertEqual(resp.data, ['memory_count'])
+        stream = yield connection.execute_query(
+            'graph.addVertex(label, l0, k0, v0)',
+            bindings={'l0': 'counted', 'k0': 'memory_count', 'v0': 3})
+        resp = yield stream.read()
+        self.assertEqual(resp.data[0]['label'], 'counted')
+        # values are checked against the data type of their key
+        stream = yield connection.execute_query(
+            'graph.addVertex(label, l0, k0, v0)',
+            bindings={'l0': 'counted', 'k0': 'memory_count', 'v0': 'a'})
+        with self.assertRaises(RuntimeError):
+            yield stream.read()
+        self.assertEqual(len(self.graph.vertices), 1)
+        with self.assertRaises(RuntimeError):
+            yield spec.make_property_key('memory_count', 'Long', 'SINGLE')
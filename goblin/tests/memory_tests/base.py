@@ -0,0 +1,22 @@
+from __future__ import unicode_literals
+from tornado import concurrent
+
+from goblin.connection import setup
+from goblin.memory import Pool, get_graph
+from goblin.tests.base import BaseGoblinTestCase
+
+MEMORY_URL = "ws://memory:8182/"
+
+
+class BaseMemoryTestCase(BaseGoblinTestCase):
+    """ Runs against the in-process backend whatever GOBLIN_TEST_BACKEND is """
+
+    @classmethod
+    def setUpClass(cls):
+        super(BaseGoblinTestCase, cls).setUpClass()
+        setup(MEMORY_URL, pool_class=Pool, future_class=concurrent.Future)
+
+    def setUp(self):
+        super(BaseMemoryTestCase, self).setUp()
+        self.graph = get_graph(MEMORY_URL)
+        self.graph.clear()
@@ -0,0 +1,105 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import concurrent
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.batching import GetLoader
+from goblin.exceptions import GoblinQueryError
+from goblin.memory import Pool
+from goblin.models import V
+from goblin.tests.base import (TestEdgeModel, TestVertexModel,
+                               TestVertexModelDouble)
+from goblin.tests.memory_tests.base import BaseMemoryTestCase, MEMORY_URL
+
+
+@attr('unit', 'memory')
+class TestGetBatching(BaseMemoryTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestGetBatching, cls).setUpClass()
+        connection.setup(MEMORY_URL, pool_class=Pool,
+                         future_class=concurrent.Future, batch_gets=True,
+                         max_get_batch_size=3)
+
+    def setUp(self):
+        super(TestGetBatching, self).setUp()
+        self.scripts = []
+        submit = connection.submit
+
+        def counting_submit(query, *args, **kwargs):
+            self.scripts.append(query)
+            return submit(query, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    def test_setup(self):
+        self.assertIsInstance(connection._get_loader, GetLoader)
+        self.assertEqual(connection._get_loader.max_batch_size, 3)
+        self.assertIsNone(connection.get_loader({'pool': object()}))
+        with self.assertRaises(ValueError):
+            GetLoader(max_batch_size=0)
+
+    @gen_test
+    def test_batched_gets(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        v3 = yield TestVertexModelDouble.create(name='c')
+        del self.scripts[:]
+
+        results = yield [TestVertexModel.get(v1.id),
+                         TestVertexModel.get(v2.id),
+                         TestVertexModel.get(v1.id),
+                         TestVertexModelDouble.get(v3.id)]
+        self.assertEqual(results, [v1, v2, v1, v3])
+        self.assertIsNot(results[0], results[2])
+        # one query per label
+        self.assertEqual(len(self.scripts), 2)
+
+    @gen_test
+    def test_max_batch_size(self):
+        vertices = []
+        for i in range(4):
+            vertex = yield TestVertexModel.create(name='v')
+            vertices.append(vertex)
+        del self.scripts[:]
+
+        results = yield [V(v.id).get() for v in vertices]
+        self.assertEqual(results, vertices)
+        self.assertEqual(len(self.scripts), 2)
+
+    @gen_test
+    def test_missing(self):
+        v1 = yield TestVertexModel.create(name='a')
+        e1 = yield TestEdgeModel.create(v1, v1)
+        with self.assertRaises(TestVertexModel.DoesNotExist):
+            yield [TestVertexModel.get(v1.id), TestVertexModel.get(-1)]
+        with self.assertRaises(GoblinQueryError):
+            yield V(-1).get()
+        edge = yield TestEdgeModel.get(e1.id)
+        self.assertEqual(edge, e1)
+
+    @gen_test
+    def test_string_ids(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        del self.scripts[:]
+        # the server answers with the vertex ids as numbers
+        results = yield [TestVertexModel.get(str(v1.id)),
+                         TestVertexModel.get(str(v2.id)),
+                         TestVertexModel.get(v1.id)]
+        self.assertEqual(results, [v1, v2, v1])
+        self.assertEqual(len(self.scripts), 1)
+        self.assertEqual((yield V(str(v2.id)).get()), v2)
+
+    @gen_test
+    def test_unbatched(self):
+        v1 = yield TestVertexModel.create(name='a')
+        del self.scripts[:]
+        pool = connection._connection_pool
+        results = yield [TestVertexModel.get(v1.id, pool=pool),
+                         TestVertexModel.get(v1.id, pool=pool)]
+        self.assertEqual(results, [v1, v1])
+        self.assertEqual(len(self.scripts), 2)
@@ -0,0 +1,78 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import concurrent
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.benchmarks import BENCHMARKS, compare, measure, run
+from goblin.benchmarks.runner import percentile
+from goblin.memory import Pool
+from goblin.memory.server import StubServer
+from goblin.models import V
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase, MEMORY_URL
+
+
+@attr('unit', 'memory')
+class TestBenchmarkRunner(BaseMemoryTestCase):
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 99), 3)
+        self.assertIsNone(percentile([], 50))
+
+    @gen_test
+    def test_measure(self):
+        calls = []
+        result = yield measure(lambda: calls.append(1), 10, warmup=2)
+        self.assertEqual(result['ops'], 10)
+        self.assertGreater(result['ops_per_sec'], 0)
+        self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertIn('alloc_bytes_per_op', result)
+        self.assertGreaterEqual(len(calls), 12)
+
+    @gen_test
+    def test_run(self):
+        report = yield run(['vertex_save', 'element_deserialize'], ops=5,
+                           warmup=1)
+        self.assertEqual(report['meta']['backend'], 'memory')
+        self.assertEqual(list(report['results'].keys()),
+                         ['vertex_save', 'element_deserialize'])
+        self.assertGreaterEqual(len(self.graph.vertices), 7)
+        rows = compare(report, report)
+        self.assertEqual([r[3] for r in rows], [0.0, 0.0])
+
+    @gen_test
+    def test_unknown_benchmark(self):
+        self.assertIn('element_all', BENCHMARKS)
+        with self.assertRaises(ValueError):
+            yield run(['nope'])
+
+
+@attr('unit', 'memory')
+class TestStubServer(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestStubServer, self).setUp()
+        self.server = StubServer(graph=self.graph)
+        self.server.start()
+        connection.setup(self.server.url, future_class=concurrent.Future)
+
+    def tearDown(self):
+        connection.tear_down()
+        self.server.stop()
+        connection.setup(MEMORY_URL, pool_class=Pool,
+                         future_class=concurrent.Future)
+        super(TestStubServer, self).tearDown()
+
+    @gen_test
+    def test_round_trip(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        yield TestEdgeModel.create(v1, v2)
+        self.assertEqual(len(self.graph.vertices), 2)
+        stream = yield V(v1).out_step(TestEdgeModel).get()
+        results = yield stream.read()
+        self.assertEqual(results, [v2])
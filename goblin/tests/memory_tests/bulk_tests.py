@@ -0,0 +1,223 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.constants import IN
+from goblin.exceptions import GoblinException, ValidationError
+from goblin.identity import IdentityMap
+from goblin.models import Edge, Vertex
+from goblin.properties import String
+from goblin.relationships import Relationship
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase
+from goblin.tests.relationships_tests.vertex_relationship_io_tests import (
+    TestRelationshipEdgeModel, TestRelationshipVertexModel)
+
+
+class ExclusiveEdgeModel(Edge):
+    __exclusive__ = True
+    label = 'exclusive_edge_model'
+
+    name = String()
+
+
+class KeyedVertexModel(Vertex):
+    label = 'keyed_vertex_model'
+
+    key = String()
+
+
+class InRelationshipVertexModel(Vertex):
+    label = 'in_relationship_vertex_model'
+
+    name = String()
+    relation = Relationship(TestRelationshipEdgeModel, TestVertexModel,
+                            direction=IN)
+
+
+class BulkTestCase(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(BulkTestCase, self).setUp()
+        self.scripts = []
+        submit = connection.submit
+
+        def counting_submit(query, *args, **kwargs):
+            self.scripts.append(query)
+            return submit(query, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+
+@attr('unit', 'memory')
+class TestVertexBulkCreate(BulkTestCase):
+
+    @gen_test
+    def test_bulk_create(self):
+        v3 = TestVertexModel(name='c', test_val=3)
+        ids = yield TestVertexModel.bulk_create(
+            [{'name': 'a', 'test_val': 1}, {'name': 'b', 'test_val': 2}, v3,
+             {'name': 'd', 'test_val': 4}, {'name': 'e', 'test_val': 5}],
+            batch_size=2, concurrency=2)
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+        self.assertEqual(len(self.scripts), 3)
+        self.assertEqual(v3.id, ids[2])
+
+        stream = yield TestVertexModel.all(ids)
+        vertices = yield stream.read()
+        self.assertEqual([v.name for v in vertices], ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual([v.test_val for v in vertices], [1, 2, 3, 4, 5])
+
+        self.assertEqual((yield TestVertexModel.bulk_create([])), [])
+
+    def test_validation(self):
+        invalid = TestVertexModel(name='b')
+        invalid.test_val = 'b'
+        with self.assertRaises(ValidationError):
+            TestVertexModel.bulk_create([{'name': 'a'}, invalid])
+        saved = TestVertexModel(name='a')
+        saved._id = 1
+        with self.assertRaises(GoblinException):
+            TestVertexModel.bulk_create([saved])
+        with self.assertRaises(GoblinException):
+            TestVertexModel.bulk_create(['a'])
+        self.assertEqual(self.scripts, [])
+
+    @gen_test
+    def test_identity_map(self):
+        with IdentityMap():
+            v1 = TestVertexModel(name='a')
+            yield TestVertexModel.bulk_create([v1])
+            self.assertIs((yield TestVertexModel.get(v1.id)), v1)
+
+
+@attr('unit', 'memory')
+class TestEdgeBulkCreate(BulkTestCase):
+
+    @gen_test
+    def test_bulk_create(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        e3 = TestEdgeModel(v2, v1, name='c')
+        del self.scripts[:]
+        ids = yield TestEdgeModel.bulk_create(
+            [(v1, v2), (v1.id, v2.id, {'name': 'b'}), e3], batch_size=2)
+        self.assertEqual(len(set(ids)), 3)
+        self.assertEqual(len(self.scripts), 2)
+        self.assertEqual(e3.id, ids[2])
+
+        stream = yield TestEdgeModel.all(ids)
+        edges = yield stream.read()
+        self.assertEqual([e.name for e in edges], ['test_edge', 'b', 'c'])
+        self.assertEqual((yield edges[2].outV()), v2)
+        self.assertEqual((yield edges[2].inV()), v1)
+
+    @gen_test
+    def test_exclusive(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        existing = yield ExclusiveEdgeModel.create(v1, v2, name='a')
+        ids = yield ExclusiveEdgeModel.bulk_create(
+            [(v1, v2, {'name': 'b'}), (v2, v1), (v2, v1, {'name': 'c'})])
+        self.assertEqual(ids[0], existing.id)
+        self.assertEqual(ids[1], ids[2])
+        stream = yield ExclusiveEdgeModel.all([existing.id, ids[1]])
+        edges = yield stream.read()
+        self.assertEqual([e.name for e in edges], ['b', 'c'])
+
+    @gen_test
+    def test_missing_vertex(self):
+        v1 = yield TestVertexModel.create(name='a')
+        with self.assertRaises(RuntimeError):
+            yield TestEdgeModel.bulk_create([(v1, 1234)])
+
+    def test_validation(self):
+        with self.assertRaises(GoblinException):
+            TestEdgeModel.bulk_create([(TestVertexModel(), 1)])
+        with self.assertRaises(GoblinException):
+            TestEdgeModel.bulk_create([(1, )])
+        self.assertEqual(self.scripts, [])
+
+
+@attr('unit', 'memory')
+class TestUpsert(BulkTestCase):
+
+    @gen_test
+    def test_get_or_create(self):
+        v1, created = yield TestVertexModel.get_or_create(
+            'name', 'a', defaults={'test_val': 1})
+        self.assertTrue(created)
+        self.assertEqual(v1.test_val, 1)
+        v2, created = yield TestVertexModel.get_or_create(
+            'name', 'a', defaults={'test_val': 2})
+        self.assertFalse(created)
+        self.assertEqual(v2, v1)
+        # the vertex found is left as it was
+        self.assertEqual(v2.test_val, 1)
+        self.assertEqual(len(self.scripts), 2)
+
+    @gen_test
+    def test_bulk_upsert(self):
+        existing = yield TestVertexModel.create(name='b', test_val=1)
+        del self.scripts[:]
+        results = yield TestVertexModel.bulk_upsert(
+            [{'name': 'a', 'test_val': 2}, {'name': 'b', 'test_val': 3},
+             TestVertexModel(name='a', test_val=4)], key='name',
+            batch_size=2)
+        self.assertEqual(len(self.scripts), 2)
+        self.assertEqual([created for _, created in results],
+                         [True, False, False])
+        vertices = [vertex for vertex, _ in results]
+        self.assertEqual(vertices[1].id, existing.id)
+        self.assertEqual(vertices[2].id, vertices[0].id)
+        stream = yield TestVertexModel.all([v.id for v in vertices])
+        self.assertEqual([v.test_val for v in (yield stream.read())],
+                         [4, 3, 4])
+
+    def test_validation(self):
+        with self.assertRaises(GoblinException):
+            TestVertexModel.bulk_upsert([{'name': 'a'}], key='missing')
+        with self.assertRaises(GoblinException):
+            KeyedVertexModel.bulk_upsert([{}], key='key')
+        self.assertEqual(self.scripts, [])
+
+
+@attr('unit', 'memory')
+class TestRelationshipBulkCreate(BulkTestCase):
+
+    @gen_test
+    def test_create(self):
+        v1 = yield TestRelationshipVertexModel.create(name='a')
+        del self.scripts[:]
+        e1, v2 = yield v1.relation.create(vertex_params={'name': 'b'},
+                                          edge_params={'name': 'c'})
+        self.assertEqual(len(self.scripts), 1)
+        self.assertIsInstance(e1, TestRelationshipEdgeModel)
+        self.assertEqual((yield TestVertexModel.get(v2.id)).name, 'b')
+        e2 = yield TestRelationshipEdgeModel.get(e1.id)
+        self.assertEqual(e2.name, 'c')
+        self.assertEqual((yield e2.outV()), v1)
+        self.assertEqual((yield e2.inV()), v2)
+
+    @gen_test
+    def test_bulk_create(self):
+        v1 = yield InRelationshipVertexModel.create(name='a')
+        del self.scripts[:]
+        pairs = yield v1.relation.bulk_create(
+            [{'name': 'b'}, ({'name': 'e'}, {'name': 'c'}), {'name': 'd'}],
+            batch_size=2)
+        self.assertEqual(len(self.scripts), 2)
+        self.assertEqual([v.name for _, v in pairs], ['b', 'c', 'd'])
+        self.assertEqual(pairs[1][0].name, 'e')
+        stream = yield v1.inV(TestRelationshipEdgeModel)
+        vertices = yield stream.read()
+        self.assertEqual(sorted(v.id for v in vertices),
+                         sorted(v.id for _, v in pairs))
+        self.assertEqual((yield v1.relation.bulk_create([])), [])
+
+        with self.assertRaises(ValidationError):
+            v1.relation.bulk_create([{'name': 5}])
+        self.assertEqual(len(self.scripts), 3)
@@ -0,0 +1,82 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import concurrent, gen
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.bytecode import Bytecode, P, decode, encode, results
+from goblin.constants import GREATER_THAN, WITHIN
+from goblin.memory import Pool
+from goblin.models import V
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase, MEMORY_URL
+
+
+@attr('unit', 'memory')
+class TestBytecode(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestBytecode, self).setUp()
+        connection.setup(MEMORY_URL, pool_class=Pool,
+                         future_class=concurrent.Future, bytecode=True)
+        self.addCleanup(setattr, connection, '_bytecode', False)
+        self.scripts = []
+        submit = connection.submit
+
+        def counting_submit(query, *args, **kwargs):
+            self.scripts.append(query)
+            return submit(query, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    def test_bytecode(self):
+        test_val = TestVertexModel.get_property_by_name('test_val')
+        q = V(1).out_step(TestEdgeModel).has(test_val, 2, GREATER_THAN)
+        self.assertEqual(q.bytecode(), Bytecode([
+            ['V', 1], ['out', TestEdgeModel.get_label()],
+            ['has', test_val, P('gt', 2)]]))
+        q = V(1).has(test_val, (1, 2), WITHIN).in_v()
+        self.assertEqual(q.bytecode().steps[1:],
+                         [['has', test_val, P('within', [1, 2])], ['inV']])
+
+    def test_graphson(self):
+        bytecode = Bytecode([['V', 1], ['has', 'k', P('within', [1, 2.5])]])
+        graphson = encode(bytecode)
+        self.assertEqual(graphson['@type'], 'g:Bytecode')
+        self.assertEqual(graphson['@value']['step'][0],
+                         ['V', {'@type': 'g:Int64', '@value': 1}])
+        self.assertEqual(decode(graphson), bytecode)
+        self.assertEqual(results(None), [])
+        self.assertEqual(results({'@type': 'g:List', '@value': [
+            {'@type': 'g:Traverser',
+             '@value': {'bulk': {'@type': 'g:Int64', '@value': 2},
+                        'value': {'@type': 'g:Int32', '@value': 5}}}]}),
+            [5, 5])
+
+    @gen_test
+    def test_query(self):
+        v1 = yield TestVertexModel.create(name='a', test_val=1)
+        v2 = yield TestVertexModel.create(name='b', test_val=2)
+        v3 = yield TestVertexModel.create(name='c', test_val=3)
+        e1 = yield TestEdgeModel.create(v1, v2, name='d')
+        yield TestEdgeModel.create(v1, v3)
+        del self.scripts[:]
+
+        @gen.coroutine
+        def read(q):
+            stream = yield q.get()
+            raise gen.Return((yield stream.read()))
+
+        test_val = TestVertexModel.get_property_by_name('test_val')
+        self.assertEqual((yield read(V(v1).out_step(TestEdgeModel))),
+                         [v2, v3])
+        self.assertEqual(
+            (yield read(V(v1).out_step().has(test_val, 2, GREATER_THAN))),
+            [v3])
+        edges = yield read(V(v1).out_e().has_id(e1.id))
+        self.assertEqual(edges, [e1])
+        self.assertEqual(edges[0].name, 'd')
+        self.assertEqual((yield read(V(v1).in_step())), [])
+        self.assertEqual((yield V(v1).get()), v1)
+        self.assertEqual(self.scripts, [])
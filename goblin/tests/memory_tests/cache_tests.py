@@ -0,0 +1,226 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import concurrent
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.cache import ElementCache, MISSING
+from goblin.exceptions import GoblinQueryError
+from goblin.memory import Pool
+from goblin.models import V
+from goblin.tests.base import (BaseGoblinTestCase, TestEdgeModel,
+                               TestVertexModel, TestVertexModelDouble)
+from goblin.tests.memory_tests.base import BaseMemoryTestCase, MEMORY_URL
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def vertex(id, label='person'):
+    return {'id': id, 'label': label, 'type': 'vertex', 'properties': {}}
+
+
+@attr('unit', 'memory')
+class TestElementCache(BaseGoblinTestCase):
+
+    def test_lru(self):
+        cache = ElementCache(maxsize=2)
+        cache.put('V', vertex(1))
+        cache.put('V', vertex(2))
+        self.assertEqual(cache.get('V', 1), vertex(1))
+        cache.put('V', vertex(3))
+        # 2 was the least recently used
+        self.assertIsNone(cache.get('V', 2))
+        self.assertEqual(cache.get('V', 1), vertex(1))
+        self.assertIsNone(cache.get('E', 1))
+        self.assertEqual(cache.stats(), {
+            'size': 2, 'maxsize': 2, 'hits': 2, 'misses': 2,
+            'evictions': 1, 'expirations': 0})
+        with self.assertRaises(ValueError):
+            ElementCache(maxsize=0)
+
+    def test_ttl(self):
+        clock = Clock()
+        cache = ElementCache(ttl=10, ttls={'country': 100, 'event': 0},
+                             negative_ttl=1, timer=clock)
+        cache.put('V', vertex(1))
+        cache.put('V', vertex(2, 'country'))
+        cache.put('V', vertex(3, 'event'))
+        cache.put_missing('V', 4)
+        self.assertEqual(len(cache), 3)
+        self.assertIs(cache.get('V', 4), MISSING)
+        clock.now = 5
+        self.assertIsNone(cache.get('V', 4))
+        self.assertEqual(cache.get('V', 1), vertex(1))
+        clock.now = 50
+        self.assertIsNone(cache.get('V', 1))
+        self.assertEqual(cache.get('V', 2), vertex(2, 'country'))
+        self.assertEqual(cache.expirations, 2)
+
+    def test_labels(self):
+        cache = ElementCache()
+        cache.put('V', vertex(1))
+        # elements are looked up by id and label
+        self.assertIs(cache.get('V', 1, 'country'), MISSING)
+        self.assertEqual(cache.get('V', 1, 'person'), vertex(1))
+        cache.put_missing('V', 2, 'country')
+        self.assertIs(cache.get('V', 2, 'country'), MISSING)
+        self.assertIsNone(cache.get('V', 2, 'person'))
+        self.assertIsNone(cache.get('V', 2))
+        cache.put_missing('V', 3)
+        self.assertIs(cache.get('V', 3, 'person'), MISSING)
+
+    def test_invalidate(self):
+        cache = ElementCache()
+        cache.put('V', vertex(1))
+        cache.put('V', vertex(2))
+        cache.put('E', vertex(1, 'knows'))
+        cache.invalidate('V', 1)
+        cache.invalidate('V', [1])
+        self.assertIsNone(cache.get('V', 1))
+        cache.invalidate_source('V')
+        self.assertEqual(len(cache), 1)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+@attr('unit', 'memory')
+class TestCachedLookups(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestCachedLookups, self).setUp()
+        self.cache = ElementCache(maxsize=100)
+        connection.setup(MEMORY_URL, pool_class=Pool,
+                         future_class=concurrent.Future,
+                         element_cache=self.cache)
+        self.addCleanup(setattr, connection, '_element_cache', None)
+        self.bindings = []
+        submit = connection.submit
+
+        def counting_submit(query, bindings=None, *args, **kwargs):
+            self.bindings.append(bindings)
+            return submit(query, bindings, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    def test_setup(self):
+        self.assertIs(connection.get_cache(), self.cache)
+        self.assertIs(connection.get_cache({'future_class': None}),
+                      self.cache)
+        self.assertIsNone(connection.get_cache({'pool': object()}))
+
+    @gen_test
+    def test_get(self):
+        v1 = yield TestVertexModel.create(name='a')
+        del self.bindings[:]
+        a = yield TestVertexModel.get(v1.id)
+        self.graph.clear()
+        b = yield TestVertexModel.get(v1.id)
+        self.assertEqual(a, b)
+        self.assertIsNot(a, b)
+        self.assertEqual(b.name, 'a')
+        self.assertEqual(len(self.bindings), 1)
+        self.assertEqual(self.cache.hits, 1)
+        with self.assertRaises(TestVertexModelDouble.DoesNotExist):
+            yield TestVertexModelDouble.get(v1.id)
+
+    @gen_test
+    def test_get_missing(self):
+        with self.assertRaises(TestVertexModel.DoesNotExist):
+            yield TestVertexModel.get(1234)
+        with self.assertRaises(TestVertexModel.DoesNotExist):
+            yield TestVertexModel.get(1234)
+        self.assertEqual(len(self.bindings), 1)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    @gen_test
+    def test_vertex_get(self):
+        v1 = yield TestVertexModel.create(name='a')
+        del self.bindings[:]
+        a = yield V(v1).get()
+        b = yield V(v1.id).get()
+        self.assertEqual(a, b)
+        self.assertEqual(len(self.bindings), 1)
+        with self.assertRaises(GoblinQueryError):
+            yield V(1234).get()
+        with self.assertRaises(GoblinQueryError):
+            yield V(1234).get()
+        self.assertEqual(len(self.bindings), 2)
+
+    @gen_test
+    def test_all(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        yield TestVertexModel.get(v1.id)
+        del self.bindings[:]
+
+        stream = yield TestVertexModel.all([v2.id, v1.id])
+        self.assertEqual((yield stream.read()), [v2, v1])
+        self.assertIsNone((yield stream.read()))
+        # only the element missing from the cache was queried
+        self.assertEqual(self.bindings[0]['eids'], [v2.id])
+
+        self.graph.clear()
+        stream = yield TestVertexModel.all([v1.id, v2.id])
+        self.assertEqual((yield stream.read()), [v1, v2])
+        self.assertEqual(len(self.bindings), 1)
+
+        stream = yield TestVertexModel.all([v1.id, 1234])
+        with self.assertRaises(GoblinQueryError):
+            yield stream.read()
+        stream = yield TestVertexModel.all([1234])
+        with self.assertRaises(TestVertexModel.DoesNotExist):
+            yield stream.read()
+        self.assertEqual(len(self.bindings), 2)
+
+        stream = yield TestVertexModel.all([v1.id], cache=False)
+        with self.assertRaises(TestVertexModel.DoesNotExist):
+            yield stream.read()
+
+    @gen_test
+    def test_all_string_ids(self):
+        v1 = yield TestVertexModel.create(name='a')
+        # the server answers with the vertex id as a number
+        stream = yield TestVertexModel.all([str(v1.id)])
+        self.assertEqual((yield stream.read()), [v1])
+        # and the vertex was not cached as missing
+        self.assertEqual((yield TestVertexModel.get(str(v1.id))), v1)
+        stream = yield TestVertexModel.all([str(v1.id)])
+        self.assertEqual((yield stream.read()), [v1])
+
+    @gen_test
+    def test_save_and_delete(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        e1 = yield TestEdgeModel.create(v1, v2)
+        a = yield TestVertexModel.get(v1.id)
+        yield TestEdgeModel.get(e1.id)
+
+        a.name = 'c'
+        yield a.save()
+        self.assertEqual((yield TestVertexModel.get(v1.id)).name, 'c')
+
+        yield v2.delete()
+        with self.assertRaises(TestVertexModel.DoesNotExist):
+            yield TestVertexModel.get(v2.id)
+        # deleting a vertex deletes its edges
+        with self.assertRaises(TestEdgeModel.DoesNotExist):
+            yield TestEdgeModel.get(e1.id)
+
+    @gen_test
+    def test_save_without_deserializing(self):
+        v1 = yield TestVertexModel.create(name='a')
+        a = yield TestVertexModel.get(v1.id)
+        a.name = 'c'
+        yield a.save(deserialize=False)
+        self.assertEqual((yield TestVertexModel.get(v1.id)).name, 'c')
+        a.name = 'd'
+        yield a.save(deserialize=False, id_only=True)
+        self.assertEqual((yield TestVertexModel.get(v1.id)).name, 'd')
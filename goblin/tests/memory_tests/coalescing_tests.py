@@ -0,0 +1,105 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import concurrent, gen
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.memory import Pool, server
+from goblin.memory.server import StubServer
+from goblin.models import V
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase, MEMORY_URL
+
+
+@gen.coroutine
+def read_all(future_stream):
+    stream = yield future_stream
+    results = []
+    while True:
+        batch = yield stream.read()
+        if batch is None:
+            break
+        results.append(batch)
+    raise gen.Return(results)
+
+
+@attr('unit', 'memory')
+class TestCoalescing(BaseMemoryTestCase):
+    """ Runs against the stub server, so requests actually overlap """
+
+    def setUp(self):
+        super(TestCoalescing, self).setUp()
+        self.server = StubServer(graph=self.graph)
+        self.server.start()
+        connection.setup(self.server.url, future_class=concurrent.Future,
+                         coalesce=True)
+        self.requests = []
+        handle_request = server.handle_request
+
+        def counting_handle_request(graph, message, **kwargs):
+            self.requests.append(message)
+            return handle_request(graph, message, **kwargs)
+
+        server.handle_request = counting_handle_request
+        self.addCleanup(setattr, server, 'handle_request', handle_request)
+
+    def tearDown(self):
+        connection.tear_down()
+        self.server.stop()
+        connection.setup(MEMORY_URL, pool_class=Pool,
+                         future_class=concurrent.Future)
+        super(TestCoalescing, self).tearDown()
+
+    @gen_test
+    def test_coalesced_reads(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        yield TestEdgeModel.create(v1, v2)
+        del self.requests[:]
+
+        results = yield [read_all(V(v1).out_step(TestEdgeModel).get()),
+                         read_all(V(v1).out_step(TestEdgeModel).get()),
+                         read_all(V(v1).out_step(TestEdgeModel).get(
+                             deserialize=False))]
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(results[0], [[v2]])
+        self.assertEqual(results[1], [[v2]])
+        self.assertEqual(results[2][0][0]['id'], v2.id)
+
+        # once answered, the request is sent again
+        results = yield read_all(V(v1).out_step(TestEdgeModel).get())
+        self.assertEqual(results, [[v2]])
+        self.assertEqual(len(self.requests), 2)
+
+    @gen_test
+    def test_different_requests(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        del self.requests[:]
+        results = yield [TestVertexModel.get(v1.id),
+                         TestVertexModel.get(v2.id)]
+        self.assertEqual(results, [v1, v2])
+        self.assertEqual(len(self.requests), 2)
+
+    @gen_test
+    def test_writes(self):
+        v1 = yield TestVertexModel.create(name='a')
+        del self.requests[:]
+        yield [read_all(connection.execute_query('g.V(vid)', {'vid': v1.id},
+                                                 write=True))
+               for _ in range(2)]
+        self.assertEqual(len(self.requests), 2)
+
+        v1.name = 'b'
+        yield [v1.save(), v1.save()]
+        self.assertEqual(len(self.requests), 4)
+
+    @gen_test
+    def test_shared_errors(self):
+        streams = yield [connection.execute_query('g.V().repeat(out())')
+                         for _ in range(2)]
+        for stream in streams:
+            with self.assertRaises(RuntimeError):
+                yield stream.read()
+            self.assertIsNone((yield stream.read()))
+        self.assertEqual(len(self.requests), 1)
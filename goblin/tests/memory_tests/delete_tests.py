@@ -0,0 +1,94 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.exceptions import GoblinQueryError
+from goblin.models import V
+from goblin.tests.base import (TestEdgeModel, TestVertexModel,
+                               TestVertexModelDouble)
+from goblin.tests.memory_tests.base import BaseMemoryTestCase
+
+
+@attr('unit', 'memory')
+class TestBulkDelete(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestBulkDelete, self).setUp()
+        self.scripts = []
+        submit = connection.submit
+
+        def counting_submit(query, *args, **kwargs):
+            self.scripts.append(query)
+            return submit(query, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    @gen_test
+    def test_delete_where(self):
+        yield TestVertexModel.bulk_create(
+            [{'name': 'a', 'test_val': i % 2} for i in range(5)])
+        other = yield TestVertexModelDouble.create(name='a')
+        del self.scripts[:]
+
+        removed = yield TestVertexModel.delete_where(
+            name='a', test_val=1, chunk_size=2)
+        self.assertEqual(removed, 2)
+        # a full chunk, then an empty one
+        self.assertEqual(len(self.scripts), 2)
+        self.assertEqual(len(self.graph.vertices), 4)
+
+        removed = yield TestVertexModel.delete_where(chunk_size=2)
+        self.assertEqual(removed, 3)
+        self.assertEqual(list(self.graph.vertices), [other.id])
+
+        with self.assertRaises(GoblinQueryError):
+            yield TestVertexModel.delete_where(missing=1)
+
+    @gen_test
+    def test_edge_delete_where(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        yield TestEdgeModel.bulk_create(
+            [(v1, v2, {'name': 'x'}), (v2, v1, {'name': 'x'}), (v1, v2)])
+        removed = yield TestEdgeModel.delete_where(name='x')
+        self.assertEqual(removed, 2)
+        self.assertEqual(len(self.graph.edges), 1)
+
+    @gen_test
+    def test_drop(self):
+        v1 = yield TestVertexModel.create(name='a')
+        ids = yield TestVertexModel.bulk_create([{'name': 'b'}] * 5)
+        yield TestEdgeModel.bulk_create([(v1.id, vid) for vid in ids])
+        yield TestEdgeModel.create(ids[0], ids[1])
+        yield TestEdgeModel.create(ids[2], ids[1])
+
+        removed = yield V(v1).out_e().drop(chunk_size=4)
+        self.assertEqual(removed, 5)
+        self.assertEqual(len(self.graph.edges), 2)
+        # vertices reached twice are removed once
+        removed = yield V(ids[1]).in_step().out_step().drop()
+        self.assertEqual(removed, 1)
+        self.assertNotIn(ids[1], self.graph.vertices)
+        self.assertEqual(len(self.graph.edges), 0)
+        with self.assertRaises(ValueError):
+            yield V(v1).drop(chunk_size=0)
+
+    @gen_test
+    def test_delete_related(self):
+        v1 = yield TestVertexModel.create(name='a')
+        ids = yield TestVertexModel.bulk_create([{'name': 'b'}] * 5)
+        yield TestEdgeModel.bulk_create([(v1.id, vid) for vid in ids])
+        yield TestEdgeModel.create(ids[0], v1)
+        commits = self.graph.commits
+
+        # one transaction per chunk, the last one short
+        yield v1._simple_deletion('outE', [TestEdgeModel], chunk_size=2)
+        self.assertEqual(self.graph.commits - commits, 3)
+        self.assertEqual(len(self.graph.edges), 1)
+        self.assertEqual(len(self.graph.vertices), 6)
+
+        yield v1._simple_deletion('inV', [TestEdgeModel], chunk_size=1)
+        self.assertNotIn(ids[0], self.graph.vertices)
+        self.assertEqual(len(self.graph.edges), 0)
@@ -0,0 +1,105 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import gen
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.tests.base import (TestEdgeModel, TestVertexModel,
+                               TestVertexModelDouble)
+from goblin.tests.memory_tests.base import BaseMemoryTestCase
+
+
+@attr('unit', 'memory')
+class TestFindByValue(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestFindByValue, self).setUp()
+        self.scripts = []
+        submit = connection.submit
+
+        def counting_submit(query, *args, **kwargs):
+            self.scripts.append(query)
+            return submit(query, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    @gen.coroutine
+    def names(self, future):
+        stream = yield future
+        raise gen.Return([e.name for e in (yield stream.read()) or []])
+
+    @gen_test
+    def test_find_by_value(self):
+        for i in range(5):
+            yield TestVertexModel.create(name='v{}'.format(i), test_val=i)
+        yield TestVertexModelDouble.create(name='d', test_val=2.0)
+        del self.scripts[:]
+        self.assertEqual(
+            (yield self.names(TestVertexModel.find_by_value('test_val', 3))),
+            ['v3'])
+        self.assertEqual(
+            (yield self.names(
+                TestVertexModelDouble.find_by_value('test_val', 2))),
+            ['d'])
+        # the lookup is a has() step, not a lambda scanning every vertex
+        for script in self.scripts:
+            self.assertNotIn('filter{', script)
+
+    @gen_test
+    def test_find_by_range(self):
+        for i in range(5):
+            yield TestVertexModel.create(name='v{}'.format(i), test_val=i)
+        self.assertEqual(
+            sorted((yield self.names(
+                TestVertexModel.find_by_range('test_val', 1, 3)))),
+            ['v1', 'v2'])
+        self.assertEqual(
+            sorted((yield self.names(
+                TestVertexModel.find_by_range('test_val', lo=3)))),
+            ['v3', 'v4'])
+        self.assertEqual(
+            sorted((yield self.names(
+                TestVertexModel.find_by_range('test_val', hi=1)))),
+            ['v0'])
+        with self.assertRaises(ValueError):
+            TestVertexModel.find_by_range('test_val')
+
+    @gen_test
+    def test_find_in(self):
+        for i in range(5):
+            yield TestVertexModel.create(name='v{}'.format(i), test_val=i)
+        self.assertEqual(
+            sorted((yield self.names(
+                TestVertexModel.find_in('test_val', (0, 4, 9))))),
+            ['v0', 'v4'])
+
+    @gen_test
+    def test_limit_and_order(self):
+        for i in (3, 1, 4, 2):
+            yield TestVertexModel.create(name='v{}'.format(i), test_val=i)
+        self.assertEqual(
+            (yield self.names(TestVertexModel.find_by_range(
+                'test_val', lo=2, order_by='test_val'))),
+            ['v2', 'v3', 'v4'])
+        self.assertEqual(
+            (yield self.names(TestVertexModel.find_by_range(
+                'test_val', lo=0, order_by='-test_val', limit=2))),
+            ['v4', 'v3'])
+
+    @gen_test
+    def test_edges(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        for i in range(3):
+            yield TestEdgeModel.create(v1, v2, name='e{}'.format(i),
+                                       test_val=i)
+        self.assertEqual(
+            (yield self.names(TestEdgeModel.find_by_value('test_val', 1))),
+            ['e1'])
+        self.assertEqual(
+            (yield self.names(TestEdgeModel.find_by_range(
+                'test_val', hi=2, order_by='-test_val'))),
+            ['e1', 'e0'])
+        stream = yield TestEdgeModel.find_by_value('test_val', 9)
+        self.assertEqual((yield stream.read()), [])
@@ -0,0 +1,88 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import gen
+from tornado.testing import gen_test
+
+from goblin import identity
+from goblin.identity import IdentityMap
+from goblin.models import V
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase
+
+
+@attr('unit', 'memory')
+class TestIdentityMap(BaseMemoryTestCase):
+
+    def test_scope(self):
+        self.assertIsNone(identity.current())
+        with IdentityMap() as outer:
+            self.assertIs(identity.current(), outer)
+            with IdentityMap() as inner:
+                self.assertIs(identity.current(), inner)
+            self.assertIs(identity.current(), outer)
+        self.assertIsNone(identity.current())
+
+    @gen_test
+    def test_same_instance(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        e1 = yield TestEdgeModel.create(v1, v2)
+
+        with IdentityMap() as identity_map:
+            a = yield TestVertexModel.get(v1.id)
+            self.assertIsNot(a, v1)
+            self.assertIn(a, identity_map)
+            stream = yield V(v2).in_step().get()
+            self.assertIs((yield stream.read())[0], a)
+            stream = yield V(v1).out_e().get()
+            edge = (yield stream.read())[0]
+            self.assertIs((yield TestEdgeModel.get(e1.id)), edge)
+            self.assertEqual(len(identity_map), 2)
+
+        # outside the block, every read builds a new instance
+        self.assertIsNot((yield TestVertexModel.get(v1.id)), a)
+
+    @gen_test
+    def test_get_skips_query(self):
+        v1 = yield TestVertexModel.create(name='a')
+        with IdentityMap():
+            a = yield TestVertexModel.get(v1.id)
+            self.graph.clear()
+            self.assertIs((yield TestVertexModel.get(v1.id)), a)
+
+    @gen_test
+    def test_save_and_delete(self):
+        with IdentityMap() as identity_map:
+            v1 = TestVertexModel(name='a')
+            saved = yield v1.save()
+            self.assertIs(saved, v1)
+            self.assertIs((yield TestVertexModel.get(v1.id)), v1)
+
+            v2 = yield TestVertexModel.create(name='b')
+            e1 = TestEdgeModel(v1, v2)
+            yield e1.save()
+            self.assertIsNotNone(e1.id)
+            self.assertIn(e1, identity_map)
+
+            yield e1.delete()
+            self.assertNotIn(e1, identity_map)
+            yield v1.delete()
+            self.assertNotIn(v1, identity_map)
+            with self.assertRaises(TestVertexModel.DoesNotExist):
+                yield TestVertexModel.get(v1.id)
+
+    @gen_test
+    def test_concurrent_blocks(self):
+        v1 = yield TestVertexModel.create(name='a')
+
+        @gen.coroutine
+        def load():
+            with IdentityMap():
+                first = yield TestVertexModel.get(v1.id)
+                yield gen.moment
+                second = yield TestVertexModel.get(v1.id)
+                self.assertIs(first, second)
+                raise gen.Return(first)
+
+        a, b = yield [load(), load()]
+        self.assertIsNot(a, b)
@@ -0,0 +1,160 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.models import Vertex
+from goblin.properties import Integer, String
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase
+
+
+class PartialVertexModel(Vertex):
+    label = 'partial_vertex_model'
+    __partial_saves__ = True
+
+    name = String()
+    test_val = Integer()
+
+
+class FullVertexModel(PartialVertexModel):
+    label = 'full_vertex_model'
+    __partial_saves__ = False
+
+
+NAME = PartialVertexModel.get_property_by_name('name')
+TEST_VAL = PartialVertexModel.get_property_by_name('test_val')
+
+
+@attr('unit', 'memory')
+class TestPartialSaves(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestPartialSaves, self).setUp()
+        self.bindings = []
+        submit = connection.submit
+
+        def counting_submit(query, bindings=None, *args, **kwargs):
+            self.bindings.append(bindings)
+            return submit(query, bindings, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    @gen_test
+    def test_modified_properties(self):
+        v1 = yield PartialVertexModel.create(name='a', test_val=1)
+        # a new vertex is saved whole
+        self.assertEqual(self.bindings[0]['attrs'],
+                         {NAME: 'a', TEST_VAL: 1})
+        del self.bindings[:]
+
+        v1.test_val = 2
+        yield v1.save()
+        self.assertEqual(self.bindings[0]['attrs'], {TEST_VAL: 2})
+        v1.name = None
+        v1['nickname'] = 'b'
+        yield v1.save()
+        self.assertEqual(self.bindings[1]['attrs'],
+                         {NAME: None, 'nickname': 'b'})
+        del v1['nickname']
+        yield v1.save()
+        self.assertEqual(self.bindings[2]['attrs'], {'nickname': None})
+
+        v2 = yield PartialVertexModel.get(v1.id)
+        self.assertIsNone(v2.name)
+        self.assertEqual(v2.test_val, 2)
+        self.assertNotIn('nickname', v2)
+
+    @gen_test
+    def test_unmodified(self):
+        v1 = yield PartialVertexModel.create(name='a', test_val=1)
+        v2 = yield TestVertexModel.create(name='b')
+        e1 = yield TestEdgeModel.create(v2, v2)
+        del self.bindings[:]
+
+        self.assertIs((yield v1.save()), v1)
+        v1.test_val = 1
+        yield v1.save()
+        self.assertEqual(self.bindings, [])
+        v3 = yield PartialVertexModel.get(v1.id)
+        yield v3.save()
+        yield v3.reload()
+        yield v3.save()
+        self.assertEqual(len(self.bindings), 2)
+
+        # the connection default
+        yield v2.save()
+        yield e1.save()
+        self.assertEqual(len(self.bindings), 4)
+        connection._partial_saves = True
+        self.addCleanup(setattr, connection, '_partial_saves', False)
+        yield v2.save()
+        yield e1.save()
+        self.assertEqual(len(self.bindings), 4)
+        e1.name = 'c'
+        yield e1.save()
+        self.assertEqual(self.bindings[4]['attrs'],
+                         {TestEdgeModel.get_property_by_name('name'): 'c'})
+
+    @gen_test
+    def test_model_override(self):
+        connection._partial_saves = True
+        self.addCleanup(setattr, connection, '_partial_saves', False)
+        v1 = yield FullVertexModel.create(name='a', test_val=1)
+        del self.bindings[:]
+        v1.test_val = 2
+        yield v1.save()
+        yield v1.save()
+        self.assertEqual(len(self.bindings), 2)
+        self.assertEqual(self.bindings[1]['attrs'],
+                         {NAME: 'a', TEST_VAL: 2})
+
+
+class IdOnlyVertexModel(Vertex):
+    label = 'id_only_vertex_model'
+    __id_only_saves__ = True
+
+    name = String()
+
+
+@attr('unit', 'memory')
+class TestIdOnlySaves(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestIdOnlySaves, self).setUp()
+        self.bindings = []
+        submit = connection.submit
+
+        def counting_submit(query, bindings=None, *args, **kwargs):
+            self.bindings.append(bindings)
+            return submit(query, bindings, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    @gen_test
+    def test_vertex(self):
+        v1 = TestVertexModel(name='a')
+        self.assertIs((yield v1.save(id_only=True)), v1)
+        self.assertTrue(self.bindings[0]['id_only'])
+        self.assertEqual(self.graph.get_vertex(v1.id).id, v1.id)
+        v1.name = 'b'
+        yield v1.save(id_only=True)
+        self.assertEqual((yield TestVertexModel.get(v1.id)).name, 'b')
+        self.assertFalse(v1._values['name'].modified)
+
+        v2 = yield IdOnlyVertexModel.create(name='c')
+        self.assertTrue(self.bindings[-1]['id_only'])
+        self.assertEqual((yield IdOnlyVertexModel.get(v2.id)).name, 'c')
+        v3 = IdOnlyVertexModel(name='d')
+        self.assertIsNot((yield v3.save(id_only=False)), v3)
+        self.assertFalse(self.bindings[-1]['id_only'])
+
+    @gen_test
+    def test_edge(self):
+        v1 = yield TestVertexModel.create(name='a')
+        e1 = TestEdgeModel(v1, v1, name='b')
+        self.assertIs((yield e1.save(id_only=True)), e1)
+        self.assertTrue(self.bindings[-1]['id_only'])
+        self.assertEqual((yield TestEdgeModel.get(e1.id)).name, 'b')
@@ -0,0 +1,63 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.exceptions import GoblinQueryError
+from goblin.pipelining import compose, split
+from goblin.tests.base import TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase
+
+
+@attr('unit', 'memory')
+class TestExecuteMany(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestExecuteMany, self).setUp()
+        self.scripts = []
+        submit = connection.submit
+
+        def counting_submit(query, *args, **kwargs):
+            self.scripts.append(query)
+            return submit(query, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    @gen_test
+    def test_results(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        del self.scripts[:]
+        futures = connection.execute_many([
+            ('g.V(vid)', {'vid': v1.id}),
+            ('g.V(vid)', {'vid': v2.id}),
+            ('g.V(vid)', {'vid': 1000})])
+        self.assertEqual(len(self.scripts), 1)
+        first, second, missing = yield futures
+        self.assertEqual([v['id'] for v in first], [v1.id])
+        self.assertEqual([v['id'] for v in second], [v2.id])
+        self.assertEqual(missing, [])
+        self.assertEqual(connection.execute_many([]), [])
+
+    @gen_test
+    def test_isolated_error(self):
+        v1 = yield TestVertexModel.create(name='a')
+        futures = connection.execute_many([
+            ('g.V().repeat(out())', {}),
+            ('g.V(vid)', {'vid': v1.id})])
+        with self.assertRaises(GoblinQueryError):
+            yield futures[0]
+        self.assertEqual([v['id'] for v in (yield futures[1])], [v1.id])
+
+    def test_compose_and_split(self):
+        queries = [('import a.B\ng.V(vid).hasLabel(x)', {'vid': 1, 'x': 'y'}),
+                   ('import a.B\ng.V()', None)]
+        script, bindings = compose(queries)
+        self.assertEqual(script.count('import a.B'), 1)
+        self.assertTrue(script.startswith('import a.B\n'))
+        self.assertEqual(sorted(bindings), ['_goblin_0_vid', '_goblin_0_x'])
+        self.assertEqual(split(script, bindings),
+                         [('g.V(vid).hasLabel(x)', {'vid': 1, 'x': 'y'}),
+                          ('g.V()', {})])
+        self.assertIsNone(split('g.V()', {}))
@@ -0,0 +1,145 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import concurrent, gen
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.bytecode import Enum
+from goblin.memory import Pool
+from goblin.models import E, V
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase, MEMORY_URL
+
+
+@attr('unit', 'memory')
+class TestQuerySteps(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestQuerySteps, self).setUp()
+        self.scripts = []
+        submit = connection.submit
+
+        def counting_submit(query, *args, **kwargs):
+            self.scripts.append(query)
+            return submit(query, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    @gen.coroutine
+    def read(self, q):
+        stream = yield q.get()
+        raise gen.Return((yield stream.read()) or [])
+
+    @gen.coroutine
+    def create(self):
+        source = yield TestVertexModel.create(name='source')
+        for i in (3, 1, 4, 2):
+            target = yield TestVertexModel.create(name='v{}'.format(i),
+                                                  test_val=i)
+            yield TestEdgeModel.create(source, target)
+        raise gen.Return(source)
+
+    @gen_test
+    def test_count(self):
+        source = yield self.create()
+        del self.scripts[:]
+        count = yield V(source).out_step().count()
+        self.assertEqual(count, 4)
+        self.assertEqual(len(self.scripts), 1)
+        self.assertIn('.count()', self.scripts[0])
+        self.assertEqual((yield V(source).in_step().count()), 0)
+
+    @gen_test
+    def test_order_limit_range(self):
+        source = yield self.create()
+        test_val = TestVertexModel.get_property_by_name('test_val')
+        q = V(source).out_step().order_by(test_val)
+        self.assertEqual([v.name for v in (yield self.read(q))],
+                         ['v1', 'v2', 'v3', 'v4'])
+        self.assertEqual([v.name for v in (yield self.read(q.limit(2)))],
+                         ['v1', 'v2'])
+        self.assertEqual([v.name for v in (yield self.read(q.range(1, 3)))],
+                         ['v2', 'v3'])
+        q = V(source).out_step().order_by(test_val, desc=True).limit(3)
+        self.assertEqual([v.name for v in (yield self.read(q))],
+                         ['v4', 'v3', 'v2'])
+        self.assertEqual((yield q.count()), 3)
+
+    @gen_test
+    def test_dedup_and_values(self):
+        source = yield self.create()
+        test_val = TestVertexModel.get_property_by_name('test_val')
+        q = V(source).out_step().in_step()
+        self.assertEqual(len((yield self.read(q))), 4)
+        self.assertEqual((yield self.read(q.dedup())), [source])
+        q = V(source).out_step().order_by(test_val).values(test_val)
+        self.assertEqual((yield self.read(q)), [1, 2, 3, 4])
+
+    @gen_test
+    def test_start_from_ids(self):
+        source = yield self.create()
+        targets = yield self.read(V(source).out_step())
+        test_val = TestVertexModel.get_property_by_name('test_val')
+        q = V.ids([targets[0], targets[1].id]).order_by(test_val)
+        self.assertEqual([v.name for v in (yield self.read(q))],
+                         sorted([targets[0].name, targets[1].name]))
+        self.assertEqual((yield V.ids(targets).in_step().dedup().count()), 1)
+        self.assertEqual((yield self.read(V.ids([targets[2]]))),
+                         [targets[2]])
+        with self.assertRaises(ValueError):
+            V.ids([])
+
+    @gen_test
+    def test_start_from_label(self):
+        source = yield self.create()
+        yield TestEdgeModel.create(source, source, test_val=7)
+        test_val = TestVertexModel.get_property_by_name('test_val')
+        q = V.label(TestVertexModel).has(test_val, 4)
+        self.assertEqual([v.name for v in (yield self.read(q))], ['v4'])
+        self.assertEqual((yield V.label(TestVertexModel).count()), 5)
+        self.assertEqual((yield V.label('missing').count()), 0)
+        edge_val = TestEdgeModel.get_property_by_name('test_val')
+        edges = yield self.read(E.label(TestEdgeModel).has(edge_val, 7))
+        self.assertEqual(len(edges), 1)
+        self.assertIsInstance(edges[0], TestEdgeModel)
+        self.assertEqual((yield self.read(E.ids(edges).out_v())), [source])
+        self.assertEqual((yield E.label(TestEdgeModel).count()), 5)
+        with self.assertRaises(ValueError):
+            V.label()
+
+    def test_copies(self):
+        test_val = TestVertexModel.get_property_by_name('test_val')
+        q = V(1).out_step()
+        limited = q.limit(2)
+        ordered = q.order_by(test_val)
+        self.assertEqual(len(q._steps), 1)
+        self.assertEqual(len(limited._steps), 2)
+        self.assertEqual(len(ordered._steps), 3)
+        self.assertEqual(len(q._bindings), len(ordered._bindings))
+
+
+@attr('unit', 'memory')
+class TestBytecodeQuerySteps(TestQuerySteps):
+
+    def setUp(self):
+        super(TestBytecodeQuerySteps, self).setUp()
+        connection.setup(MEMORY_URL, pool_class=Pool,
+                         future_class=concurrent.Future, bytecode=True)
+        self.addCleanup(setattr, connection, '_bytecode', False)
+
+    def test_bytecode(self):
+        test_val = TestVertexModel.get_property_by_name('test_val')
+        q = V(1).out_step().order_by(test_val, desc=True).range(0, 2)
+        self.assertEqual(q.bytecode().steps[2:], [
+            ['order'], ['by', test_val, Enum('Order', 'decr')],
+            ['range', 0, 2]])
+        q = V.label(TestVertexModel).has(test_val, 1)
+        self.assertEqual(q.bytecode().steps[:2], [
+            ['V'], ['hasLabel', TestVertexModel.get_label()]])
+        self.assertEqual(E.ids([1, 2]).bytecode().steps, [['E', 1, 2]])
+
+    @gen_test
+    def test_count(self):
+        source = yield self.create()
+        self.assertEqual((yield V(source).out_step().count()), 4)
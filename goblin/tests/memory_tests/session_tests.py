@@ -0,0 +1,156 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import concurrent
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.cache import ElementCache
+from goblin.exceptions import GoblinException
+from goblin.identity import IdentityMap
+from goblin.memory import Pool
+from goblin.session import Session, current
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase, MEMORY_URL
+from goblin.tests.relationships_tests.vertex_relationship_io_tests import (
+    TestRelationshipEdgeModel, TestRelationshipVertexModel)
+
+
+@attr('unit', 'memory')
+class TestSession(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestSession, self).setUp()
+        self.scripts = []
+        submit = connection.submit
+
+        def counting_submit(query, *args, **kwargs):
+            self.scripts.append(query)
+            return submit(query, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    @gen_test
+    def test_flush(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = yield TestVertexModel.create(name='b')
+        e1 = yield TestEdgeModel.create(v1, v2)
+        del self.scripts[:]
+
+        session = Session()
+        with session:
+            self.assertIs(current(), session)
+            v3 = TestVertexModel(name='c')
+            saved = v3.save()
+            v3.name = 'd'
+            v3.save()
+            e2 = TestEdgeModel(v1, v3, name='e')
+            e2.save()
+            v1.name = 'f'
+            v1.save()
+            e1.delete()
+            v2.delete()
+        self.assertIsNone(current())
+        self.assertEqual(len(session), 6)
+        self.assertFalse(saved.done())
+        self.assertEqual(self.scripts, [])
+
+        results = yield session.flush()
+        self.assertEqual(len(self.scripts), 1)
+        self.assertEqual(len(session), 0)
+        self.assertIs((yield saved), v3)
+        self.assertEqual(results, [v3, v3, e2, v1, None, None])
+        self.assertEqual(len(self.graph.vertices), 2)
+        name = TestVertexModel.get_property_by_name('name')
+        self.assertEqual(self.graph.get_vertex(v3.id).value(name), 'd')
+        self.assertEqual(self.graph.get_vertex(v1.id).value(name), 'f')
+        self.assertEqual(list(self.graph.edges), [e2.id])
+        edge = self.graph.get_edge(e2.id)
+        self.assertEqual((edge.out_v.id, edge.in_v.id), (v1.id, v3.id))
+        self.assertEqual((yield session.flush()), [])
+        self.assertEqual(len(self.scripts), 1)
+
+    @gen_test
+    def test_relationship(self):
+        v1 = yield TestRelationshipVertexModel.create(name='a')
+        session = Session()
+        with session:
+            created = v1.relation.create(vertex_params={'name': 'b'})
+        self.assertFalse(created.done())
+        yield session.flush()
+        e1, v2 = yield created
+        self.assertIsInstance(e1, TestRelationshipEdgeModel)
+        self.assertIsInstance(v2, TestVertexModel)
+        self.assertEqual(v2.name, 'b')
+        stream = yield v1.outV(TestRelationshipEdgeModel)
+        self.assertEqual((yield stream.read()), [v2])
+
+    @gen_test
+    def test_explicit(self):
+        v1 = yield TestVertexModel.create(name='a')
+        v2 = TestVertexModel(name='b')
+        session = Session()
+        saved = session.save(v2)
+        deleted = session.delete(v1)
+        self.assertIsNone(current())
+        yield session.flush()
+        self.assertIs((yield saved), v2)
+        self.assertIsNone((yield deleted))
+        self.assertEqual(list(self.graph.vertices), [v2.id])
+
+    @gen_test
+    def test_save_then_delete(self):
+        v1 = yield TestVertexModel.create(name='a')
+        session = Session()
+        with session:
+            v2 = TestVertexModel(name='b')
+            v2.save()
+            e1 = TestEdgeModel(v1, v2)
+            e1.save()
+            e1.delete()
+            deleted = v2.delete()
+        self.assertEqual(len(session), 4)
+        results = yield session.flush()
+        self.assertEqual(results, [v2, e1, None, None])
+        self.assertIsNone((yield deleted))
+        self.assertEqual(list(self.graph.vertices), [v1.id])
+        self.assertEqual(len(self.graph.edges), 0)
+
+        with self.assertRaises(GoblinException):
+            # never saved, so there is nothing to delete
+            yield session.delete(TestVertexModel(name='c'))
+        self.assertEqual(len(session), 0)
+
+    @gen_test
+    def test_errors(self):
+        v1 = yield TestVertexModel.create(name='a')
+        session = Session()
+        with self.assertRaises(GoblinException):
+            # the vertices of an edge must be saved first
+            yield session.save(TestEdgeModel(v1, TestVertexModel()))
+        yield v1.delete()
+        saved = session.save(TestVertexModel(name='b'))
+        deleted = session.delete(v1)
+        with self.assertRaises(RuntimeError):
+            yield session.flush()
+        for future in (saved, deleted):
+            with self.assertRaises(RuntimeError):
+                yield future
+
+    @gen_test
+    def test_cache_and_identity_map(self):
+        cache = ElementCache()
+        connection.setup(MEMORY_URL, pool_class=Pool,
+                         future_class=concurrent.Future, element_cache=cache)
+        self.addCleanup(setattr, connection, '_element_cache', None)
+        v1 = yield TestVertexModel.create(name='a')
+        yield TestVertexModel.get(v1.id)
+        session = Session()
+        with IdentityMap() as identity_map:
+            v2 = TestVertexModel(name='b')
+            session.save(v2)
+            session.delete(v1)
+            yield session.flush()
+            self.assertIn(v2, identity_map)
+        with self.assertRaises(TestVertexModel.DoesNotExist):
+            yield TestVertexModel.get(v1.id)
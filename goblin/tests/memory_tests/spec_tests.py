@@ -0,0 +1,209 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado.testing import gen_test
+
+from goblin import connection, spec
+from goblin.exceptions import ElementDefinitionException, GoblinException
+from goblin.models import Edge, Vertex
+from goblin.properties import IPV6, Integer, String
+from goblin.tests.memory_tests.base import BaseMemoryTestCase
+
+
+class SpecPerson(Vertex):
+    label = 'spec_person'
+
+    name = String(index=True)
+    age = Integer(index=True, index_ext='search')
+
+
+class SpecHost(Vertex):
+    label = 'spec_host'
+
+    address = IPV6()
+
+
+class SpecKnows(Edge):
+    label = 'spec_knows'
+
+    since = Integer(index=True)
+
+
+class RecordingMeter(object):
+
+    def __init__(self):
+        self.values = []
+
+    def inc(self, value):
+        self.values.append(value)
+
+    def _update(self, value):
+        self.values.append(value)
+
+
+class RecordingMetricManager(object):
+    """ Records the metrics reported, like a MetricManager's registry """
+
+    def __init__(self):
+        self.meters = {}
+
+    def _meter(self, key):
+        yield self.meters.setdefault(key, RecordingMeter())
+
+    counters = timers = _meter
+
+
+@attr('unit', 'memory')
+class TestSpec(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestSpec, self).setUp()
+        self.graph.schema.clear()
+        self.scripts = []
+        self.actions = []
+        submit = connection.submit
+
+        def counting_submit(query, *args, **kwargs):
+            self.scripts.append(query)
+            bindings = kwargs.get('bindings') or {}
+            if 'action' in bindings:
+                # the index status when the action is sent
+                index = self.graph.indexes[(bindings['elabel'],
+                                            bindings['index_name'])]
+                self.actions.append((bindings['index_name'],
+                                     bindings['action'], index['status']))
+            return submit(query, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    def test_generate_spec(self):
+        name = SpecPerson.get_property_by_name('name')
+        age = SpecPerson.get_property_by_name('age')
+        address = SpecHost.get_property_by_name('address')
+        since = SpecKnows.get_property_by_name('since')
+        result = spec.generate_spec([SpecPerson, SpecHost, SpecKnows,
+                                     SpecPerson])
+        self.assertEqual(result['vertex_labels'],
+                         ['spec_person', 'spec_host'])
+        self.assertEqual(result['edge_labels'], ['spec_knows'])
+        self.assertEqual(result['property_keys'], [
+            {'name': name, 'data_type': 'String', 'cardinality': 'SINGLE'},
+            {'name': age, 'data_type': 'Integer', 'cardinality': 'SINGLE'},
+            {'name': address, 'data_type': 'Long', 'cardinality': 'LIST'},
+            {'name': since, 'data_type': 'Integer', 'cardinality': 'SINGLE'}])
+        self.assertEqual(result['composite_indexes'], [
+            {'name': 'spec_person_by_' + name, 'element': 'vertex',
+             'label': 'spec_person', 'keys': [name]},
+            {'name': 'spec_knows_by_' + since, 'element': 'edge',
+             'label': 'spec_knows', 'keys': [since]}])
+        self.assertEqual(result['mixed_indexes'], [
+            {'name': 'spec_person_by_{}_search'.format(age),
+             'element': 'vertex', 'label': 'spec_person', 'keys': [age],
+             'backend': 'search'}])
+        self.assertEqual(result['edge_indexes'], [
+            {'name': 'by_' + since, 'label': 'spec_knows', 'keys': [since],
+             'direction': 'BOTH'}])
+        self.assertEqual(connection.generate_spec([SpecKnows])['edge_labels'],
+                         ['spec_knows'])
+
+    def test_conflicts(self):
+        class SpecListEdge(Edge):
+            label = 'spec_list_edge'
+
+            address = IPV6()
+
+        connection._loaded_models.remove(SpecListEdge)
+        with self.assertRaises(ElementDefinitionException):
+            spec.generate_spec([SpecListEdge])
+
+        class SpecOther(Vertex):
+            label = 'spec_other'
+
+            name = Integer(db_field_prefix='specperson_')
+
+        connection._loaded_models.remove(SpecOther)
+        with self.assertRaises(ElementDefinitionException):
+            spec.generate_spec([SpecPerson, SpecOther])
+
+    @gen_test
+    def test_sync_spec(self):
+        needed = spec.generate_spec([SpecPerson, SpecKnows])
+        missing = yield spec.sync_spec(needed, dry_run=True)
+        self.assertEqual(missing, needed)
+        self.assertEqual(self.graph.schema, {})
+        missing = yield spec.sync_spec(needed)
+        self.assertEqual(missing, needed)
+        self.assertEqual(len(self.scripts), 3)
+        self.assertEqual(sorted(self.graph.schema['graph_indexes']), sorted(
+            index['name'] for index in
+            needed['composite_indexes'] + needed['mixed_indexes']))
+        # only the missing parts are applied
+        self.graph.schema['graph_indexes'].pop()
+        del self.scripts[:]
+        missing = yield connection.sync_spec(needed)
+        self.assertEqual(len(self.scripts), 2)
+        self.assertEqual(sum(len(parts) for parts in missing.values()), 1)
+        del self.scripts[:]
+        missing = yield spec.sync_spec(needed)
+        self.assertEqual(len(self.scripts), 1)
+        self.assertFalse(any(missing.values()))
+
+    @gen_test
+    def test_reindex(self):
+        for name in ('a', 'b', 'c'):
+            yield SpecPerson.create(name=name)
+        yield SpecPerson.create(age=5)
+        needed = spec.generate_spec([SpecPerson, SpecKnows])
+        yield spec.sync_spec(needed)
+        index_name = needed['composite_indexes'][0]['name']
+        index = self.graph.indexes[(None, index_name)]
+        index['status'] = 'REGISTERED'
+        metrics = RecordingMetricManager()
+        records = yield spec.reindex(index_name, poll_interval=0,
+                                     metric_manager=metrics)
+        self.assertEqual(records, 3)
+        self.assertEqual(index['status'], 'ENABLED')
+        key = 'goblin.reindex.{}'.format(index_name)
+        # the progress is reported as the job goes
+        self.assertEqual(metrics.meters[key + '.records'].values, [1, 2])
+        self.assertEqual(len(metrics.meters[key + '.timer'].values), 1)
+        index['status'] = 'DISABLED'
+        with self.assertRaises(GoblinException):
+            yield spec.reindex(index_name, poll_interval=0)
+
+    @gen_test
+    def test_sync_spec_existing_keys(self):
+        yield SpecPerson.create(name='a')
+        needed = spec.generate_spec([SpecPerson])
+        yield spec.sync_spec(dict(needed, composite_indexes=[],
+                                  mixed_indexes=[]))
+        # without reindex, the script enables the indexes at once
+        yield spec.sync_spec(needed)
+        for index in needed['composite_indexes']:
+            status = self.graph.indexes[(None, index['name'])]
+            self.assertEqual(status['status'], 'ENABLED')
+            self.assertIsNone(status['job'])
+        self.assertEqual(self.actions, [])
+
+    @gen_test
+    def test_sync_spec_reindex(self):
+        yield SpecPerson.create(name='a')
+        needed = spec.generate_spec([SpecPerson, SpecKnows])
+        # the keys exist, not the indexes
+        yield spec.sync_spec(dict(needed, composite_indexes=[],
+                                  mixed_indexes=[]))
+        missing = yield spec.sync_spec(needed, reindex=True, poll_interval=0)
+        self.assertEqual(len(missing['composite_indexes']), 2)
+        for index in missing['composite_indexes']:
+            status = self.graph.indexes[(None, index['name'])]
+            self.assertIsNotNone(status['job'])
+            self.assertEqual(status['status'], 'ENABLED')
+            # enabled only once the existing elements are reindexed
+            self.assertEqual(
+                [action for action in self.actions
+                 if action[0] == index['name']],
+                [(index['name'], 'REINDEX', 'REGISTERED'),
+                 (index['name'], 'ENABLE_INDEX', 'REGISTERED')])
+        # the vertex-centric index made with its key is not reindexed
+        self.assertIsNone(self.graph.indexes[
+            ('spec_knows', needed['edge_indexes'][0]['name'])]['job'])
@@ -0,0 +1,80 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import concurrent
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.gremlin import stored
+from goblin.memory import Pool
+from goblin.models import Edge, Vertex
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase, MEMORY_URL
+
+
+@attr('unit', 'memory')
+class TestStoredMethods(BaseMemoryTestCase):
+
+    def setUp(self):
+        super(TestStoredMethods, self).setUp()
+        connection.setup(MEMORY_URL, pool_class=Pool,
+                         future_class=concurrent.Future, stored_methods=True)
+        self.addCleanup(setattr, connection, '_stored_methods', False)
+        self.graph.functions.clear()
+        self.scripts = []
+        submit = connection.submit
+
+        def counting_submit(query, *args, **kwargs):
+            self.scripts.append(query)
+            return submit(query, *args, **kwargs)
+
+        connection.submit = counting_submit
+        self.addCleanup(setattr, connection, 'submit', submit)
+
+    @gen_test
+    def test_calls_by_name(self):
+        name = stored.stored_name(Vertex._gremlin_methods['_save_vertex'])
+        v1 = yield TestVertexModel.create(name='a')
+        self.assertIn('def {}('.format(name), self.scripts[0])
+        self.assertIn(name, self.graph.functions)
+        v2 = yield TestVertexModel.create(name='b')
+        self.assertEqual(self.scripts[1],
+                         '{}(vid, vlabel, attrs, geo_attrs, id_only)'.format(
+                             name))
+        stream = yield TestVertexModel.all([v1.id, v2.id])
+        self.assertEqual([v.name for v in (yield stream.read())], ['a', 'b'])
+
+    @gen_test
+    def test_lost_definition(self):
+        v1 = yield TestVertexModel.create(name='a')
+        yield TestVertexModel.create(name='b')
+        # the server restarted
+        self.graph.functions.clear()
+        del self.scripts[:]
+        v1.name = 'c'
+        self.assertEqual((yield v1.save()).name, 'c')
+        self.assertEqual(len(self.scripts), 2)
+        self.assertNotIn('def ', self.scripts[0])
+        self.assertIn('def ', self.scripts[1])
+        # the results of the call sent again are deserialized
+        self.assertEqual((yield TestVertexModel.get(v1.id)).name, 'c')
+        v2 = yield TestVertexModel.create(name='d')
+        self.assertIsInstance(v2, TestVertexModel)
+
+    @gen_test
+    def test_errors(self):
+        v1 = yield TestVertexModel.create(name='a')
+        yield TestVertexModel.create(name='b')
+        with self.assertRaises(RuntimeError):
+            # the edge's vertex does not exist
+            yield TestEdgeModel.create(v1, TestVertexModel(_id=1000))
+
+    def test_init_script(self):
+        script = stored.init_script(Vertex, Edge)
+        for klass in (Vertex, Edge):
+            for method in klass._gremlin_methods.values():
+                self.assertIn(stored.definition(method), script)
+        self.assertEqual(len(script.split('\ndef ')),
+                         len(set(stored.definition(method)
+                                 for klass in (Vertex, Edge)
+                                 for method in klass._gremlin_methods.values()
+                                 )))
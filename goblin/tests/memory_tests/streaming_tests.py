@@ -0,0 +1,78 @@
+from __future__ import unicode_literals
+from nose.plugins.attrib import attr
+from tornado import gen
+from tornado.testing import gen_test
+
+from goblin import connection
+from goblin.constants import RESULT_ITERATION_BATCH_SIZE
+from goblin.models import V, Vertex
+from goblin.tests.base import TestEdgeModel, TestVertexModel
+from goblin.tests.memory_tests.base import BaseMemoryTestCase
+
+# spans three response batches
+FAN_OUT = 2 * RESULT_ITERATION_BATCH_SIZE + 10
+
+
+@attr('unit', 'memory')
+class TestResultStream(BaseMemoryTestCase):
+
+    @gen.coroutine
+    def create_fan_out(self):
+        source = yield TestVertexModel.create(name='source')
+        for i in range(FAN_OUT):
+            target = yield TestVertexModel.create(name='target')
+            yield TestEdgeModel.create(source, target)
+        raise gen.Return(source)
+
+    @gen_test
+    def test_read_batches(self):
+        source = yield self.create_fan_out()
+        results = V(source).out_step(TestEdgeModel).stream()
+        sizes = []
+        while True:
+            batch = yield results.read()
+            if batch is None:
+                break
+            sizes.append(len(batch))
+            for vertex in batch:
+                self.assertIsInstance(vertex, Vertex)
+        self.assertEqual(sizes, [RESULT_ITERATION_BATCH_SIZE,
+                                 RESULT_ITERATION_BATCH_SIZE, 10])
+        self.assertTrue(results.closed)
+
+    @gen_test
+    def test_raw_results(self):
+        v1 = yield TestVertexModel.create(name='a')
+        results = TestVertexModel.stream_all([v1.id], deserialize=False)
+        batch = yield results.read()
+        self.assertEqual(batch[0]['id'], v1.id)
+
+    @gen_test
+    def test_close(self):
+        source = yield self.create_fan_out()
+        pool = connection._connection_pool
+        size = pool.size
+        results = V(source).out_step(TestEdgeModel).stream()
+        batch = yield results.read()
+        self.assertEqual(len(batch), RESULT_ITERATION_BATCH_SIZE)
+        self.assertEqual(pool.size - pool.freesize, 1)
+
+        yield results.close()
+        self.assertTrue(results.closed)
+        # the connection was dropped instead of being reused
+        self.assertEqual(pool.size, size - 1)
+        self.assertEqual(pool.size, pool.freesize)
+        batch = yield results.read()
+        self.assertIsNone(batch)
+
+        # the pool keeps working
+        vertices = yield TestVertexModel.all([source.id])
+        self.assertEqual((yield vertices.read()), [source])
+
+    @gen_test
+    def test_close_finished(self):
+        v1 = yield TestVertexModel.create(name='a')
+        results = TestVertexModel.stream_all([v1.id])
+        self.assertEqual((yield results.read()), [v1])
+        yield results.close()
+        self.assertIsNone((yield results.read()))
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 import json
+import os.path
 from tornado.testing import gen_test
 from goblin._compat import print_
 from nose.plugins.attrib import attr
@@ -17,6 +18,7 @@ from goblin.models.vertex import EnumVertexBaseMeta
 from goblin import properties
 from goblin._compat import with_metaclass
 from goblin.exceptions import GoblinQueryError, ModelException
+from goblin.memory.functions import groovy_function, register_groovy_file
 
 
 class TestVertexModel2(Vertex):
@@ -258,6 +260,21 @@ class DeserializationTestModel(Vertex):
     get_list = gremlin.GremlinMethod()
 
 
+# deserialize.groovy for GOBLIN_TEST_BACKEND=memory
+register_groovy_file(os.path.join(os.path.dirname(__file__),
+                                  'deserialize.groovy'))
+
+
+@groovy_function('get_maps')
+def _get_maps(graph, vid):
+    return {'vertex': graph.get_vertex(vid), 'number': 5}
+
+
+@groovy_function('get_list')
+def _get_list(graph, vid):
+    return [None, 0, 1, [2, graph.get_vertex(vid), 3], 5]
+
+
 @attr('unit', 'vertex_io')
 class TestNestedDeserialization(BaseGoblinTestCase):
     """
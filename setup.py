@@ -12,7 +12,6 @@ develop_requires = ['Sphinx==1.3.5',
                     'newrelic==2.60.0.46',
                     'nose==1.3.7',
                     'pyformance==0.3.2',
-                    'pyparsing==2.1.0',
                     'pytz==2015.7',
                     'six==1.10.0',
                     'sphinx-rtd-theme==0.1.9',
@@ -60,8 +59,7 @@ setup(
         "Topic :: Software Development :: Libraries :: Python Modules",
     ],
     keywords='tinkerpop,titan,ogm,goblin,gremlin',
-    install_requires=['pyparsing>=2.0.2',
-                      'pytz>=2015.7',
+    install_requires=['pytz>=2015.7',
                       'geojson>=1.3.2',
                       'gremlinclient>=0.2.6',
                       'inflection>=0.3.1',